@@ -4,12 +4,18 @@ Serves Google Shopping and Meta Catalog feeds with unified health monitoring
 Includes internal scheduled job for automatic feed generation
 """
 
-from flask import Flask, send_file, jsonify, render_template_string
+from flask import Flask, send_file, jsonify, render_template_string, request
 from pathlib import Path
 import json
 import os
+import hmac
+import base64
+import hashlib
 import logging
+import threading
 from datetime import datetime
+
+from src.webhook_batcher import MicroBatcher, ACTION_UPDATE, ACTION_DELETE
 # APScheduler imports removed - no longer needed for internal scheduling
 # from apscheduler.schedulers.background import BackgroundScheduler
 # from apscheduler.triggers.cron import CronTrigger
@@ -26,6 +32,34 @@ PUBLIC_DIR = Path('public')
 GOOGLE_FEED_PATH = PUBLIC_DIR / 'google_shopping_feed.xml'
 META_FEED_PATH = PUBLIC_DIR / 'meta_catalog_feed.xml'
 METRICS_PATH = PUBLIC_DIR / 'feed_metrics.json'
+FEED_PATHS = {'google': GOOGLE_FEED_PATH, 'meta': META_FEED_PATH}
+
+# Other feed formats (platforms.json "formats"), next to the XML feed
+FORMAT_MIMETYPES = {
+    'csv': 'text/csv',
+    'tsv': 'text/tab-separated-values',
+    'jsonl': 'application/x-ndjson',
+}
+
+# Webhooks (near-real-time incremental updates)
+WEBHOOK_SECRET = os.getenv('SHOPIFY_WEBHOOK_SECRET', '')
+WEBHOOK_BATCH_WINDOW_SECONDS = float(os.getenv('WEBHOOK_BATCH_WINDOW_SECONDS', '30'))
+WEBHOOK_TOPICS = {
+    'products/create': ACTION_UPDATE,
+    'products/update': ACTION_UPDATE,
+    'products/delete': ACTION_DELETE,
+}
+
+# Full generation and incremental updates rewrite the same files: never overlap.
+# Solo all'interno di un processo: con più worker (gunicorn -w N) o più istanze
+# ogni processo ha il suo lock e i suoi batch webhook, quindi eseguire un solo worker
+GENERATION_LOCK = threading.Lock()
+
+_webhook_batcher = None
+_webhook_batcher_lock = threading.Lock()
+
+if not WEBHOOK_SECRET:
+    logger.warning("⚠️ SHOPIFY_WEBHOOK_SECRET not set: /webhooks/products rejects all webhooks (401)")
 
 
 def generate_feeds_job():
@@ -41,8 +75,9 @@ def generate_feeds_job():
         # Import and run orchestrator
         from orchestrator import FeedOrchestrator
         
-        orchestrator = FeedOrchestrator()
-        success = orchestrator.generate_all_feeds()
+        with GENERATION_LOCK:
+            orchestrator = FeedOrchestrator()
+            success = orchestrator.generate_all_feeds()
         
         if success:
             logger.info("✅ Scheduled feed generation completed successfully!")
@@ -268,18 +303,45 @@ def index():
     )
 
 
+def gzip_feed_path(feed_path: Path):
+    """Precompressed copy of a feed, None if missing or older than the feed (e.g. generation in progress)"""
+    gz_path = feed_path.with_name(feed_path.name + '.gz')
+    try:
+        if gz_path.stat().st_mtime >= feed_path.stat().st_mtime:
+            return gz_path
+    except OSError:
+        pass
+    return None
+
+
+def send_feed(feed_path: Path, download_name: str, mimetype: str = 'application/xml'):
+    """
+    Serve a feed XML, precompressed (Content-Encoding: gzip) when the client accepts gzip
+    
+    The body is still the XML document: clients that sent Accept-Encoding
+    decompress it transparently, so the download is ~10x smaller.
+    """
+    gz_path = gzip_feed_path(feed_path) if request.accept_encodings.quality('gzip') > 0 else None
+    
+    response = send_file(
+        gz_path or feed_path,
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=download_name
+    )
+    if gz_path:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
 @app.route('/feed/google')
 def serve_google_feed():
     """Serve Google Shopping feed XML"""
     if not GOOGLE_FEED_PATH.exists():
         return jsonify({'error': 'Google feed not found. Please trigger generation first.'}), 404
     
-    return send_file(
-        GOOGLE_FEED_PATH,
-        mimetype='application/xml',
-        as_attachment=True,
-        download_name='google_shopping_feed.xml'
-    )
+    return send_feed(GOOGLE_FEED_PATH, 'google_shopping_feed.xml')
 
 
 @app.route('/feed/meta')
@@ -288,12 +350,21 @@ def serve_meta_feed():
     if not META_FEED_PATH.exists():
         return jsonify({'error': 'Meta feed not found. Please trigger generation first.'}), 404
     
-    return send_file(
-        META_FEED_PATH,
-        mimetype='application/xml',
-        as_attachment=True,
-        download_name='meta_catalog_feed.xml'
-    )
+    return send_feed(META_FEED_PATH, 'meta_catalog_feed.xml')
+
+
+@app.route('/feed/<platform_name>/<format_name>')
+def serve_feed_format(platform_name, format_name):
+    """Serve another format of a platform feed (CSV/TSV/JSONL, if enabled in platforms.json)"""
+    if platform_name not in FEED_PATHS or format_name not in FORMAT_MIMETYPES:
+        return jsonify({'error': f'Unknown feed: {platform_name}/{format_name}'}), 404
+    
+    feed_path = FEED_PATHS[platform_name].with_suffix(f'.{format_name}')
+    if not feed_path.exists():
+        return jsonify({'error': f'{platform_name.title()} {format_name.upper()} feed not found. '
+                                 f'Enable it in platforms.json "formats" and trigger generation.'}), 404
+    
+    return send_feed(feed_path, feed_path.name, FORMAT_MIMETYPES[format_name])
 
 
 @app.route('/api/health')
@@ -333,6 +404,11 @@ def api_health():
     if meta_status['exists']:
         meta_status['file_size_mb'] = round(META_FEED_PATH.stat().st_size / (1024 * 1024), 2)
     
+    # Download size with gzip (precompressed copy, if current)
+    for status, feed_path in ((google_status, GOOGLE_FEED_PATH), (meta_status, META_FEED_PATH)):
+        gz_path = gzip_feed_path(feed_path) if status['exists'] else None
+        status['gzip_size_mb'] = round(gz_path.stat().st_size / (1024 * 1024), 2) if gz_path else None
+    
     overall_status = 'healthy' if (google_status['exists'] and meta_status['exists']) else 'partial'
     
     return jsonify({
@@ -360,8 +436,9 @@ def api_trigger():
             try:
                 from orchestrator import FeedOrchestrator
 
-                orchestrator = FeedOrchestrator()
-                success = orchestrator.generate_all_feeds()
+                with GENERATION_LOCK:
+                    orchestrator = FeedOrchestrator()
+                    success = orchestrator.generate_all_feeds()
 
                 if success:
                     logger.info("✅ Manual feed generation completed successfully!")
@@ -372,7 +449,6 @@ def api_trigger():
                 logger.error(f"💥 Error in manual feed generation: {e}", exc_info=True)
 
         # Start generation in background thread (daemon=True for cleanup)
-        import threading
         thread = threading.Thread(target=run_generation, daemon=True)
         thread.start()
 
@@ -388,6 +464,92 @@ def api_trigger():
         }), 500
 
 
+def apply_webhook_batch(updated_ids, deleted_ids):
+    """
+    Patch the published feeds with a coalesced batch of product changes
+
+    Raises:
+        RuntimeError: A feed was not patched (the batcher retries the batch)
+    """
+    from orchestrator import FeedOrchestrator
+
+    with GENERATION_LOCK:
+        orchestrator = FeedOrchestrator()
+        success = orchestrator.update_products(updated_ids, deleted_ids)
+
+    if success:
+        logger.info("✅ Incremental feed update completed successfully!")
+    else:
+        logger.error("❌ Incremental feed update completed with errors!")
+        raise RuntimeError("Incremental feed update failed")
+
+
+def get_webhook_batcher() -> MicroBatcher:
+    """Get the process-wide webhook batcher (created on first webhook)"""
+    global _webhook_batcher
+
+    with _webhook_batcher_lock:
+        if _webhook_batcher is None:
+            _webhook_batcher = MicroBatcher(apply_webhook_batch, window_seconds=WEBHOOK_BATCH_WINDOW_SECONDS)
+        return _webhook_batcher
+
+
+def verify_webhook_hmac(body: bytes, hmac_header: str) -> bool:
+    """
+    Verify Shopify webhook signature (X-Shopify-Hmac-Sha256)
+
+    Fails closed: without SHOPIFY_WEBHOOK_SECRET no webhook is accepted.
+    """
+    if not WEBHOOK_SECRET:
+        return False
+
+    digest = hmac.new(WEBHOOK_SECRET.encode('utf-8'), body, hashlib.sha256).digest()
+    expected = base64.b64encode(digest).decode('utf-8')
+    return hmac.compare_digest(expected, hmac_header or '')
+
+
+@app.route('/webhooks/products', methods=['POST'])
+def webhooks_products():
+    """
+    Receive Shopify product webhooks (create/update/delete)
+
+    The product id is queued and the feeds are patched by the micro-batcher
+    after WEBHOOK_BATCH_WINDOW_SECONDS, so Shopify gets an immediate 200.
+    """
+    if not WEBHOOK_SECRET:
+        return jsonify({'error': 'Webhooks disabled: SHOPIFY_WEBHOOK_SECRET not set'}), 401
+
+    body = request.get_data()
+
+    if not verify_webhook_hmac(body, request.headers.get('X-Shopify-Hmac-Sha256', '')):
+        logger.warning("⚠️ Rejected webhook with invalid HMAC")
+        return jsonify({'error': 'Invalid signature'}), 401
+
+    topic = request.headers.get('X-Shopify-Topic', '')
+    action = WEBHOOK_TOPICS.get(topic)
+    if not action:
+        return jsonify({'error': f'Unsupported topic: {topic}'}), 400
+
+    try:
+        product_id = int(json.loads(body)['id'])
+    except (ValueError, KeyError, TypeError):
+        return jsonify({'error': 'Missing product id'}), 400
+
+    batcher = get_webhook_batcher()
+    batcher.add(product_id, action)
+
+    return jsonify({'accepted': True, 'product_id': product_id, 'action': action}), 200
+
+
+@app.route('/api/webhooks/status')
+def api_webhooks_status():
+    """Webhook batcher status"""
+    if _webhook_batcher is None:
+        return jsonify({'events_received': 0, 'pending': 0, 'window_seconds': WEBHOOK_BATCH_WINDOW_SECONDS})
+
+    return jsonify(_webhook_batcher.get_stats())
+
+
 @app.route('/health')
 def health():
     """Simple health check for Render"""
@@ -0,0 +1 @@
+# Benchmarks and local test servers
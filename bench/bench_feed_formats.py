@@ -0,0 +1,168 @@
+"""
+Feed Formats Benchmark
+Throughput of the CSV/TSV/JSONL writers next to the XML generator, and
+a round-trip check of every written value
+
+Items are the mapper output for a synthetic catalog plus randomized edge
+cases (see bench_xml_writer.random_items, with list entries containing
+quotes, commas, backslashes, tabs and line breaks). Each file is read
+back: cells must parse to the normalized item values (bracketed lists
+with ast.literal_eval, TSV with tabs and unescaped line breaks as
+spaces) and JSONL objects must equal them.
+
+Usage (from repository root):
+    python bench/bench_feed_formats.py --products 2000 --cases 20000
+"""
+
+import argparse
+import ast
+import csv
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench.bench_xml_writer import mapper_items, random_items
+from platforms.meta.xml_generator import MetaXMLGenerator
+from src.feed_formats import (FORMAT_CSV, FORMAT_JSONL, FORMAT_TSV, LIST_BRACKETED, PLATFORM_SCHEMAS,
+                              create_format_writer)
+from src.xml_generator import StreamingXMLGenerator
+
+XML_GENERATORS = {'google': StreamingXMLGenerator, 'meta': MetaXMLGenerator}
+
+# Entries that break naive list encodings
+TRICKY_ENTRIES = ["b's", "it's, ok", 'back\\slash', "\\'", 'tab\there', 'line\nbreak', "'", ',', '[x]']
+
+
+def edge_items(schema, count: int, seed: int):
+    """random_items plus list values built from TRICKY_ENTRIES"""
+    rnd = random.Random(seed)
+    items = random_items(schema, count, seed)
+    list_keys = [entry[0] for entry in schema if entry[1] in ('list', 'list_split', 'list_strip')]
+    for item in items:
+        for key in list_keys:
+            if rnd.random() < 0.3:
+                item[f'g:{key}'] = rnd.sample(TRICKY_ENTRIES, rnd.randint(1, 4))
+    return items
+
+
+def write_format(platform_name: str, format_name: str, path: str, items) -> float:
+    """Seconds to write all items (XML when format_name is None)"""
+    if format_name is None:
+        writer = XML_GENERATORS[platform_name](path)
+    else:
+        writer = create_format_writer(platform_name, format_name, path)
+    start = time.perf_counter()
+    writer.start_feed('Bench', 'https://racoon-lab.it', 'Bench feed')
+    if format_name is None:
+        for item in items:
+            writer.add_item(item)
+    else:
+        values = writer.values
+        for item in items:
+            writer.add_values(values(item))
+    writer.end_feed()
+    return time.perf_counter() - start
+
+
+def tsv_text(text: str) -> str:
+    """TSV cell sanitization"""
+    return text.replace('\r\n', ' ').replace('\t', ' ').replace('\n', ' ').replace('\r', ' ')
+
+
+def check_delimited(platform_name: str, format_name: str, path: str, items) -> int:
+    """Mismatching cells of a CSV/TSV file"""
+    writer = create_format_writer(platform_name, format_name, path)
+    _, list_formats = PLATFORM_SCHEMAS[platform_name]
+    delimiter = '\t' if format_name == FORMAT_TSV else ','
+    clean = tsv_text if format_name == FORMAT_TSV else (lambda text: text)
+
+    mismatches = 0
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        rows = csv.reader(f, delimiter=delimiter)
+        header = next(rows)
+        for item, row in zip(items, rows, strict=True):
+            values = writer.values(item)
+            for key, cell in zip(header, row, strict=True):
+                value = values.get(key)
+                if value is None:
+                    ok = cell == ''
+                elif key in writer.values.detail_keys:
+                    ok = cell == clean(','.join(f'{name}:{detail}' for name, detail in value))
+                elif isinstance(value, list) and list_formats.get(key) == LIST_BRACKETED:
+                    try:
+                        # Line breaks are escaped inside the literal: only TSV tabs become spaces
+                        ok = ast.literal_eval(cell) == [entry.replace('\t', ' ') if format_name == FORMAT_TSV
+                                                        else entry for entry in value]
+                    except (SyntaxError, ValueError):
+                        ok = False
+                elif isinstance(value, list):
+                    ok = cell == clean(','.join(value))
+                else:
+                    ok = cell == clean(value)
+                if not ok:
+                    mismatches += 1
+                    if mismatches <= 5:
+                        print(f"  ❌ {format_name} {key}: {cell!r} vs {value!r}")
+    return mismatches
+
+
+def check_jsonl(platform_name: str, path: str, items) -> int:
+    """Mismatching objects of a JSONL file"""
+    writer = create_format_writer(platform_name, FORMAT_JSONL, path)
+    mismatches = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for item, line in zip(items, f, strict=True):
+            expected = writer.values(item)
+            for key in writer.values.detail_keys:
+                if key in expected:
+                    expected[key] = [{'attribute_name': name, 'attribute_value': detail}
+                                     for name, detail in expected[key]]
+            if json.loads(line) != expected:
+                mismatches += 1
+                if mismatches <= 5:
+                    print(f"  ❌ jsonl: {line.strip()[:120]}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CSV/TSV/JSONL feed writers')
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--cases', type=int, default=20000, help='Randomized edge-case items per platform')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    google_items, meta_items = mapper_items(args.products, args.seed)
+
+    mismatches = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for platform_name, items in (('google', google_items), ('meta', meta_items)):
+            schema, _ = PLATFORM_SCHEMAS[platform_name]
+            for label, dataset in (('mapper items', items), ('edge cases', edge_items(schema, args.cases, args.seed))):
+                for format_name in (None, FORMAT_CSV, FORMAT_TSV, FORMAT_JSONL):
+                    path = os.path.join(tmp, f'feed.{format_name or "xml"}')
+                    elapsed = write_format(platform_name, format_name, path, dataset)
+                    if format_name == FORMAT_JSONL:
+                        errors = check_jsonl(platform_name, path, dataset)
+                    elif format_name is not None:
+                        errors = check_delimited(platform_name, format_name, path, dataset)
+                    else:
+                        errors = 0
+                    mismatches += errors
+                    print(f"{platform_name:<7} {label:<13} {format_name or 'xml':<6} {len(dataset):>6} items  "
+                          f"{len(dataset) / elapsed:9.0f} items/s  {os.path.getsize(path) / (1024 * 1024):6.2f} MB"
+                          f"{'  ❌ ' + str(errors) + ' mismatches' if errors else ''}")
+
+    print(f"\nMismatches: {mismatches}")
+    return 0 if mismatches == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
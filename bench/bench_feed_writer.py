@@ -0,0 +1,135 @@
+"""
+Feed Writer Benchmark
+Throughput of writing rendered feed items to disk: text-mode file with
+default buffering (one write per item) vs FeedWriter (batched UTF-8
+encoding, binary BufferedWriter) across buffer sizes and batch sizes
+
+Items are Meta items rendered from the mapper output for a synthetic
+catalog, repeated up to --target-mb (a full Meta feed is ~50 MB). Every
+configuration must produce the same bytes. The default configuration is
+also run with the background gzip copy (wall time, .gz size, compressor
+CPU time; the .gz must decompress to the same bytes).
+
+Usage (from repository root):
+    python bench/bench_feed_writer.py --target-mb 50
+"""
+
+import argparse
+import gzip
+import hashlib
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench.bench_mappers import build_inputs
+from core.product_context import ProductContext
+from platforms.meta.mapper import MetaMapper
+from platforms.meta.xml_generator import MetaXMLGenerator
+from src.config_loader import ConfigLoader
+from src.feed_writer import FeedWriter, DEFAULT_BUFFER_SIZE, DEFAULT_BATCH_ITEMS, DEFAULT_GZIP_LEVEL
+
+BUFFER_SIZES = [8 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024]
+BATCH_ITEMS = [1, 16, 64, 256]
+
+
+def rendered_items(num_products: int, seed: int, target_bytes: int):
+    """Rendered Meta <item> blocks, repeated up to target_bytes (UTF-8)"""
+    config = ConfigLoader('config')
+    mapper = MetaMapper(config, 'https://racoon-lab.it')
+    render = MetaXMLGenerator('unused.xml')._render_item
+    items = []
+    for product, metafields, collections in build_inputs(num_products, seed):
+        for item in mapper.transform_product(product, metafields, collections, ProductContext()):
+            items.append(render(item))
+
+    size = sum(len(item.encode('utf-8')) for item in items)
+    copies = max(1, -(-target_bytes // size))
+    return items * copies
+
+
+def write_text_mode(path: str, items):
+    """Text-mode UTF-8 file, default buffering, one write per item"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for item in items:
+            f.write(item)
+
+
+def write_feed_writer(path: str, items, buffer_size: int, batch_items: int, gzip_level: int = 0):
+    """FeedWriter with the given buffer and batch sizes (gzip_level > 0: with the .gz copy)"""
+    writer = FeedWriter(path, 'wb', buffer_size, batch_items,
+                        gzip_path=f"{path}.gz" if gzip_level else None, gzip_level=gzip_level or DEFAULT_GZIP_LEVEL)
+    write = writer.write
+    for item in items:
+        write(item)
+    writer.close()
+    return writer
+
+
+def timed(write, path: str, repeat: int):
+    """(best seconds, md5 of the file)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        write(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    with open(path, 'rb') as f:
+        digest = hashlib.md5(f.read()).hexdigest()
+    return best, digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched feed writing')
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--target-mb', type=float, default=50)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per configuration (best is reported)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    items = rendered_items(args.products, args.seed, int(args.target_mb * 1024 * 1024))
+    total_mb = sum(len(item.encode('utf-8')) for item in items) / (1024 * 1024)
+    print(f"{len(items)} items, {total_mb:.1f} MB\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'feed.xml')
+
+        baseline, reference = timed(lambda p: write_text_mode(p, items), path, args.repeat)
+        print(f"{'text mode (default buffer)':<32} {total_mb / baseline:8.0f} MB/s  "
+              f"{len(items) / baseline:10.0f} items/s  1.00x")
+
+        mismatches = 0
+        for buffer_size in BUFFER_SIZES:
+            for batch_items in BATCH_ITEMS:
+                elapsed, digest = timed(lambda p: write_feed_writer(p, items, buffer_size, batch_items),
+                                        path, args.repeat)
+                mismatches += digest != reference
+                label = f"buffer {buffer_size // 1024:>5} KB, batch {batch_items:>3}"
+                print(f"{label:<32} {total_mb / elapsed:8.0f} MB/s  {len(items) / elapsed:10.0f} items/s  "
+                      f"{baseline / elapsed:4.2f}x{'  ❌ DIFFERENT' if digest != reference else ''}")
+
+        for level in (1, DEFAULT_GZIP_LEVEL, 9):
+            writers = []
+            elapsed, digest = timed(lambda p: writers.append(write_feed_writer(
+                p, items, DEFAULT_BUFFER_SIZE, DEFAULT_BATCH_ITEMS, level)), path, args.repeat)
+            with gzip.open(f"{path}.gz", 'rb') as f:
+                gz_digest = hashlib.md5(f.read()).hexdigest()
+            stats = writers[-1].gzip.get_stats()
+            different = digest != reference or gz_digest != reference
+            mismatches += different
+            label = f"default + gzip level {level}"
+            print(f"{label:<32} {total_mb / elapsed:8.0f} MB/s  {len(items) / elapsed:10.0f} items/s  "
+                  f"{baseline / elapsed:4.2f}x  .gz {stats['output_bytes'] / (1024 * 1024):.1f} MB "
+                  f"({stats['ratio']}x), {stats['cpu_seconds']:.2f}s CPU{'  ❌ DIFFERENT' if different else ''}")
+
+    print(f"\nMismatches: {mismatches}")
+    return 0 if mismatches == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
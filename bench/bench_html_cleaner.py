@@ -0,0 +1,125 @@
+"""
+HTML Cleaner Benchmark
+Compares the original multi-pass BaseMapper._clean_html with the
+single-pass core.html_cleaner.clean_html
+
+Also runs a randomized property check: both must return exactly the
+same string for generated HTML (nested/broken tags, invisible characters
+inside and around tags, Unicode whitespace, texts around the 5000 char limit).
+
+Usage (from repository root):
+    python bench/bench_html_cleaner.py --cases 20000
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.html_cleaner import clean_html
+
+
+def reference_clean_html(html: str) -> str:
+    """Original implementation (BaseMapper._clean_html before the single-pass cleaner)"""
+    if not html:
+        return ""
+
+    text = html.replace('\ufeff', '')
+    text = text.replace('\u200b', '')
+    text = text.replace('\u200c', '')
+    text = text.replace('\u200d', '')
+    text = text.replace('\u2060', '')
+    text = re.sub(r'<[^>]+>', '', text)
+    text = ' '.join(text.split())
+    if len(text) > 5000:
+        text = text[:4997] + '...'
+
+    return text.strip()
+
+
+WORDS = [
+    'Sneakers', 'personalizzate', 'a', 'mano', 'Converse', 'All', 'Star', 'è', '—', '100%',
+    'Taglia', '39', '&nbsp;', '&amp;', 'x' * 40, 'parola' * 30,
+]
+
+# Building blocks for random HTML
+TOKENS = WORDS + [
+    '<p>', '</p>', '<br>', '<br/>', '<strong>', '</strong>', '<li>', '</li>', '<ul>', '</ul>',
+    '<span style="color: red">', '</span>', '<', '>', '<>', '< >', '<<b>', '<a href="x">',
+    '\ufeff', '\u200b', '\u200c', '\u200d', '\u2060', '<\u200b>', '<\u200bp>', '<p\u200d>',
+    ' ', '  ', '\n', '\t', '\r\n', '\xa0', '\u2003', '\u3000', '\x1c', '\x85',
+]
+
+
+def random_html(rnd: random.Random) -> str:
+    """Random HTML-ish text, sometimes far longer than the limit"""
+    kind = rnd.random()
+    if kind < 0.6:
+        count = rnd.randint(0, 60)
+    elif kind < 0.9:
+        count = rnd.randint(600, 1400)  # around the 5000 char output limit
+    else:
+        count = rnd.randint(3000, 6000)
+    return ''.join(rnd.choice(TOKENS) for _ in range(count))
+
+
+def realistic_html(rnd: random.Random) -> str:
+    """Shopify-like product description"""
+    paragraphs = []
+    # One in five descriptions is well above the 5000 char limit
+    for _ in range(rnd.randint(2, 60) if rnd.random() < 0.8 else rnd.randint(150, 400)):
+        words = ' '.join(rnd.choice(WORDS[:12]) for _ in range(rnd.randint(10, 120)))
+        paragraphs.append(f'<p><span style="font-weight: 400;">{words}</span></p>\n')
+    return '\ufeff' + ''.join(paragraphs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark and cross-check the HTML cleaner')
+    parser.add_argument('--cases', type=int, default=20000, help='Random cases for the property check')
+    parser.add_argument('--descriptions', type=int, default=2000, help='Realistic descriptions to time')
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+
+    # Property check
+    failures = 0
+    for _ in range(args.cases):
+        html = random_html(rnd)
+        if clean_html(html) != reference_clean_html(html):
+            failures += 1
+            if failures <= 3:
+                print(f"MISMATCH for {html[:200]!r}")
+    print(f"Property check: {args.cases} cases, {failures} mismatches")
+
+    # Timing on realistic descriptions, within and above the limit
+    descriptions = [realistic_html(rnd) for _ in range(args.descriptions)]
+    groups = {'short': [], 'truncated': []}
+    for html in descriptions:
+        groups['truncated' if len(reference_clean_html(html)) == 5000 else 'short'].append(html)
+    groups['all'] = descriptions
+
+    for group, htmls in groups.items():
+        if not htmls:
+            continue
+        results = {}
+        for label, cleaner in (('reference', reference_clean_html), ('single-pass', clean_html)):
+            start = time.perf_counter()
+            for html in htmls:
+                cleaner(html)
+            results[label] = time.perf_counter() - start
+
+        print(f"{group} ({len(htmls)} descriptions): "
+              f"reference {results['reference'] / len(htmls) * 1e6:.1f} µs, "
+              f"single-pass {results['single-pass'] / len(htmls) * 1e6:.1f} µs, "
+              f"speedup {results['reference'] / results['single-pass']:.2f}x")
+
+    return 0 if failures == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
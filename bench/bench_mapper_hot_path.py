@@ -0,0 +1,118 @@
+"""
+Mapper Hot Path Microbenchmark
+Time and memory allocated per item by GoogleMapper / MetaMapper
+transform_product on a fixed synthetic product set
+
+For each platform (fresh mapper and contexts, after one warm-up pass
+that fills the module-level caches):
+- ns/item: best of --repeat timed runs
+- blocks/item, bytes/item: memory blocks still allocated after the run
+  (items + memoized context values), from a tracemalloc snapshot
+- peak bytes/item: high-water mark of each transform_product call
+  (its output plus the temporaries alive at the same time), summed
+
+CPython has no counter of all allocations (freed temporaries included):
+peak bytes/item is the proxy for per-call garbage, blocks/item for what
+each item keeps alive.
+
+Usage (from repository root):
+    python bench/bench_mapper_hot_path.py --products 2000
+"""
+
+import argparse
+import gc
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench.bench_mappers import build_inputs
+from core.product_context import ProductContext
+from platforms.google.mapper import GoogleMapper
+from platforms.meta.mapper import MetaMapper
+from src.config_loader import ConfigLoader
+
+BASE_URL = 'https://racoon-lab.it'
+
+
+def run(mapper, inputs):
+    """Transform every product with fresh contexts, return the items"""
+    items = []
+    contexts = {}
+    for product, metafields, collections in inputs:
+        context = contexts.setdefault(product['id'], ProductContext())
+        items.extend(mapper.transform_product(product, metafields, collections, context))
+    return items
+
+
+def time_per_item(mapper_class, config, inputs, repeat):
+    """(best ns/item, items) over repeat runs, fresh mapper each run"""
+    best = None
+    items = []
+    for _ in range(repeat):
+        mapper = mapper_class(config, BASE_URL)
+        gc.collect()
+        start = time.perf_counter_ns()
+        items = run(mapper, inputs)
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(items), len(items)
+
+
+def memory_per_item(mapper_class, config, inputs):
+    """(retained blocks, retained bytes, peak bytes) per item"""
+    mapper = mapper_class(config, BASE_URL)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+
+    items = []
+    contexts = {}
+    peak_total = 0
+    for product, metafields, collections in inputs:
+        context = contexts.setdefault(product['id'], ProductContext())
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        items.extend(mapper.transform_product(product, metafields, collections, context))
+        _, peak = tracemalloc.get_traced_memory()
+        peak_total += peak - current
+
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    diff = after.compare_to(before, 'filename')
+    blocks = sum(stat.count_diff for stat in diff)
+    size = sum(stat.size_diff for stat in diff)
+    count = len(items)
+    return blocks / count, size / count, peak_total / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmark the mapper hot path')
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per platform (best is reported)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    inputs = build_inputs(args.products, args.seed)
+    config = ConfigLoader('config')
+
+    print(f"{'platform':<8} {'items':>6} {'ns/item':>9} {'blocks/item':>12} {'bytes/item':>11} {'peak bytes/item':>16}")
+    for mapper_class in (GoogleMapper, MetaMapper):
+        run(mapper_class(config, BASE_URL), inputs)  # warm-up: module caches, product mappings index
+
+        ns_per_item, count = time_per_item(mapper_class, config, inputs, args.repeat)
+        blocks, size, peak = memory_per_item(mapper_class, config, inputs)
+        name = mapper_class(config, BASE_URL).get_platform_name()
+        print(f"{name:<8} {count:>6} {ns_per_item:>9.0f} {blocks:>12.1f} {size:>11.0f} {peak:>16.0f}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
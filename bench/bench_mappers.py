@@ -0,0 +1,97 @@
+"""
+Mapper Throughput Benchmark
+Times GoogleMapper / MetaMapper transform_product on a synthetic catalog
+
+Each platform gets its own contexts (per-platform cost, as when only one
+platform is enabled); --shared-context reuses them across platforms like
+the orchestrator does.
+
+Usage (from repository root):
+    python bench/bench_mappers.py --products 2000
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench.shopify_simulator import build_catalog
+from core.product_context import ProductContext, ContextStats
+from platforms.google.mapper import GoogleMapper
+from platforms.meta.mapper import MetaMapper
+from src.config_loader import ConfigLoader
+
+
+def build_inputs(num_products: int, seed: int):
+    """(product, metafields, collections) tuples in mapper input format"""
+    catalog = build_catalog(num_products, seed)
+    inputs = []
+    for product in catalog['products']:
+        metafields = {}
+        for field in catalog['metafields'][product['id']]:
+            metafields.setdefault(field['namespace'], {})[field['key']] = field['value']
+
+        groups = catalog['collections'][product['id']]
+        collections = [c['title'] for c in groups['custom'] + groups['smart']]
+        inputs.append((product, metafields, collections))
+    return inputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark platform mappers')
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per platform (best is reported)')
+    parser.add_argument('--shared-context', action='store_true')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    inputs = build_inputs(args.products, args.seed)
+    config = ConfigLoader('config')
+
+    best = {}
+    outputs = {}
+    cache_stats = {}
+
+    for _ in range(args.repeat):
+        # Fresh mappers per run: their caches start empty, like a feed run
+        mappers = [GoogleMapper(config, 'https://racoon-lab.it'), MetaMapper(config, 'https://racoon-lab.it')]
+        shared_contexts = {}
+        for mapper in mappers:
+            stats = ContextStats()
+            contexts = shared_contexts if args.shared_context else {}
+            items = []
+
+            start = time.perf_counter()
+            for product, metafields, collections in inputs:
+                context = contexts.get(product['id'])
+                if context is None:
+                    context = contexts[product['id']] = ProductContext(stats)
+                items.extend(mapper.transform_product(product, metafields, collections, context))
+            elapsed = time.perf_counter() - start
+
+            name = mapper.get_platform_name()
+            best[name] = min(best.get(name, elapsed), elapsed)
+            outputs[name] = items
+            cache_stats[name] = mapper.get_cache_stats()
+
+    for name, items in outputs.items():
+        digest = hashlib.md5()
+        for item in items:
+            digest.update(json.dumps(item, sort_keys=True).encode('utf-8'))
+        print(f"{name:<7} {len(items)} items  {best[name] * 1000:8.1f} ms  "
+              f"{len(items) / best[name]:10.0f} items/s  output md5 {digest.hexdigest()}")
+        for cache_name, stats in cache_stats[name].items():
+            print(f"        cache {cache_name}: {stats['hit_rate']:.1%} hits "
+                  f"({stats['hits']} hits, {stats['misses']} misses)")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
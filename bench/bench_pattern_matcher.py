@@ -0,0 +1,92 @@
+"""
+Pattern Matcher Benchmark
+Compares the nested substring loop of the old BaseMapper._get_pattern with
+the compiled Aho-Corasick SubstringMatcher on realistic tag lists
+
+Also cross-checks that both return the same pattern for every tag list.
+
+Usage (from repository root):
+    python bench/bench_pattern_matcher.py --products 5000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.base_mapper import BaseMapper
+from core.matcher import SubstringMatcher
+
+# Tags as they appear on the shop (mostly non-matching, some with patterns)
+REALISTIC_TAGS = [
+    'Sneakers Personalizzate', 'Scarpe Personalizzate', 'Donna', 'Uomo', 'Unisex', 'Regalo',
+    'Converse', 'All Star', 'Platform', 'Alte', 'Basse', 'Bianche', 'Nere', 'Rosa', 'Glitter',
+    'Fiori Ricamati', 'Pizzo Nero', 'Perle Bianche', 'Borchie Oro', 'Con Borchie', 'Teddy Bear',
+    'Tie Dye Arcobaleno', 'Farfalle', 'Cuori Rossi', 'Leopardate', 'Camo Verde', 'Strass',
+    'Paillettes', 'Spille', 'Sughero', 'Tartan Rosso', 'Pied de Poule', 'Matelassè', 'Goth',
+    'San Valentino', 'Natale', 'Sposa', 'Matrimonio', 'Best Seller', 'Novità', 'Estate 2025',
+    'Inverno', 'Personalizzazione Nome', 'Iniziale', 'Fatto a mano', 'Made in Italy',
+]
+
+
+def naive_get_pattern(pattern_mapping, tags):
+    """Original nested loop implementation"""
+    for tag in tags:
+        tag_lower = tag.lower().strip()
+        for pattern_key, pattern_value in pattern_mapping.items():
+            if pattern_key in tag_lower:
+                return pattern_value
+    return ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark tag → pattern lookup')
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--variants', type=int, default=8, help='Lookups per product (variants x platforms)')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    pattern_mapping = BaseMapper._get_pattern_mapping(None)
+
+    tag_lists = [rnd.sample(REALISTIC_TAGS, rnd.randint(3, 12)) for _ in range(args.products)]
+    workload = [tags for tags in tag_lists for _ in range(args.variants)]
+
+    # Correctness: identical result for every tag list
+    matcher = SubstringMatcher(pattern_mapping)
+    for tags in tag_lists:
+        expected = naive_get_pattern(pattern_mapping, tags)
+        actual = matcher.match_first((tag.lower().strip() for tag in tags), '')
+        assert actual == expected, (tags, expected, actual)
+
+    def run_naive():
+        for tags in workload:
+            naive_get_pattern(pattern_mapping, tags)
+
+    def run_compiled(memo_size):
+        compiled = SubstringMatcher(pattern_mapping, memo_size=memo_size)
+        for tags in workload:
+            compiled.match_first((tag.lower().strip() for tag in tags), '')
+
+    results = []
+    for name, fn in (('nested loop (baseline)', run_naive),
+                     ('aho-corasick, no memo', lambda: run_compiled(0)),
+                     ('aho-corasick + memo', lambda: run_compiled(4096))):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        results.append((name, elapsed))
+
+    baseline = results[0][1]
+    print(f"{len(workload)} lookups ({args.products} products x {args.variants}), "
+          f"{len(pattern_mapping)} pattern keys")
+    for name, elapsed in results:
+        per_lookup_us = elapsed / len(workload) * 1e6
+        print(f"  {name:<24} {elapsed * 1000:8.1f} ms  {per_lookup_us:6.2f} µs/lookup  x{baseline / elapsed:.1f}")
+
+
+if __name__ == '__main__':
+    main()
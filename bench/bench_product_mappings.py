@@ -0,0 +1,94 @@
+"""
+Product Mappings Benchmark
+Compares parsing config/product_mappings.json at every mapper construction
+(old BaseMapper._load_product_mappings) with the per-process shared dict
+
+Reports load time and memory allocated per load (tracemalloc) for the
+first and the following mapper constructions, then a lookup pass over
+every (handle, sku) checking that both return the same entries.
+
+Usage (from repository root):
+    python bench/bench_product_mappings.py --loads 5
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core import base_mapper
+
+MAPPINGS_FILE = 'config/product_mappings.json'
+
+
+def load_dict(path: str) -> dict:
+    """Original JSON → dict loading"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    lookup = {}
+    for item in data:
+        handle = item.get('handle', '')
+        sku = item.get('variant_sku', '')
+        if handle and sku:
+            lookup[(handle, sku)] = {
+                'product_highlight': item.get('product_highlight', []),
+                'product_detail': item.get('product_detail', [])
+            }
+    return lookup
+
+
+def shared_dict(cold: bool) -> dict:
+    """BaseMapper._load_product_mappings (cold = first construction of the process)"""
+    if cold:
+        base_mapper._product_mappings_cache.clear()
+    # Uses no mapper state
+    return base_mapper.BaseMapper._load_product_mappings(None)
+
+
+def measure(label: str, loader, loads: int):
+    """Time loader() and measure memory still held by its result"""
+    timings = []
+    for _ in range(loads):
+        start = time.perf_counter()
+        result = loader()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = loader()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings) * 1000
+    print(f"{label:<26} {best:8.3f} ms   retained {retained / 1024:8.1f} KiB   peak {peak / 1024:8.1f} KiB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark product_mappings.json loading')
+    parser.add_argument('--loads', type=int, default=5, help='Constructions to time (best is reported)')
+    args = parser.parse_args()
+
+    lookup = measure('json.load → dict', lambda: load_dict(MAPPINGS_FILE), args.loads)
+    measure('shared dict (first load)', lambda: shared_dict(cold=True), args.loads)
+    shared = measure('shared dict (next loads)', lambda: shared_dict(cold=False), args.loads)
+
+    # Lookup pass (every key twice: "key in" + "[key]" as in GoogleMapper)
+    keys = list(lookup)
+    start = time.perf_counter()
+    for key in keys:
+        if key in shared:
+            shared[key].get('product_detail', [])
+    print(f"\nLookups: {len(keys)} keys in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    mismatches = sum(1 for key in keys if shared.get(key) != lookup[key])
+    print(f"Mismatches: {mismatches}")
+    return 0 if mismatches == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Product Records Benchmark
+Memory of a loaded catalog as nested dicts (before) vs slotted records
+(src/records.py), plus mapper throughput on both
+
+Two layouts, both built from the synthetic catalog of shopify_simulator:
+- Shopify API: products page JSON decoded into dicts, vs the same
+  dicts converted with Product.from_dict (the dicts are then dropped)
+- MySQL: one row per variant grouped into products, dicts as the old
+  MySQLDataLoader built them vs records with shared metafields (same
+  layout as MySQLDataLoader.get_products_with_metafields)
+
+Memory is what stays allocated after the build (tracemalloc), divided by
+the number of variants. Strings of the source rows are shared in the
+MySQL layout, so only the structures are counted there.
+
+Usage (from repository root):
+    python bench/bench_records.py --products 2000
+"""
+
+import argparse
+import gc
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench.shopify_simulator import build_catalog
+from core.prices import optional_cents, to_cents
+from core.product_context import ProductContext
+from platforms.google.mapper import GoogleMapper
+from platforms.meta.mapper import MetaMapper
+from src.config_loader import ConfigLoader
+from src.records import Image, Product, Variant
+
+# MySQL metafield columns → metafield keys (subset used by the simulator)
+MF_COLUMNS = {'MF_Google_Gender': 'gender', 'MF_Google_Age_Group': 'age_group', 'MF_Google_Color': 'color'}
+
+
+def build_rows(catalog):
+    """online_products-like rows (one per variant)"""
+    rows = []
+    for product in catalog['products']:
+        metafields = {field['key']: field['value'] for field in catalog['metafields'][product['id']]
+                      if field['namespace'] == 'mm-google-shopping'}
+        images_json = json.dumps({'count': len(product['images']), 'images': product['images']})
+        groups = catalog['collections'][product['id']]
+        collections = ', '.join(c['title'] for c in groups['custom'] + groups['smart'])
+
+        for variant in product['variants']:
+            row = {
+                'Product_id': product['id'], 'Product_title': product['title'],
+                'Product_handle': product['handle'], 'Vendor': product['vendor'],
+                'Product_Type': product['product_type'], 'Tags': product['tags'],
+                'Body_HTML': product['body_html'], 'Product_Images': images_json, 'Collections': collections,
+                'Variant_id': variant['id'], 'Variant_Title': variant['title'], 'SKU': variant['sku'],
+                'Barcode': variant['barcode'], 'Price': variant['price'],
+                'Compare_AT_Price': variant['compare_at_price'], 'Inventory_Item_ID': variant['id'] + 1,
+                'Stock_Magazzino': variant['inventory_quantity'],
+                'MF_Google_Age_Group': 'adult'
+            }
+            for column, key in MF_COLUMNS.items():
+                if key in metafields:
+                    row[column] = metafields[key]
+            rows.append(row)
+    return rows
+
+
+def row_metafields(row):
+    """get_product_metafields_from_row equivalent"""
+    return {'mm-google-shopping': {key: row[column] for column, key in MF_COLUMNS.items() if column in row}}
+
+
+def parse_images(images_json):
+    """Image dicts as the old loader built them"""
+    return [{'id': img.get('id'), 'position': img.get('position'), 'src': img.get('src', ''),
+             'alt': img.get('alt', ''), 'width': img.get('width'), 'height': img.get('height')}
+            for img in json.loads(images_json)['images']]
+
+
+def group_dicts(rows):
+    """Old MySQLDataLoader layout: nested dicts, metafields per variant"""
+    products = {}
+    for row in rows:
+        product_id = row['Product_id']
+        metafields = row_metafields(row)
+        if product_id not in products:
+            products[product_id] = {
+                'id': product_id, 'title': row['Product_title'], 'handle': row['Product_handle'],
+                'vendor': row['Vendor'], 'product_type': row['Product_Type'], 'status': 'active',
+                'tags': row['Tags'] or '', 'body_html': row['Body_HTML'],
+                'images': parse_images(row['Product_Images']), 'variants': [],
+                'collections': [c.strip() for c in row['Collections'].split(',') if c.strip()],
+                'metafields': metafields, '_variant_metafields': {}
+            }
+        products[product_id]['variants'].append({
+            'id': row['Variant_id'], 'title': row['Variant_Title'], 'option1': row['Variant_Title'],
+            'option2': None, 'option3': None, 'sku': row['SKU'] or '', 'barcode': row['Barcode'] or '',
+            'price': row['Price'], 'compare_at_price': row['Compare_AT_Price'],
+            'inventory_item_id': row['Inventory_Item_ID'], 'inventory_quantity': row['Stock_Magazzino'] or 0
+        })
+        products[product_id]['_variant_metafields'][row['Variant_id']] = metafields
+    return list(products.values())
+
+
+def group_records(rows):
+    """New MySQLDataLoader layout: records, identical metafields shared"""
+    products = {}
+    interned = {}
+    for row in rows:
+        product_id = row['Product_id']
+        metafields = row_metafields(row)
+        metafields = interned.setdefault(tuple(metafields['mm-google-shopping'].items()), metafields)
+        if product_id not in products:
+            product = Product(
+                id=product_id, title=row['Product_title'], handle=row['Product_handle'], vendor=row['Vendor'],
+                product_type=row['Product_Type'], status='active', tags=row['Tags'] or '',
+                body_html=row['Body_HTML'], images=[Image(**img) for img in parse_images(row['Product_Images'])],
+                collections=[c.strip() for c in row['Collections'].split(',') if c.strip()], metafields=metafields
+            )
+            product._variant_metafields = {}
+            products[product_id] = product
+        products[product_id].variants.append(Variant(
+            id=row['Variant_id'], title=row['Variant_Title'], option1=row['Variant_Title'], option2=None,
+            option3=None, sku=row['SKU'] or '', barcode=row['Barcode'] or '',
+            price_cents=to_cents(row['Price']), compare_at_price_cents=optional_cents(row['Compare_AT_Price']),
+            inventory_item_id=row['Inventory_Item_ID'],
+            inventory_quantity=row['Stock_Magazzino'] or 0
+        ))
+        products[product_id]._variant_metafields[row['Variant_id']] = metafields
+    return list(products.values())
+
+
+def retained(build):
+    """(result, bytes still allocated after build())"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def mapper_throughput(products, collections_by_id, metafields_by_id, repeat):
+    """Best items/s of Google + Meta transform over the products"""
+    config = ConfigLoader('config')
+    mappers = [GoogleMapper(config, 'https://racoon-lab.it'), MetaMapper(config, 'https://racoon-lab.it')]
+    best = None
+    items = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = 0
+        contexts = {}
+        for mapper in mappers:
+            for product in products:
+                context = contexts.setdefault(product['id'], ProductContext())
+                items += len(mapper.transform_product(product, metafields_by_id[product['id']],
+                                                      collections_by_id[product['id']], context))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return items / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark slotted product records')
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help='Mapper runs (best is reported)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    catalog = build_catalog(args.products, args.seed)
+    num_variants = sum(len(product['variants']) for product in catalog['products'])
+    print(f"{args.products} products, {num_variants} variants\n")
+
+    # Shopify API layout
+    page = json.dumps(catalog['products'])
+    dicts, dict_bytes = retained(lambda: json.loads(page))
+    records, record_bytes = retained(lambda: [Product.from_dict(product) for product in json.loads(page)])
+    print(f"Shopify API  dicts   {dict_bytes / num_variants:8.0f} bytes/variant")
+    print(f"Shopify API  records {record_bytes / num_variants:8.0f} bytes/variant  "
+          f"({1 - record_bytes / dict_bytes:.0%} less)")
+
+    # MySQL layout
+    rows = build_rows(catalog)
+    mysql_dicts, mysql_dict_bytes = retained(lambda: group_dicts(rows))
+    mysql_records, mysql_record_bytes = retained(lambda: group_records(rows))
+    print(f"MySQL        dicts   {mysql_dict_bytes / num_variants:8.0f} bytes/variant")
+    print(f"MySQL        records {mysql_record_bytes / num_variants:8.0f} bytes/variant  "
+          f"({1 - mysql_record_bytes / mysql_dict_bytes:.0%} less)\n")
+
+    # Mapper throughput (mapping accessor vs plain dicts)
+    metafields_by_id = {}
+    collections_by_id = {}
+    for product in catalog['products']:
+        namespaces = {}
+        for field in catalog['metafields'][product['id']]:
+            namespaces.setdefault(field['namespace'], {})[field['key']] = field['value']
+        metafields_by_id[product['id']] = namespaces
+        groups = catalog['collections'][product['id']]
+        collections_by_id[product['id']] = [c['title'] for c in groups['custom'] + groups['smart']]
+
+    for label, products in (('dicts', dicts), ('records', records)):
+        rate = mapper_throughput(products, collections_by_id, metafields_by_id, args.repeat)
+        print(f"Mappers on {label:<8} {rate:10.0f} items/s")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
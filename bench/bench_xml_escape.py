@@ -0,0 +1,121 @@
+"""
+XML Escape Benchmark
+Compares the original five-pass str.replace escaping of the generators
+with core.xml_escape.escape_xml (memo + fast path) and a single-pass
+str.translate variant
+
+Values are every text field of the mapper output for a synthetic catalog
+(in feed order, so repeated values repeat as in a real run), plus a
+randomized property check: escape_xml must return exactly what the
+original returns.
+
+Usage (from repository root):
+    python bench/bench_xml_escape.py --products 2000 --cases 50000
+"""
+
+import argparse
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench.bench_xml_writer import mapper_items
+from core import xml_escape
+from core.xml_escape import escape_xml
+
+TRANSLATE_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&apos;'})
+
+
+def reference_escape(text: str) -> str:
+    """Original generator _escape"""
+    if not text:
+        return ""
+    return (text
+            .replace('&', '&amp;')
+            .replace('<', '&lt;')
+            .replace('>', '&gt;')
+            .replace('"', '&quot;')
+            .replace("'", '&apos;'))
+
+
+def translate_escape(text: str) -> str:
+    """Single-pass translate (for comparison)"""
+    if not text:
+        return ""
+    return text.translate(TRANSLATE_TABLE)
+
+
+def feed_values(num_products: int, seed: int):
+    """Text values in the order the generators escape them"""
+    values = []
+    for items in mapper_items(num_products, seed):
+        for item in items:
+            for value in item.values():
+                if isinstance(value, list):
+                    values.extend(entry for entry in value if isinstance(entry, str))
+                elif value is not None:
+                    values.append(str(value))
+    return values
+
+
+def random_values(count: int, seed: int):
+    """Random strings built from special characters, entities and text"""
+    rnd = random.Random(seed)
+    pieces = ['&', '<', '>', '"', "'", '&amp;', '&lt;', 'a', 'Caffè', '€', ' ', '\n', 'Nike', 'x' * 200]
+    return [''.join(rnd.choice(pieces) for _ in range(rnd.randint(0, 12))) for _ in range(count)]
+
+
+def timed(function, values, repeat: int) -> float:
+    """Best ns/value"""
+    best = None
+    for _ in range(repeat):
+        xml_escape._memo.clear()
+        start = time.perf_counter()
+        for value in values:
+            function(value)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(values) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark XML escaping')
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--cases', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    values = feed_values(args.products, args.seed)
+    special = sum(1 for value in values if reference_escape(value) != value)
+    print(f"{len(values)} feed values, {special / len(values):.1%} need escaping, "
+          f"{len(set(values)) / len(values):.1%} distinct\n")
+
+    mismatches = 0
+    for value in values + random_values(args.cases, args.seed):
+        if escape_xml(value) != reference_escape(value):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  ❌ {value!r}")
+
+    short = [value for value in values if len(value) <= xml_escape.MEMO_MAX_LENGTH]
+    long = [value for value in values if len(value) > xml_escape.MEMO_MAX_LENGTH]
+    for subset_label, subset in (('all values', values), (f'short ({len(short)})', short),
+                                 (f'long ({len(long)})', long)):
+        baseline = timed(reference_escape, subset, args.repeat)
+        for label, function in (('replace chain', reference_escape), ('translate', translate_escape),
+                                ('escape_xml', escape_xml)):
+            elapsed = timed(function, subset, args.repeat)
+            print(f"{subset_label:<15} {label:<14} {elapsed:7.0f} ns/value  {baseline / elapsed:5.2f}x")
+        print()
+
+    print(f"Mismatches: {mismatches}")
+    return 0 if mismatches == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
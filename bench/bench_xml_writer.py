@@ -0,0 +1,260 @@
+"""
+XML Item Writer Benchmark
+Compares the original add_item of StreamingXMLGenerator / MetaXMLGenerator
+(get_field closure, one write per line) with the schema-compiled render
+functions (one string and one write per item)
+
+Items are the mapper output for a synthetic catalog plus randomized edge
+cases (keys without g: prefix, 0/None/blank values, comma-separated
+image strings, lists with blank entries, non-string values, characters
+to escape, siblings sharing most values with the previous item). Both
+writers must produce exactly the same text.
+
+Usage (from repository root):
+    python bench/bench_xml_writer.py --products 2000 --cases 20000
+"""
+
+import argparse
+import io
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench.bench_mappers import build_inputs
+from core.product_context import ProductContext
+from platforms.google.mapper import GoogleMapper
+from platforms.meta.mapper import MetaMapper
+from platforms.meta.xml_generator import ITEM_SCHEMA as META_SCHEMA, MetaXMLGenerator
+from src.config_loader import ConfigLoader
+from src.xml_generator import ITEM_SCHEMA as GOOGLE_SCHEMA, StreamingXMLGenerator
+
+
+class ReferenceWriter:
+    """Original add_item implementations (before the compiled schemas), writing to a file object"""
+
+    def __init__(self, file):
+        self.file = file
+
+    def _escape(self, text):
+        if not text:
+            return ""
+        return (text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                .replace('"', '&quot;').replace("'", '&apos;'))
+
+    def _write_field(self, name, value):
+        if value is not None and str(value).strip():
+            escaped_value = self._escape(str(value))
+            self.file.write(f'      <{name}>{escaped_value}</{name}>\n')
+
+    def _write_field_cdata(self, name, value):
+        if value is not None and str(value).strip():
+            self.file.write(f'      <{name}><![CDATA[{value}]]></{name}>\n')
+
+    def add_google(self, item_data):
+        def get_field(key):
+            return item_data.get(f'g:{key}') or item_data.get(key)
+
+        self.file.write('    <item>\n')
+        for key in ('id', 'title', 'description', 'link', 'image_link'):
+            self._write_field(f'g:{key}', get_field(key))
+        additional_images = get_field('additional_image_link')
+        if additional_images:
+            if isinstance(additional_images, list):
+                for img_url in additional_images:
+                    if img_url and img_url.strip():
+                        self._write_field('g:additional_image_link', img_url.strip())
+            else:
+                for img_url in str(additional_images).split(','):
+                    if img_url and img_url.strip():
+                        self._write_field('g:additional_image_link', img_url.strip())
+        self._write_field('g:availability', get_field('availability'))
+        self._write_field('g:price', get_field('price'))
+        if get_field('sale_price'):
+            self._write_field('g:sale_price', get_field('sale_price'))
+        self._write_field('g:brand', get_field('brand'))
+        self._write_field('g:condition', get_field('condition') or 'new')
+        for key in ('gtin', 'mpn'):
+            if get_field(key):
+                self._write_field(f'g:{key}', get_field(key))
+        self._write_field('g:google_product_category', get_field('google_product_category'))
+        if get_field('product_type'):
+            self._write_field('g:product_type', get_field('product_type'))
+        self._write_field('g:gender', get_field('gender'))
+        self._write_field('g:age_group', get_field('age_group'))
+        for key in ('color', 'size', 'material', 'pattern'):
+            if get_field(key):
+                self._write_field(f'g:{key}', get_field(key))
+        product_detail = get_field('product_detail')
+        if product_detail and isinstance(product_detail, list):
+            for detail in product_detail:
+                attribute_name = detail.get('attribute_name', '')
+                attribute_value = detail.get('attribute_value', '')
+                if attribute_name and attribute_value:
+                    self.file.write('      <g:product_detail>\n')
+                    self.file.write(f'        <g:attribute_name>{self._escape(attribute_name)}</g:attribute_name>\n')
+                    self.file.write(f'        <g:attribute_value>{self._escape(attribute_value)}</g:attribute_value>\n')
+                    self.file.write('      </g:product_detail>\n')
+        for key in ('item_group_id', 'shipping', 'product_rating', 'custom_label_0', 'custom_label_1',
+                    'custom_label_2', 'custom_label_3', 'custom_label_4', 'size_system', 'is_bundle',
+                    'product_highlight', 'TAGS'):
+            if get_field(key):
+                self._write_field(f'g:{key}', get_field(key))
+        self.file.write('    </item>\n')
+
+    def add_meta(self, item_data):
+        def get_field(key):
+            return item_data.get(f'g:{key}') or item_data.get(key)
+
+        self.file.write('    <item>\n')
+        for key in ('id', 'title', 'description', 'link', 'image_link', 'availability', 'price', 'brand',
+                    'condition'):
+            self._write_field(f'g:{key}', get_field(key))
+        additional_images = get_field('additional_image_link')
+        if additional_images:
+            if isinstance(additional_images, list):
+                for img_url in additional_images:
+                    self._write_field('g:additional_image_link', img_url)
+            else:
+                self._write_field('g:additional_image_link', additional_images)
+        for key in ('sale_price', 'gtin', 'mpn'):
+            if get_field(key):
+                self._write_field(f'g:{key}', get_field(key))
+        self._write_field('g:google_product_category', get_field('google_product_category'))
+        if get_field('product_type'):
+            self._write_field('g:product_type', get_field('product_type'))
+        self._write_field('g:gender', get_field('gender'))
+        self._write_field('g:age_group', get_field('age_group'))
+        for key in ('color', 'size', 'size_system', 'material', 'pattern', 'item_group_id', 'shipping', 'status',
+                    'inventory', 'custom_label_0', 'custom_label_1', 'custom_label_2', 'custom_label_3',
+                    'custom_label_4'):
+            if get_field(key):
+                self._write_field(f'g:{key}', get_field(key))
+        internal_labels = get_field('internal_label')
+        if internal_labels:
+            if isinstance(internal_labels, list):
+                for label in internal_labels:
+                    if label.strip():
+                        self._write_field('g:internal_label', label.strip())
+            else:
+                self._write_field('g:internal_label', internal_labels)
+        if get_field('rich_text_description'):
+            self._write_field_cdata('g:rich_text_description', get_field('rich_text_description'))
+        self.file.write('    </item>\n')
+
+
+def mapper_items(num_products: int, seed: int):
+    """(google items, meta items) from the mappers"""
+    config = ConfigLoader('config')
+    outputs = []
+    for mapper in (GoogleMapper(config, 'https://racoon-lab.it'), MetaMapper(config, 'https://racoon-lab.it')):
+        items = []
+        for product, metafields, collections in build_inputs(num_products, seed):
+            items.extend(mapper.transform_product(product, metafields, collections, ProductContext()))
+        outputs.append(items)
+    return outputs
+
+
+def random_items(schema, count: int, seed: int):
+    """Items with edge-case values for every field of a schema"""
+    rnd = random.Random(seed)
+    scalars = [None, '', '  ', 0, 0.0, 1, 59.9, False, True, 'x', ' padded ', 'A & B <c> "d" \'e\'',
+               'a, b,, c ,', 'Caffè €', '<b>html</b>', '\t']
+    list_entries = ['https://cdn/img_1.jpg', ' https://cdn/img_2.jpg ', '', '   ', 'a&b', 'x,y']
+    details = [{'attribute_name': 'Tipo', 'attribute_value': 'A & B'}, {'attribute_name': '', 'attribute_value': 'x'},
+               {'attribute_name': 'Stile'}, {'attribute_name': 'Comfort', 'attribute_value': '<Memory>'}]
+    items = []
+    for _ in range(count):
+        # Sibling of the previous item (product fragments reused) or a new product
+        sibling = items and rnd.random() < 0.5
+        item = dict(items[-1]) if sibling else {}
+        for entry in schema:
+            key, kind = entry[0], entry[1]
+            if rnd.random() < (0.8 if sibling else 0.2):
+                continue
+            if kind == 'details':
+                value = rnd.choice([None, [], 'text', rnd.sample(details, rnd.randint(1, 4))])
+            elif kind in ('list', 'list_split', 'list_strip') and rnd.random() < 0.6:
+                value = rnd.sample(list_entries, rnd.randint(0, 6))
+                if kind == 'list' and rnd.random() < 0.3:
+                    value.append(rnd.choice([None, 0, 5]))
+            else:
+                value = rnd.choice(scalars)
+            prefix = rnd.choice(['g:', 'g:', ''])
+            item[prefix + key] = value
+            if rnd.random() < 0.1:
+                item[key] = rnd.choice(scalars)  # both keys set: g: wins unless falsy
+        items.append(item)
+    return items
+
+
+def timed(write_all, items, repeat: int):
+    """(best seconds, text) writing all items to a StringIO"""
+    best = None
+    text = ''
+    for _ in range(repeat):
+        buffer = io.StringIO()
+        start = time.perf_counter()
+        write_all(buffer, items)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        text = buffer.getvalue()
+    return best, text
+
+
+def compiled_writer(generator_class):
+    """write_all using a generator's compiled add_item"""
+    def write_all(buffer, items):
+        generator = generator_class('unused.xml')
+        generator.file = buffer
+        for item in items:
+            generator.add_item(item)
+    return write_all
+
+
+def reference_writer(method_name):
+    """write_all using the reference add_item"""
+    def write_all(buffer, items):
+        add = getattr(ReferenceWriter(buffer), method_name)
+        for item in items:
+            add(item)
+    return write_all
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark compiled XML item writers')
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--cases', type=int, default=20000, help='Randomized edge-case items per platform')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per writer (best is reported)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    google_items, meta_items = mapper_items(args.products, args.seed)
+
+    platforms = [
+        ('google', google_items, GOOGLE_SCHEMA, 'add_google', StreamingXMLGenerator),
+        ('meta', meta_items, META_SCHEMA, 'add_meta', MetaXMLGenerator),
+    ]
+    mismatches = 0
+    for name, items, schema, reference_method, generator_class in platforms:
+        for label, dataset in (('mapper items', items), ('edge cases', random_items(schema, args.cases, args.seed))):
+            reference_time, reference_text = timed(reference_writer(reference_method), dataset, args.repeat)
+            compiled_time, compiled_text = timed(compiled_writer(generator_class), dataset, args.repeat)
+            identical = reference_text == compiled_text
+            mismatches += not identical
+
+            print(f"{name:<7} {label:<13} {len(dataset):>6} items  "
+                  f"reference {len(dataset) / reference_time:9.0f} items/s  "
+                  f"compiled {len(dataset) / compiled_time:9.0f} items/s  "
+                  f"{reference_time / compiled_time:5.2f}x  {'identical' if identical else '❌ DIFFERENT'}")
+
+    print(f"\nMismatches: {mismatches}")
+    return 0 if mismatches == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
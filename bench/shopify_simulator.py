@@ -0,0 +1,348 @@
+"""
+Local Shopify Admin API Simulator
+Stand-in server for benchmarking ShopifyClient and the fallback orchestrator path
+
+Serves a synthetic catalog with the subset of the REST Admin API used by
+Feed-Exporter:
+- GET products.json            (since_id and page_info pagination, status filter)
+- GET products/count.json
+- GET products/<id>.json
+- GET products/<id>/metafields.json
+- GET custom_collections.json?product_id=<id>
+- GET smart_collections.json?product_id=<id>
+
+Every response carries X-Shopify-Shop-Api-Call-Limit and requests are
+admitted by a leaky bucket (429 + Retry-After when full), like Shopify.
+
+Run standalone:
+    python bench/shopify_simulator.py --products 2000 --port 8765
+"""
+
+import argparse
+import base64
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+API_PREFIX = '/admin/api/2024-10/'
+
+VENDORS = ['Converse', 'Adidas', 'Nike', 'Timberland', 'Dr. Martens', 'Vans', 'New Balance']
+PRODUCT_TYPES = ['All Star Alte', 'All Star Platform Basse', 'Samba', 'Stan Smith', 'Air Force 1',
+                 '1460 8 Occhielli', 'Boot Premium 6-Inch', 'Old Skool', 'Campus 00s']
+TAGS = ['Sneakers Personalizzate', 'Fiori', 'Pizzo', 'Teddy', 'Tie Dye', 'suola bianca', 'platform',
+        'Borchie', 'Perle', 'Glitter', 'Donna', 'Uomo', 'Regalo', 'Strass', 'Camo']
+COLLECTIONS = ['Best Sellers', 'Nuovi Arrivi', 'Converse Personalizzate', 'Sneakers Donna',
+               'Sneakers Uomo', 'Idee Regalo', 'Estate', 'Inverno', 'Pizzo e Perle', 'Fiori']
+
+
+def build_catalog(num_products: int, seed: int = 42) -> Dict:
+    """
+    Build a deterministic synthetic catalog
+
+    Args:
+        num_products: Number of products (about 90% active)
+        seed: Random seed
+
+    Returns:
+        Dict with 'products', 'metafields' and 'collections' lookups
+    """
+    rnd = random.Random(seed)
+    products = []
+    metafields = {}
+    collections = {}
+
+    for index in range(num_products):
+        product_id = 8_000_000_000 + index * 7
+        vendor = rnd.choice(VENDORS)
+        product_type = rnd.choice(PRODUCT_TYPES)
+        tags = rnd.sample(TAGS, rnd.randint(1, 6))
+        title = f"{vendor} {product_type} {' '.join(tags[:2])}"
+        handle = title.lower().replace(' ', '-').replace('.', '')
+
+        variants = []
+        for size_index in range(rnd.randint(3, 10)):
+            price = rnd.choice([89.0, 109.0, 129.0, 149.0, 179.0])
+            variants.append({
+                'id': product_id * 100 + size_index,
+                'product_id': product_id,
+                'title': str(35 + size_index),
+                'option1': str(35 + size_index),
+                'option2': None,
+                'option3': None,
+                'sku': f"SKU-{index}-{size_index}",
+                'barcode': str(8_000_000_000_000 + index * 100 + size_index),
+                'price': f"{price:.2f}",
+                'compare_at_price': f"{price + 30:.2f}" if rnd.random() < 0.2 else None,
+                'inventory_quantity': rnd.choice([0, 1, 2, 5, 10])
+            })
+
+        images = [{
+            'id': product_id * 10 + image_index,
+            'position': image_index + 1,
+            'src': f"https://cdn.shopify.com/s/files/1/0000/{handle}_{image_index}{'_INT' if image_index == 2 else ''}.jpg"
+        } for image_index in range(rnd.randint(2, 12))]
+
+        body = ''.join(f"<p>{rnd.choice(TAGS)} &amp; {rnd.choice(COLLECTIONS)}: dettagli fatti a mano.</p>"
+                       for _ in range(rnd.randint(3, 30)))
+
+        products.append({
+            'id': product_id,
+            'title': title,
+            'handle': handle,
+            'vendor': vendor,
+            'product_type': product_type,
+            'tags': ', '.join(tags),
+            'body_html': body,
+            'status': 'active' if rnd.random() < 0.9 else 'draft',
+            'updated_at': '2026-01-01T00:00:00+01:00',
+            'variants': variants,
+            'images': images,
+            'image': images[0]
+        })
+
+        metafields[product_id] = [
+            {'namespace': 'mm-google-shopping', 'key': 'gender', 'value': rnd.choice(['female', 'male', 'unisex'])},
+            {'namespace': 'mm-google-shopping', 'key': 'color', 'value': rnd.choice(['Bianco', 'Nero', 'Rosa'])},
+            {'namespace': 'stamped', 'key': 'reviews_rating', 'value': f"{rnd.uniform(3.5, 5):.1f}"}
+        ]
+
+        chosen = rnd.sample(COLLECTIONS, rnd.randint(1, 6))
+        collections[product_id] = {
+            'custom': [{'id': COLLECTIONS.index(c) + 1, 'title': c} for c in chosen[::2]],
+            'smart': [{'id': COLLECTIONS.index(c) + 1, 'title': c} for c in chosen[1::2]]
+        }
+
+    return {'products': products, 'metafields': metafields, 'collections': collections}
+
+
+class LeakyBucket:
+    """Server-side leaky bucket (Shopify REST semantics)"""
+
+    def __init__(self, capacity: int = 40, leak_rate: float = 2.0):
+        self.capacity = capacity
+        self.leak_rate = leak_rate
+        self.level = 0.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def admit(self) -> Tuple[bool, int, float]:
+        """
+        Try to admit one request
+
+        Returns:
+            (admitted, used credits for the header, retry_after seconds)
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.level = max(0.0, self.level - (now - self.updated) * self.leak_rate)
+            self.updated = now
+
+            if self.level + 1 > self.capacity:
+                retry_after = (self.level + 1 - self.capacity) / self.leak_rate
+                return False, self.capacity, max(retry_after, 0.1)
+
+            self.level += 1
+            return True, int(math.ceil(self.level)), 0.0
+
+
+class ShopifySimulator:
+    """
+    Threaded HTTP server simulating the Shopify REST Admin API
+
+    Usage:
+        sim = ShopifySimulator(num_products=1000).start()
+        ... ShopifyClient(sim.shop_url, 'token', api_base_url=sim.api_base_url) ...
+        sim.stop()
+    """
+
+    def __init__(self, num_products: int = 1000, bucket_size: int = 40, leak_rate: float = 2.0,
+                 latency: float = 0.0, host: str = '127.0.0.1', port: int = 0, seed: int = 42):
+        """
+        Initialize simulator
+
+        Args:
+            num_products: Size of the synthetic catalog
+            bucket_size: Leaky bucket capacity (40 standard, 400 Plus)
+            leak_rate: Bucket leak rate in requests/sec (2 standard, 20 Plus)
+            latency: Simulated network + server latency per request (seconds)
+            host: Bind address
+            port: Bind port (0 = random free port)
+            seed: Catalog random seed
+        """
+        self.catalog = build_catalog(num_products, seed)
+        self.products_by_id = sorted(self.catalog['products'], key=lambda p: p['id'])
+        self.bucket = LeakyBucket(bucket_size, leak_rate)
+        self.latency = latency
+        self.calls = Counter()
+        self._calls_lock = threading.Lock()
+
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                simulator._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def shop_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"{host}:{port}"
+
+    @property
+    def api_base_url(self) -> str:
+        return f"http://{self.shop_url}{API_PREFIX.rstrip('/')}"
+
+    def start(self) -> 'ShopifySimulator':
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def api_calls(self) -> int:
+        """Admitted API calls (429 excluded)"""
+        with self._calls_lock:
+            return sum(count for key, count in self.calls.items() if key != '429')
+
+    def active_items(self) -> int:
+        """Number of active variants in the catalog"""
+        return sum(len(p['variants']) for p in self.catalog['products'] if p['status'] == 'active')
+
+    # ========== REQUEST HANDLING ==========
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        parsed = urlparse(request.path)
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+
+        if not parsed.path.startswith(API_PREFIX):
+            self._send(request, 404, {'errors': 'Not Found'})
+            return
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        admitted, used, retry_after = self.bucket.admit()
+        headers = {'X-Shopify-Shop-Api-Call-Limit': f"{used}/{self.bucket.capacity}"}
+
+        if not admitted:
+            with self._calls_lock:
+                self.calls['429'] += 1
+            headers['Retry-After'] = f"{retry_after:.1f}"
+            self._send(request, 429, {'errors': 'Exceeded 2 calls per second for api client. Reduce request rates to resume uninterrupted service.'}, headers)
+            return
+
+        endpoint = parsed.path[len(API_PREFIX):]
+        route = endpoint.split('/')[0] if '/metafields' not in endpoint else 'metafields'
+        with self._calls_lock:
+            self.calls[route] += 1
+
+        if endpoint == 'products.json':
+            body, link = self._products(params)
+            if link:
+                headers['Link'] = link
+            self._send(request, 200, body, headers)
+        elif endpoint == 'products/count.json':
+            count = sum(1 for p in self.products_by_id if p['status'] == params.get('status', p['status']))
+            self._send(request, 200, {'count': count}, headers)
+        elif endpoint.startswith('products/') and endpoint[len('products/'):-len('.json')].isdigit():
+            product_id = int(endpoint[len('products/'):-len('.json')])
+            product = next((p for p in self.products_by_id if p['id'] == product_id), None)
+            if product is None:
+                self._send(request, 404, {'errors': 'Not Found'}, headers)
+            else:
+                self._send(request, 200, {'product': product}, headers)
+        elif endpoint.startswith('products/') and endpoint.endswith('/metafields.json'):
+            product_id = int(endpoint.split('/')[1])
+            self._send(request, 200, {'metafields': self.catalog['metafields'].get(product_id, [])}, headers)
+        elif endpoint == 'custom_collections.json':
+            product_id = int(params.get('product_id', 0))
+            entries = self.catalog['collections'].get(product_id, {}).get('custom', [])
+            self._send(request, 200, {'custom_collections': entries}, headers)
+        elif endpoint == 'smart_collections.json':
+            product_id = int(params.get('product_id', 0))
+            entries = self.catalog['collections'].get(product_id, {}).get('smart', [])
+            self._send(request, 200, {'smart_collections': entries}, headers)
+        else:
+            self._send(request, 404, {'errors': 'Not Found'}, headers)
+
+    def _products(self, params: Dict) -> Tuple[Dict, Optional[str]]:
+        """products.json with since_id or page_info cursor pagination"""
+        limit = min(int(params.get('limit', 50)), 250)
+
+        if 'page_info' in params:
+            cursor = json.loads(base64.urlsafe_b64decode(params['page_info']).decode())
+            after_id = cursor['after']
+            status = cursor.get('status')
+        else:
+            after_id = int(params.get('since_id', 0))
+            status = params.get('status')
+
+        selected = []
+        for product in self.products_by_id:
+            if product['id'] <= after_id or (status and product['status'] != status):
+                continue
+            selected.append(product)
+            if len(selected) > limit:
+                break
+
+        has_next = len(selected) > limit
+        page = selected[:limit]
+
+        fields = params.get('fields')
+        if fields:
+            keep = fields.split(',')
+            page = [{key: p[key] for key in keep if key in p} for p in page]
+
+        link = None
+        if has_next and 'since_id' not in params:
+            cursor = base64.urlsafe_b64encode(json.dumps({'after': page[-1]['id'], 'status': status}).encode()).decode()
+            link = f'<http://{self.shop_url}{API_PREFIX}products.json?limit={limit}&page_info={cursor}>; rel="next"'
+
+        return {'products': page}, link
+
+    def _send(self, request: BaseHTTPRequestHandler, status: int, body: Dict, headers: Optional[Dict] = None):
+        payload = json.dumps(body).encode('utf-8')
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json; charset=utf-8')
+        request.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            request.send_header(key, value)
+        request.end_headers()
+        request.wfile.write(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Shopify Admin API simulator')
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--bucket-size', type=int, default=40)
+    parser.add_argument('--leak-rate', type=float, default=2.0)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    simulator = ShopifySimulator(args.products, args.bucket_size, args.leak_rate, args.latency, port=args.port)
+    print(f"Shopify simulator serving {args.products} products at {simulator.api_base_url}")
+    try:
+        simulator.server.serve_forever()
+    except KeyboardInterrupt:
+        simulator.stop()
+
+
+if __name__ == '__main__':
+    main()
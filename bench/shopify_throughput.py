@@ -0,0 +1,104 @@
+"""
+Shopify Fallback Throughput Benchmark
+Measures end-to-end feed throughput and API calls per item against the local simulator
+
+Runs the real FeedOrchestrator in Shopify API mode, pointed at
+bench/shopify_simulator.py, and reports per platform:
+- items/sec and products/sec
+- API calls per item (and 429 responses)
+- rate limiter wait statistics
+
+Usage (from repository root):
+    python bench/shopify_throughput.py --products 300 --leak-rate 20 --bucket-size 400
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench.shopify_simulator import ShopifySimulator
+
+
+def run_benchmark(products: int, bucket_size: int, leak_rate: float, latency: float,
+                  platforms: list, use_cache: bool) -> dict:
+    """
+    Run one orchestrator pass against a fresh simulator
+
+    Returns:
+        Dict with throughput and API usage figures
+    """
+    simulator = ShopifySimulator(products, bucket_size, leak_rate, latency).start()
+    workdir = Path(tempfile.mkdtemp(prefix='feed-bench-'))
+
+    os.environ['SHOPIFY_SHOP_URL'] = simulator.shop_url
+    os.environ['SHOPIFY_ACCESS_TOKEN'] = 'bench-token'
+    os.environ['SHOPIFY_API_BASE_URL'] = simulator.api_base_url
+    os.environ['ENRICHMENT_CACHE_ENABLED'] = 'true' if use_cache else 'false'
+    os.environ['ENRICHMENT_CACHE_PATH'] = str(workdir / 'enrichment.sqlite')
+
+    from orchestrator import FeedOrchestrator
+
+    try:
+        orchestrator = FeedOrchestrator(use_mysql=False)
+        orchestrator.output_dir = workdir
+        orchestrator.platforms_config['settings']['backup_previous_feed'] = False
+        orchestrator.platforms_config['settings']['checkpoint_enabled'] = False
+        for name, config in orchestrator.platforms_config['platforms'].items():
+            config['enabled'] = name in platforms
+
+        start = time.perf_counter()
+        orchestrator.generate_all_feeds()
+        duration = time.perf_counter() - start
+    finally:
+        simulator.stop()
+
+    # Platform metrics only (product_context is run-level)
+    platform_metrics = [orchestrator.metrics[name] for name in platforms if name in orchestrator.metrics]
+    total_items = sum(m['total_items'] for m in platform_metrics)
+    total_products = sum(m['total_products'] for m in platform_metrics)
+    api_calls = simulator.api_calls()
+
+    return {
+        'duration_seconds': round(duration, 2),
+        'items': total_items,
+        'products': total_products,
+        'items_per_second': round(total_items / duration, 1) if duration else 0.0,
+        'products_per_second': round(total_products / duration, 1) if duration else 0.0,
+        'api_calls': api_calls,
+        'api_calls_per_item': round(api_calls / total_items, 3) if total_items else 0.0,
+        'throttled_429': simulator.calls['429'],
+        'calls_by_endpoint': dict(simulator.calls),
+        'rate_limiter': orchestrator.client.rate_limiter.get_stats()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Shopify fallback feed path')
+    parser.add_argument('--products', type=int, default=300)
+    parser.add_argument('--bucket-size', type=int, default=400, help='40 standard, 400 Plus')
+    parser.add_argument('--leak-rate', type=float, default=20.0, help='2 standard, 20 Plus')
+    parser.add_argument('--latency', type=float, default=0.02, help='Simulated per-request latency (s)')
+    parser.add_argument('--platforms', default='google,meta')
+    parser.add_argument('--cache', action='store_true', help='Enable the enrichment cache')
+    args = parser.parse_args()
+
+    # Keep the benchmark output readable
+    logging.disable(logging.WARNING)
+
+    result = run_benchmark(args.products, args.bucket_size, args.leak_rate, args.latency,
+                           args.platforms.split(','), args.cache)
+
+    logging.disable(logging.NOTSET)
+    print(f"Catalog: {args.products} products, bucket {args.bucket_size} @ {args.leak_rate}/s, latency {args.latency}s")
+    for key, value in result.items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == '__main__':
+    main()
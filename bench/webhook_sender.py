@@ -0,0 +1,137 @@
+"""
+Local Webhook Sender
+Sends signed Shopify product webhooks to /webhooks/products
+
+Send to a running server:
+    python bench/webhook_sender.py --url http://127.0.0.1:10000/webhooks/products \
+        --secret s3cret --update 101 102 101 --delete 103
+
+Self test (starts the Flask app in-process, records the flushed batches
+instead of patching feeds, and checks signature handling and coalescing):
+    python bench/webhook_sender.py --self-test
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def send_webhook(url: str, topic: str, product_id: int, secret: str = '') -> Tuple[int, dict]:
+    """
+    Send one product webhook the way Shopify does
+
+    Args:
+        url: Endpoint URL
+        topic: 'products/create', 'products/update' or 'products/delete'
+        product_id: Product id in the payload
+        secret: Webhook secret for X-Shopify-Hmac-Sha256 ('' = unsigned)
+
+    Returns:
+        (status code, JSON response)
+    """
+    body = json.dumps({'id': product_id}).encode('utf-8')
+    headers = {
+        'Content-Type': 'application/json',
+        'X-Shopify-Topic': topic,
+        'X-Shopify-Shop-Domain': 'racoon-lab.myshopify.com'
+    }
+
+    if secret:
+        digest = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).digest()
+        headers['X-Shopify-Hmac-Sha256'] = base64.b64encode(digest).decode('utf-8')
+
+    response = requests.post(url, data=body, headers=headers, timeout=10)
+    try:
+        return response.status_code, response.json()
+    except ValueError:
+        return response.status_code, {}
+
+
+def self_test() -> bool:
+    """Run the Flask app locally and drive it with the sender"""
+    from werkzeug.serving import make_server
+
+    import app_multiplatform
+    from src.webhook_batcher import MicroBatcher
+
+    secret = 'self-test-secret'
+    batches: List[Tuple[set, set]] = []
+    flushed = threading.Event()
+
+    def record(updated, deleted):
+        batches.append((updated, deleted))
+        flushed.set()
+
+    app_multiplatform.WEBHOOK_SECRET = secret
+    app_multiplatform._webhook_batcher = MicroBatcher(record, window_seconds=0.5)
+
+    server = make_server('127.0.0.1', 0, app_multiplatform.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/webhooks/products"
+
+    checks: List[Tuple[str, bool]] = []
+    try:
+        status, _ = send_webhook(url, 'products/update', 1, secret='wrong-secret')
+        checks.append(('invalid signature rejected (401)', status == 401))
+
+        status, _ = send_webhook(url, 'orders/create', 1, secret=secret)
+        checks.append(('unsupported topic rejected (400)', status == 400))
+
+        # Burst: 101 updated three times, 102 updated then deleted, 103 deleted then re-created
+        events = [('products/update', 101), ('products/update', 102), ('products/update', 101),
+                  ('products/delete', 103), ('products/delete', 102), ('products/update', 101),
+                  ('products/create', 103)]
+        statuses = [send_webhook(url, topic, product_id, secret)[0] for topic, product_id in events]
+        checks.append(('burst accepted (200)', all(code == 200 for code in statuses)))
+
+        checks.append(('nothing flushed before the window', not batches))
+        flushed.wait(timeout=5)
+        time.sleep(0.2)
+
+        checks.append(('burst coalesced into one batch', len(batches) == 1))
+        if batches:
+            updated, deleted = batches[0]
+            checks.append(('last event per product wins', updated == {101, 103} and deleted == {102}))
+    finally:
+        server.shutdown()
+        app_multiplatform._webhook_batcher.stop()
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    return all(passed for _, passed in checks)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Send Shopify product webhooks to the feed server')
+    parser.add_argument('--url', default='http://127.0.0.1:10000/webhooks/products')
+    parser.add_argument('--secret', default='')
+    parser.add_argument('--update', type=int, nargs='*', default=[], help='Product ids to send as products/update')
+    parser.add_argument('--delete', type=int, nargs='*', default=[], help='Product ids to send as products/delete')
+    parser.add_argument('--self-test', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.self_test:
+        return 0 if self_test() else 1
+
+    for topic, product_ids in (('products/update', args.update), ('products/delete', args.delete)):
+        for product_id in product_ids:
+            status, body = send_webhook(args.url, topic, product_id, args.secret)
+            print(f"{topic} {product_id}: {status} {body}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,11 +6,21 @@ All platform mappers (Google, Meta, etc.) inherit from this
 import json
 import logging
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
+from core.field_mapping import compile_field_mappings
+from core.html_cleaner import clean_html
+from core.matcher import SubstringMatcher
+from core.numeric_fields import numeric_fields, variant_cents
+from core.product_context import ProductContext
+from core.product_type_resolver import ProductTypeResolver
 logger = logging.getLogger(__name__)
 
+# Parsed product_mappings.json shared by every mapper of the process (read-only):
+# (path, mtime_ns, size) → (handle, sku) lookup
+_product_mappings_cache: Dict[Tuple[str, int, int], Dict] = {}
+
 
 class BaseMapper(ABC):
     """
@@ -18,15 +28,22 @@ class BaseMapper(ABC):
     
     Each platform (Google, Meta, etc.) implements its own mapper
     that transforms Shopify product data into platform-specific format.
+    
+    Fields are declared in config/field_mappings.json and compiled into
+    one function for the canonical item (same on every platform, built
+    once per variant) and one for the platform item (projection of the
+    canonical item + platform fields).
     """
     
-    def __init__(self, config_loader, base_url: str):
+    def __init__(self, config_loader, base_url: str, product_type_resolver: Optional[ProductTypeResolver] = None):
         """
         Initialize mapper
         
         Args:
             config_loader: ConfigLoader instance with static values
             base_url: Base URL for product links (e.g., 'https://racoon-lab.it')
+            product_type_resolver: Resolver shared with the other mappers of the run
+                                   (None = build one from product_type_mapping.json)
         """
         self.config = config_loader
         self.base_url = base_url
@@ -34,10 +51,30 @@ class BaseMapper(ABC):
         
         # Load common configurations
         self.product_type_mapping = self._load_product_type_mapping()
+        self.product_type_resolver = product_type_resolver or ProductTypeResolver(self.product_type_mapping)
         self.product_mappings = self._load_product_mappings()
         
         # Pattern mapping (common across platforms)
         self.pattern_mapping = self._get_pattern_mapping()
+        
+        # Substring tables compiled once (first key in table order wins)
+        self.pattern_matcher = SubstringMatcher(self.pattern_mapping)
+        self.excluded_types_matcher = SubstringMatcher.from_keys(
+            ['buon', 'gift', 'pacco', 'berretti', 'calze', 'calzi', 'shirt', 'felp', 'stringhe', 'outlet']
+        )
+        
+        # Declarative field mappings compiled into transform functions
+        field_mappings = self._load_field_mappings()
+        platform_mappings = field_mappings['platforms'][self.get_platform_name()]
+        self._transform_canonical = compile_field_mappings(
+            'canonical', field_mappings['canonical'], self, self.static_values
+        )
+        self._transform_platform = compile_field_mappings(
+            self.get_platform_name(), platform_mappings['fields'], self, self.static_values,
+            canonical_fields=platform_mappings.get('canonical_fields', []),
+            canonical_specs=field_mappings['canonical'],
+            namespace=platform_mappings.get('namespace', '')
+        )
     
     def _load_product_type_mapping(self) -> Dict:
         """Load product type → macro category mapping"""
@@ -51,8 +88,25 @@ class BaseMapper(ABC):
             logger.warning(f"Could not load product_type_mapping.json: {e}")
             return {"mappings": {}, "default": "Sneakers"}
     
-    def _load_product_mappings(self) -> Dict:
-        """Load product highlight/detail mappings"""
+    def _load_field_mappings(self) -> Dict:
+        """Load declarative field mappings (required: the items are built from it)"""
+        mapping_file = Path('config/field_mappings.json')
+        
+        try:
+            with open(mapping_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Could not load field_mappings.json: {e}")
+            raise
+    
+    def _load_product_mappings(self):
+        """
+        Load product highlight/detail mappings
+        
+        Returns a (handle, sku) → data dict, parsed once per process and
+        shared by all mappers (parsed again when the file's mtime or size
+        changes). Lookups never mutate it.
+        """
         mappings_file = Path('config/product_mappings.json')
         
         if not mappings_file.exists():
@@ -63,6 +117,12 @@ class BaseMapper(ABC):
             return {}
         
         try:
+            stat = mappings_file.stat()
+            cache_key = (str(mappings_file.resolve()), stat.st_mtime_ns, stat.st_size)
+            lookup = _product_mappings_cache.get(cache_key)
+            if lookup is not None:
+                return lookup
+            
             with open(mappings_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
@@ -77,6 +137,8 @@ class BaseMapper(ABC):
                         'product_detail': item.get('product_detail', [])
                     }
             
+            _product_mappings_cache.clear()
+            _product_mappings_cache[cache_key] = lookup
             return lookup
         except Exception as e:
             logger.error(f"Error loading product mappings: {e}")
@@ -140,7 +202,8 @@ class BaseMapper(ABC):
     # ========== ABSTRACT METHODS (must be implemented by subclasses) ==========
     
     @abstractmethod
-    def transform_product(self, product: Dict, metafields: Optional[Dict], collections: Optional[List[str]]) -> List[Dict]:
+    def transform_product(self, product: Dict, metafields: Optional[Dict], collections: Optional[List[str]],
+                          context: Optional[ProductContext] = None) -> List[Dict]:
         """Transform Shopify product into platform-specific items"""
         pass
     
@@ -149,6 +212,10 @@ class BaseMapper(ABC):
         """Return platform name (e.g., 'google', 'meta')"""
         pass
     
+    def get_cache_stats(self) -> Dict:
+        """Hit/miss counters of the mapper's caches (none by default)"""
+        return {}
+    
     # ========== COMMON HELPER METHODS ==========
     
     def _should_exclude_product(self, product: Dict) -> bool:
@@ -162,11 +229,8 @@ class BaseMapper(ABC):
             return True
         
         product_type = product.get('product_type', '').lower()
-        excluded_types = ['buon', 'gift', 'pacco', 'berretti', 'calze', 'calzi', 'shirt', 'felp', 'stringhe', 'outlet']
-        
-        for excluded in excluded_types:
-            if excluded in product_type:
-                return True
+        if self.excluded_types_matcher.contains_any(product_type):
+            return True
         
         return False
     
@@ -179,7 +243,7 @@ class BaseMapper(ABC):
         return False
     
     def _should_exclude_variant(self, variant: Dict) -> bool:
-        """Check if variant should be excluded (personalizzazione)"""
+        """Check if variant should be excluded (personalizzazione, missing/invalid price)"""
         option1 = (variant.get('option1') or '').lower()
         option2 = (variant.get('option2') or '').lower()
         option3 = (variant.get('option3') or '').lower()
@@ -187,29 +251,18 @@ class BaseMapper(ABC):
         if 'personalizzazione' in option1 or 'personalizzazione' in option2 or 'personalizzazione' in option3:
             return True
         
+        # Solo questa variante: le altre del prodotto restano nel feed
+        try:
+            variant_cents(variant)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"⚠️ Skipping variant {variant.get('id', '?')} with invalid price: {e}")
+            return True
+        
         return False
     
     def _clean_html(self, html: str) -> str:
-        """Remove HTML tags and invisible characters from description"""
-        if not html:
-            return ""
-
-        import re
-        # Remove BOM and zero-width characters
-        text = html.replace('\ufeff', '')  # BOM / zero-width no-break space
-        text = text.replace('\u200b', '')  # zero-width space
-        text = text.replace('\u200c', '')  # zero-width non-joiner
-        text = text.replace('\u200d', '')  # zero-width joiner
-        text = text.replace('\u2060', '')  # word joiner
-        # Remove HTML tags
-        text = re.sub(r'<[^>]+>', '', text)
-        # Remove extra whitespace
-        text = ' '.join(text.split())
-        # Truncate to 5000 characters (Google Shopping limit)
-        if len(text) > 5000:
-            text = text[:4997] + '...'
-
-        return text.strip()
+        """Remove HTML tags and invisible characters from description (max 5000 chars)"""
+        return clean_html(html)
     
     def _extract_metafields(self, metafields: Dict) -> Dict:
         """Extract metafields into flat dictionary"""
@@ -231,13 +284,8 @@ class BaseMapper(ABC):
         return data
     
     def _get_pattern(self, tags: List[str]) -> str:
-        """Extract pattern from tags"""
-        for tag in tags:
-            tag_lower = tag.lower().strip()
-            for pattern_key, pattern_value in self.pattern_mapping.items():
-                if pattern_key in tag_lower:
-                    return pattern_value
-        return ''
+        """Extract pattern from tags (first tag with a match, first key in table order)"""
+        return self.pattern_matcher.match_first((tag.lower().strip() for tag in tags), '')
     
     def _build_hierarchical_product_type(self, product: Dict) -> str:
         """
@@ -257,21 +305,8 @@ class BaseMapper(ABC):
         brand = product.get('vendor', '')
         model = product.get('product_type', '')
         
-        # Try exact match first
-        macro_category = self.product_type_mapping.get('mappings', {}).get(model)
-        
-        # If no exact match, try partial matching (case-insensitive)
-        if not macro_category and model:
-            model_lower = model.lower()
-            for key, value in self.product_type_mapping.get('mappings', {}).items():
-                # Check if mapping key is contained in the product_type
-                if key.lower() in model_lower:
-                    macro_category = value
-                    break
-        
-        # Fall back to default if still not found
-        if not macro_category:
-            macro_category = self.product_type_mapping.get('default', 'Sneakers')
+        # Exact match, then first partial match in file order, then default
+        macro_category = self.product_type_resolver.resolve(model)
         
         # Build hierarchy - Start with "Calzature" as top level
         parts = ['Calzature', macro_category]
@@ -283,3 +318,94 @@ class BaseMapper(ABC):
             parts.append(model)
         
         return ' > '.join(parts)
+    
+    # ========== PRODUCT CONTEXT (computed once per product) ==========
+    
+    def _split_tags(self, tags) -> List[str]:
+        """Split Shopify tags string ("a, b, c") into a list"""
+        return tags.split(', ') if isinstance(tags, str) else tags
+    
+    def _get_image_srcs(self, images: List[Dict]) -> List[str]:
+        """Image URLs in Shopify order"""
+        return [img.get('src', '') for img in images]
+    
+    def _split_converse_images(self, srcs: List[str]) -> tuple:
+        """Split image srcs into (_INT images, other images), keeping order"""
+        int_images = []
+        other_images = []
+        
+        for img_src in srcs:
+            if '_INT' in img_src or '_int' in img_src:
+                int_images.append(img_src)
+            else:
+                other_images.append(img_src)
+        
+        return (int_images, other_images)
+    
+    def _context_tags(self, product: Dict, context: ProductContext) -> List[str]:
+        """Product tags, memoized in the product context"""
+        return context.memo('tags', product.get('tags', []), self._split_tags)
+    
+    def _context_description(self, product: Dict, context: ProductContext) -> str:
+        """Cleaned description (body_html without tags), memoized in the product context"""
+        return context.memo('description', product.get('body_html', ''), self._clean_html)
+    
+    def _context_pattern(self, tags: List[str], context: ProductContext) -> str:
+        """Pattern from tags, memoized in the product context"""
+        return context.memo('pattern', tags, self._get_pattern)
+    
+    def _context_product_type(self, product: Dict, context: ProductContext) -> str:
+        """Hierarchical product_type, memoized in the product context"""
+        return context.memo('product_type', (product.get('vendor', ''), product.get('product_type', '')),
+                            lambda _: self._build_hierarchical_product_type(product))
+    
+    def _context_image_srcs(self, product: Dict, context: ProductContext) -> List[str]:
+        """Image URLs (read once per product), memoized in the product context"""
+        return context.memo('image_srcs', product.get('images', []), self._get_image_srcs)
+    
+    def _context_converse_images(self, product: Dict, context: ProductContext) -> tuple:
+        """Converse (_INT images, other images), memoized in the product context"""
+        return context.memo('converse_images', self._context_image_srcs(product, context),
+                            self._split_converse_images)
+    
+    # ========== CANONICAL ITEM (platform-neutral, computed once per variant) ==========
+    
+    def _get_canonical_item(self, product: Dict, variant: Dict, tags: List[str],
+                            metafields: Optional[Dict], context: ProductContext) -> Dict:
+        """Canonical item of a variant, memoized in the product context"""
+        source = (variant, metafields, product.get('handle'), product.get('vendor'), product.get('body_html'),
+                  product.get('product_type'), product.get('tags'))
+        return context.memo(('canonical_item', variant['id']), source,
+                            lambda _: self._build_canonical_item(product, variant, tags, metafields, context),
+                            field='canonical_item')
+    
+    def _build_canonical_item(self, product: Dict, variant: Dict, tags: List[str],
+                              metafields: Optional[Dict], context: ProductContext) -> Dict:
+        """
+        Build the platform-neutral fields of a variant
+        
+        Keys are field names without namespace (canonical section of
+        field_mappings.json); optional fields are omitted when empty.
+        Extra keys for the projections: price_cents, shipping_cents,
+        star_rating, metafield_data.
+        
+        Returns:
+            Canonical item dict (shared across platforms: do not mutate)
+        """
+        metafield_data = self._extract_metafields(metafields) if metafields else {}
+        numeric = self._numeric_fields(variant, context)
+        return self._transform_canonical(product, variant, tags, None, metafield_data, None, context, numeric)
+    
+    def _build_platform_item(self, product: Dict, variant: Dict, tags: List[str], metafields: Optional[Dict],
+                             collections: List[str], context: ProductContext) -> Dict:
+        """Platform item: canonical projection + platform fields"""
+        canonical = self._get_canonical_item(product, variant, tags, metafields, context)
+        return self._transform_platform(product, variant, tags, collections, canonical['metafield_data'],
+                                        canonical, context, None)
+    
+    def _numeric_fields(self, variant: Dict, context: ProductContext) -> Dict:
+        """
+        Price/availability/shipping fields of a variant (computed once per
+        variant and shared by all platforms through the context)
+        """
+        return context.memo(('numeric_fields', variant['id']), variant, numeric_fields, field='numeric_fields')
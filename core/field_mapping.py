@@ -0,0 +1,272 @@
+"""
+Field Mapping Compiler - Declarative field mappings → specialized functions
+Reads the field specs of config/field_mappings.json and generates one
+Python function per section (canonical item, each platform)
+
+A field spec:
+    {"field": "g:brand", "source": "product.vendor", "fallback": "Racoon Lab"}
+
+Value (exactly one):
+    source    Path: product.<key>, variant.<key>, metafield.<key>,
+              canonical.<key>, numeric.<key>, static.<key>, or a whole
+              input (product, variant, tags, collections, metafield_data,
+              canonical, context, numeric)
+    value     Constant
+    call      Mapper method, called with "args" (list of paths)
+    template  String with {path} placeholders ({base_url} = shop URL),
+              e.g. "{base_url}/products/{product.handle}?variant={variant.id}"
+
+Options:
+    fallback       Default when the key is missing (.get(key, fallback));
+                   {"static": key, "default": value} reads static values
+    required       Subscript instead of .get (KeyError if missing)
+    transform      Name in TRANSFORMS (applied to the value)
+    omit_if_empty  Skip the field when the value (before and after the
+                   transform) is empty
+    omit_if_none   Skip the field only when the value is None
+    merge          The call returns a dict of fields to add
+    note           Documentation only
+
+static.* values and fallbacks are resolved once at compile time, so the
+generated code contains them as constants. Mapper methods are bound once.
+"""
+
+import re
+import string
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from core.prices import format_price
+
+logger = logging.getLogger(__name__)
+
+# Inputs of every generated function
+FUNCTION_ARGS = ('product', 'variant', 'tags', 'collections', 'metafield_data', 'canonical', 'context', 'numeric')
+
+# Path prefix → input dict
+PATH_ROOTS = {
+    'product': 'product',
+    'variant': 'variant',
+    'metafield': 'metafield_data',
+    'canonical': 'canonical',
+    'numeric': 'numeric',
+}
+
+# Transform name → expression template ({} is the value)
+TRANSFORMS = {
+    'str': 'str({})',
+    'float': 'float({})',
+    'str_strip': 'str({}).strip()',
+    'in_stock': "('in stock' if {} > 0 else 'out of stock')",
+    'join_comma': "', '.join({})",
+    'shipping_it': "'IT:::' + _format_price({})",
+}
+
+# Functions the transform expressions use
+TRANSFORM_HELPERS = {
+    '_format_price': format_price,
+}
+
+_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_]+$')
+_LITERAL_TYPES = (str, int, float, bool, type(None))
+
+
+class FieldMappingError(ValueError):
+    """Invalid field mapping config"""
+
+
+class _CodeBuilder:
+    """Generated source plus the constants/methods it references"""
+
+    def __init__(self, mapper, static_values: Dict):
+        self.mapper = mapper
+        self.static_values = static_values
+        self.lines: List[str] = []
+        self.entries: List[str] = []
+        self.namespace: Dict[str, Any] = dict(TRANSFORM_HELPERS)
+
+    def constant(self, value: Any) -> str:
+        """Expression for a compile-time constant"""
+        if isinstance(value, _LITERAL_TYPES):
+            return repr(value)
+        name = f'_const_{len(self.namespace)}'
+        self.namespace[name] = value
+        return name
+
+    def method(self, method_name: str) -> str:
+        """Name of a bound mapper method in the generated namespace"""
+        method = getattr(self.mapper, method_name, None)
+        if not callable(method):
+            raise FieldMappingError(f"Unknown mapper method: {method_name}")
+        name = f'_call_{method_name}'
+        self.namespace[name] = method
+        return name
+
+    def resolve_fallback(self, fallback: Any) -> Any:
+        """Compile-time value of a fallback"""
+        if isinstance(fallback, dict) and 'static' in fallback:
+            return self.static_values.get(fallback['static'], fallback.get('default'))
+        return fallback
+
+    def path(self, path: str, spec: Dict, required: bool = False) -> str:
+        """Expression reading a path"""
+        if path in FUNCTION_ARGS:
+            return path
+
+        root, _, key = path.partition('.')
+        if not key or not _KEY_PATTERN.match(key):
+            raise FieldMappingError(f"Invalid path '{path}' in {spec}")
+
+        if root == 'static':
+            return self.constant(self.static_values.get(key, self.resolve_fallback(spec.get('fallback'))))
+
+        if root not in PATH_ROOTS:
+            raise FieldMappingError(f"Unknown path root '{root}' in {spec}")
+
+        target = PATH_ROOTS[root]
+        if required:
+            return f"{target}[{key!r}]"
+        if 'fallback' in spec:
+            return f"{target}.get({key!r}, {self.constant(self.resolve_fallback(spec['fallback']))})"
+        return f"{target}.get({key!r})"
+
+    def template(self, template: str, spec: Dict) -> str:
+        """f-string expression for a template (placeholders are required paths)"""
+        parts = []
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(template):
+            if literal:
+                parts.append(literal.replace('\\', '\\\\').replace("'", "\\'").replace('\n', '\\n')
+                             .replace('{', '{{').replace('}', '}}'))
+            if field_name is None:
+                continue
+            if format_spec or conversion:
+                raise FieldMappingError(f"Format specs are not supported in templates: {template}")
+
+            if field_name == 'base_url':
+                # Constant: folded into the literal
+                parts.append(str(self.mapper.base_url).replace('{', '{{').replace('}', '}}'))
+                continue
+
+            expression = self.path(field_name, spec, required=True)
+            # Double quotes inside the single-quoted f-string
+            parts.append('{' + expression.replace("'", '"') + '}')
+        return "f'" + ''.join(parts) + "'"
+
+    def value(self, spec: Dict) -> str:
+        """Expression for the field value (before transform)"""
+        kinds = [kind for kind in ('source', 'value', 'call', 'template') if kind in spec]
+        if len(kinds) != 1:
+            raise FieldMappingError(f"Field spec needs exactly one of source/value/call/template: {spec}")
+
+        kind = kinds[0]
+        if kind == 'value':
+            return self.constant(spec['value'])
+        if kind == 'source':
+            return self.path(spec['source'], spec, required=spec.get('required', False))
+        if kind == 'template':
+            return self.template(spec['template'], spec)
+
+        args = ', '.join(self.path(arg, spec, required=True) for arg in spec.get('args', []))
+        return f"{self.method(spec['call'])}({args})"
+
+    def field(self, spec: Dict):
+        """Emit the statements for one field"""
+        key = spec.get('field')
+        expression = self.value(spec)
+
+        transform = spec.get('transform')
+        if transform and transform not in TRANSFORMS:
+            raise FieldMappingError(f"Unknown transform '{transform}' for {key}")
+
+        if spec.get('merge'):
+            if transform or spec.get('omit_if_empty') or spec.get('omit_if_none'):
+                raise FieldMappingError(f"merge cannot be combined with transform/omit: {spec}")
+            self.lines.append(f"    item.update({expression})")
+            return
+
+        if not key:
+            raise FieldMappingError(f"Field spec without 'field': {spec}")
+        target = f"item[{key!r}]"
+
+        if not spec.get('omit_if_empty') and not spec.get('omit_if_none'):
+            # Always present: built in the item dict display
+            final = TRANSFORMS[transform].format(expression) if transform else expression
+            self.entries.append(f"        {key!r}: {final},")
+            return
+
+        if spec.get('omit_if_empty'):
+            self.lines.append(f"    value = {expression}")
+            self.lines.append("    if value:")
+            if transform:
+                self.lines.append(f"        value = {TRANSFORMS[transform].format('value')}")
+                self.lines.append("        if value:")
+                self.lines.append(f"            {target} = value")
+            else:
+                self.lines.append(f"        {target} = value")
+        elif spec.get('omit_if_none'):
+            self.lines.append(f"    value = {expression}")
+            self.lines.append("    if value is not None:")
+            final = TRANSFORMS[transform].format('value') if transform else 'value'
+            self.lines.append(f"        {target} = {final}")
+
+
+def compile_field_mappings(name: str, fields: List[Dict], mapper, static_values: Dict,
+                           canonical_fields: Optional[List[str]] = None,
+                           canonical_specs: Optional[List[Dict]] = None,
+                           namespace: str = '') -> Callable:
+    """
+    Generate the transform function of a section
+
+    Args:
+        name: Section name (used in the function name)
+        fields: Field specs of the section
+        mapper: Mapper whose methods and base_url the specs reference
+        static_values: Static config values (folded into the code)
+        canonical_fields: Canonical fields copied into the item first
+        canonical_specs: Specs of the canonical section (to know which
+                         canonical fields are optional)
+        namespace: Prefix of copied canonical fields (e.g. 'g:')
+
+    Returns:
+        Function (product, variant, tags, collections, metafield_data,
+        canonical, context, numeric) → item dict; its generated source is in
+        the __source__ attribute
+    """
+    builder = _CodeBuilder(mapper, static_values)
+    function_name = f"transform_{re.sub(r'[^A-Za-z0-9_]', '_', name)}"
+
+    # Projection of the canonical item (optional fields only when present)
+    optional_canonical = []
+    if canonical_fields:
+        optional = {spec['field'] for spec in canonical_specs or []
+                    if spec.get('omit_if_empty') or spec.get('omit_if_none')}
+        known = {spec.get('field') for spec in canonical_specs or []}
+        for field in canonical_fields:
+            if canonical_specs is not None and field not in known:
+                raise FieldMappingError(f"Unknown canonical field '{field}' in {name}")
+            if field in optional:
+                optional_canonical.append(field)
+            else:
+                builder.entries.append(f"        {namespace + field!r}: canonical[{field!r}],")
+
+    for spec in fields:
+        builder.field(spec)
+
+    # Always-present fields in one dict display, then optional/merged ones
+    lines = [f"def {function_name}({', '.join(FUNCTION_ARGS)}):", "    item = {"]
+    lines.extend(builder.entries)
+    lines.append("    }")
+    for field in optional_canonical:
+        lines.append(f"    if {field!r} in canonical:")
+        lines.append(f"        item[{namespace + field!r}] = canonical[{field!r}]")
+    lines.extend(builder.lines)
+    lines.append("    return item")
+    source = '\n'.join(lines) + '\n'
+
+    code = compile(source, f'<field_mappings:{name}>', 'exec')
+    exec(code, builder.namespace)
+    function = builder.namespace[function_name]
+    function.__source__ = source
+
+    logger.debug(f"Compiled field mappings '{name}':\n{source}")
+    return function
@@ -0,0 +1,69 @@
+"""
+HTML Cleaner - Description text from Shopify body_html
+Strips tags and invisible characters, collapses whitespace, truncates
+
+Same output as the original multi-pass implementation:
+    remove BOM/zero-width chars → re.sub(r'<[^>]+>', '') →
+    ' '.join(text.split()) → truncate to 5000 chars ('...' suffix)
+with a precompiled tag pattern matched directly on the raw text (it
+skips invisible characters inside tags, so they can be removed after,
+and only when present), and only the prefix of the HTML needed to fill
+the output is cleaned: long descriptions stop being processed once the
+limit is exceeded.
+"""
+
+import re
+
+# Google Shopping description limit
+DESCRIPTION_MAX_LENGTH = 5000
+
+# BOM / zero-width no-break space, zero-width space, zero-width non-joiner,
+# zero-width joiner, word joiner
+INVISIBLE_CHARS = '\ufeff\u200b\u200c\u200d\u2060'
+
+# A tag once invisible characters are removed: '<', at least one visible
+# non-'>' character, '>'
+_TAG_PATTERN = re.compile(f'<[{INVISIBLE_CHARS}]*[^>{INVISIBLE_CHARS}][^>]*>')
+
+# Raw HTML cleaned on the first attempt, in multiples of the output limit
+_FIRST_WINDOW = 4
+
+
+def clean_html(html: str, max_length: int = DESCRIPTION_MAX_LENGTH) -> str:
+    """
+    Remove HTML tags and invisible characters from a description
+
+    Args:
+        html: Raw body_html
+        max_length: Max output length (longer text ends with '...')
+
+    Returns:
+        Plain text with single spaces between words
+    """
+    if not html:
+        return ""
+
+    window = _FIRST_WINDOW * max_length
+    while True:
+        if window >= len(html):
+            prefix = html
+        else:
+            # Cut before any '<' not closed inside the window, so every tag
+            # in the prefix is matched exactly as in the full text
+            cut = html.find('<', html.rfind('>', 0, window) + 1, window)
+            prefix = html[:window] if cut == -1 else html[:cut]
+
+        # Cleaning a prefix gives a prefix of the cleaned text
+        text = _TAG_PATTERN.sub('', prefix)
+        for char in INVISIBLE_CHARS:
+            if char in text:
+                text = text.replace(char, '')
+        text = ' '.join(text.split())
+        if len(text) > max_length or prefix is html:
+            break
+        window *= 4
+
+    if len(text) > max_length:
+        text = text[:max_length - 3] + '...'
+
+    return text
@@ -0,0 +1,149 @@
+"""
+Substring Matcher - Aho-Corasick automaton for keyword tables
+Shared by the mappers for every "is any of these keys contained in the text" lookup
+
+The mappers resolve many small tables by substring:
+    for key, value in table.items():
+        if key in text:
+            return value
+i.e. the FIRST KEY IN TABLE ORDER contained in the text wins (not the
+leftmost occurrence). The automaton is built once and scans the text in
+a single pass, keeping the lowest table index seen, so it returns exactly
+what the nested loop would.
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+NO_MATCH = -1
+
+
+class SubstringMatcher:
+    """
+    Compiled multi-pattern substring matcher with first-key priority
+
+    Results are memoized per text (tags, product types and titles repeat
+    across variants and products).
+    """
+
+    def __init__(self, table: Union[Dict[str, Any], Iterable[Tuple[str, Any]]], memo_size: int = 4096):
+        """
+        Build the automaton
+
+        Args:
+            table: Ordered mapping key → value, or (key, value) pairs when
+                   keys may repeat (e.g. after lowercasing); keys are
+                   matched as substrings
+            memo_size: Max memoized texts (memo is reset when full)
+        """
+        pairs = list(table.items()) if isinstance(table, dict) else list(table)
+        self.keys: List[str] = [key for key, _ in pairs]
+        self.values: List[Any] = [value for _, value in pairs]
+        self.memo_size = memo_size
+        self._memo: Dict[str, int] = {}
+
+        # Trie: per-node transition dict, failure link, best (lowest) key index
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._best: List[int] = [NO_MATCH]
+
+        for index, key in enumerate(self.keys):
+            if not key:
+                continue
+            node = 0
+            for char in key:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(NO_MATCH)
+                node = next_node
+            if self._best[node] == NO_MATCH or index < self._best[node]:
+                self._best[node] = index
+
+        # Breadth-first: failure links and best index inherited through them
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                queue.append(child)
+
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+
+                inherited = self._best[self._fail[child]]
+                if inherited != NO_MATCH and (self._best[child] == NO_MATCH or inherited < self._best[child]):
+                    self._best[child] = inherited
+
+        # Empty key matches every text (same as '' in text)
+        if '' in self.keys:
+            self._empty_index = self.keys.index('')
+        else:
+            self._empty_index = NO_MATCH
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[str], memo_size: int = 4096) -> 'SubstringMatcher':
+        """Build a matcher for a plain key list (values = keys)"""
+        return cls({key: key for key in keys}, memo_size)
+
+    def match_index(self, text: str) -> int:
+        """
+        Lowest table index of a key contained in text
+
+        Returns:
+            Key index, or NO_MATCH (-1)
+        """
+        cached = self._memo.get(text)
+        if cached is not None:
+            return cached
+
+        best = self._scan(text)
+
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        self._memo[text] = best
+        return best
+
+    def match(self, text: str, default: Any = None) -> Any:
+        """Value of the first table key contained in text (table order)"""
+        index = self.match_index(text)
+        return self.values[index] if index != NO_MATCH else default
+
+    def match_first(self, texts: Iterable[str], default: Any = None) -> Any:
+        """Value for the first text that contains any key (text order, then table order)"""
+        for text in texts:
+            index = self.match_index(text)
+            if index != NO_MATCH:
+                return self.values[index]
+        return default
+
+    def contains_any(self, text: str) -> bool:
+        """True if any key is contained in text"""
+        return self.match_index(text) != NO_MATCH
+
+    def _scan(self, text: str) -> int:
+        """Single pass over text, tracking the lowest key index seen"""
+        goto = self._goto
+        fail = self._fail
+        best_at = self._best
+
+        best = self._empty_index
+        if best == 0:
+            return 0
+
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            found = best_at[node]
+            if found != NO_MATCH and (best == NO_MATCH or found < best):
+                best = found
+                if best == 0:
+                    break
+
+        return best
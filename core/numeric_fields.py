@@ -0,0 +1,84 @@
+"""
+Numeric Fields - Price, availability and shipping fields of a variant
+
+numeric_fields() computes the numeric/flag fields of one variant; price
+strings come from the core.prices cache (one per distinct price).
+
+Prices are read as integer cents: price_cents / compare_at_price_cents
+of Variant records, or parsed (cached) from the price strings of plain
+Shopify dicts.
+
+Fields of a row:
+    price_cents     Price in cents (used for shipping)
+    price           Full price: compare_at_price if set, else price ("59.00 EUR")
+    sale_price      price when compare_at_price is set, else ''
+    availability    'in stock' if inventory_quantity > 0 else 'out of stock'
+    shipping_cents  Italy shipping for price_cents (0 free, 1000, 600)
+"""
+
+import logging
+from typing import Dict, Optional, Tuple
+
+from core.prices import format_price, optional_cents, to_cents
+
+logger = logging.getLogger(__name__)
+
+# Italy shipping policy: free from 89€, 10€ above 30€, 6€ otherwise
+SHIPPING_FREE_FROM_CENTS = 8900
+SHIPPING_REDUCED_ABOVE_CENTS = 3000
+SHIPPING_FREE_CENTS = 0
+SHIPPING_REDUCED_CENTS = 1000
+SHIPPING_BASE_CENTS = 600
+
+AVAILABILITY = ('out of stock', 'in stock')
+
+
+def shipping_cents(price_cents: int) -> int:
+    """Italy shipping cost (cents) for a price (cents)"""
+    if price_cents >= SHIPPING_FREE_FROM_CENTS:
+        return SHIPPING_FREE_CENTS
+    elif price_cents > SHIPPING_REDUCED_ABOVE_CENTS:
+        return SHIPPING_REDUCED_CENTS
+    else:
+        return SHIPPING_BASE_CENTS
+
+
+def variant_cents(variant: Dict) -> Tuple[int, Optional[int]]:
+    """
+    (price, compare_at_price) of a variant in cents
+
+    Records carry cents; plain dicts (Shopify API format) have price
+    strings, parsed once per distinct value.
+    """
+    price = variant.get('price_cents')
+    if price is None:
+        return to_cents(variant['price']), optional_cents(variant.get('compare_at_price'))
+    return price, variant.get('compare_at_price_cents')
+
+
+def numeric_fields(variant: Dict) -> Dict:
+    """
+    Numeric/flag fields of one variant
+
+    Args:
+        variant: Variant record or Shopify variant dict
+
+    Returns:
+        Dict with price_cents, price, sale_price, availability, shipping_cents
+    """
+    price, compare_at = variant_cents(variant)
+
+    if compare_at is not None and compare_at > 0:
+        full_price = format_price(compare_at)
+        sale_price = format_price(price)
+    else:
+        full_price = format_price(price)
+        sale_price = ''
+
+    return {
+        'price_cents': price,
+        'price': full_price,
+        'sale_price': sale_price,
+        'availability': AVAILABILITY[variant.get('inventory_quantity', 0) > 0],
+        'shipping_cents': shipping_cents(price)
+    }
@@ -0,0 +1,92 @@
+"""
+Prices - Integer cents and pre-rendered price strings
+
+Prices travel as integer cents from the loaders to the writers: no float
+parsing per variant, no float rounding (89.00 is exactly 8900), and
+thresholds (free shipping) are integer comparisons. A catalog has few
+distinct price points, so parsed amounts and rendered "59.90 EUR"
+strings are cached.
+
+Shopify and the online_products table store prices with 2 decimals;
+extra digits are rounded half-even.
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+from typing import Any, Dict, Optional
+
+CURRENCY = 'EUR'
+
+# Bounded caches (cleared when full: a catalog has a few hundred price points)
+CACHE_MAX_ENTRIES = 4096
+
+_CENT = Decimal('0.01')
+_cents_cache: Dict[Any, int] = {}
+_amount_cache: Dict[int, str] = {}
+_price_cache: Dict[int, str] = {}
+
+
+def to_cents(value: Any) -> int:
+    """
+    Convert a price (string "59.90", Decimal, int or float euros) to cents
+
+    Raises:
+        ValueError: Not a number
+        TypeError: Unsupported type (e.g. None)
+    """
+    cents = _cents_cache.get(value)
+    if cents is not None:
+        return cents
+
+    if isinstance(value, bool) or not isinstance(value, (str, Decimal, int, float)):
+        raise TypeError(f"Price must be a string or number, not {type(value).__name__}")
+    if isinstance(value, str):
+        raw = value.strip()
+    elif isinstance(value, float):
+        raw = repr(value)  # shortest repr: 59.9 → Decimal('59.9'), not its binary expansion
+    else:
+        raw = value
+    try:
+        amount = Decimal(raw)
+        if not amount.is_finite():
+            raise InvalidOperation
+        cents = int(amount.quantize(_CENT, rounding=ROUND_HALF_EVEN) * 100)
+    except InvalidOperation:
+        raise ValueError(f"Invalid price: {value!r}") from None
+
+    if len(_cents_cache) >= CACHE_MAX_ENTRIES:
+        _cents_cache.clear()
+    _cents_cache[value] = cents
+    return cents
+
+
+def optional_cents(value: Any) -> Optional[int]:
+    """to_cents, with None/'' (no price, e.g. no compare_at_price) → None"""
+    if value is None or value == '':
+        return None
+    return to_cents(value)
+
+
+def format_amount(cents: Optional[int]) -> Optional[str]:
+    """Cents → "59.90" (None stays None)"""
+    if cents is None:
+        return None
+    text = _amount_cache.get(cents)
+    if text is None:
+        sign = '-' if cents < 0 else ''
+        euros, rest = divmod(abs(cents), 100)
+        text = f"{sign}{euros}.{rest:02d}"
+        if len(_amount_cache) >= CACHE_MAX_ENTRIES:
+            _amount_cache.clear()
+        _amount_cache[cents] = text
+    return text
+
+
+def format_price(cents: int) -> str:
+    """Cents → "59.90 EUR" (feed price format)"""
+    text = _price_cache.get(cents)
+    if text is None:
+        text = f"{format_amount(cents)} {CURRENCY}"
+        if len(_price_cache) >= CACHE_MAX_ENTRIES:
+            _price_cache.clear()
+        _price_cache[cents] = text
+    return text
@@ -0,0 +1,90 @@
+"""
+Product Context - Per-product derived values shared across variants and platforms
+
+Many fields depend only on the product, not on the variant or the
+platform: cleaned description, tags, pattern, hierarchical product_type,
+Converse _INT image split, collection labels, and the platform-neutral
+canonical item of each variant. The orchestrator keeps one
+ProductContext per product, passes it to every mapper and drops it once
+the last platform of the run has used it, so each value is computed once
+and at most one platform pass of contexts is held.
+
+Every value is stored together with the source it was computed from
+(e.g. body_html): if the source changes (product re-fetched with new
+data on the next platform) the value is recomputed, never served stale.
+"""
+
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class ContextStats:
+    """Compute/reuse counters per field, shared by all contexts of a run"""
+
+    def __init__(self):
+        self.computed: Counter = Counter()
+        self.reused: Counter = Counter()
+
+    def get_stats(self) -> Dict:
+        """
+        Export counters (for feed_metrics.json)
+
+        Returns:
+            Dict field → {'computed', 'reused'} plus totals
+        """
+        fields = {}
+        for name in sorted(set(self.computed) | set(self.reused)):
+            fields[name] = {'computed': self.computed[name], 'reused': self.reused[name]}
+
+        total_computed = sum(self.computed.values())
+        total_reused = sum(self.reused.values())
+        total = total_computed + total_reused
+
+        return {
+            'fields': fields,
+            'computed': total_computed,
+            'reused': total_reused,
+            'reuse_rate': round(total_reused / total, 4) if total else 0.0
+        }
+
+
+class ProductContext:
+    """Lazily memoized product-level values"""
+
+    def __init__(self, stats: Optional[ContextStats] = None):
+        """
+        Initialize context
+
+        Args:
+            stats: Shared counters (None = not counted)
+        """
+        self.stats = stats
+        self._values: Dict[Hashable, tuple] = {}
+
+    def memo(self, name: Hashable, source: Any, compute: Callable[[Any], Any],
+             field: Optional[str] = None) -> Any:
+        """
+        Get a derived value, computing it on first use
+
+        Args:
+            name: Value key (e.g. 'description', or ('canonical_item', variant_id))
+            source: Input the value depends on (e.g. body_html)
+            compute: Called as compute(source) when the value is missing
+                     or was computed from a different source
+            field: Name used in the counters (default: name)
+
+        Returns:
+            Derived value (shared: callers must not mutate it)
+        """
+        field = field or name
+        entry = self._values.get(name)
+        if entry is not None and (entry[0] is source or entry[0] == source):
+            if self.stats:
+                self.stats.reused[field] += 1
+            return entry[1]
+
+        value = compute(source)
+        self._values[name] = (source, value)
+        if self.stats:
+            self.stats.computed[field] += 1
+        return value
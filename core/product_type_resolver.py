@@ -0,0 +1,103 @@
+"""
+Product Type Resolver - product_type → macro category index
+Compiled once from product_type_mapping.json, shared by all platforms
+
+Resolution order (same as the original lookup in BaseMapper):
+1. Exact match on the mapping key
+2. First key in FILE ORDER contained (case-insensitive) in the product_type
+   e.g. "Boot Premium 6-Inch" matches "Boot" → "Stivali"
+3. Default macro category
+
+Results are memoized per distinct product_type, and every resolution is
+counted so the metrics show which product types fall back to the default.
+"""
+
+from collections import Counter
+from typing import Dict
+
+from core.matcher import SubstringMatcher, NO_MATCH
+
+RESOLVED_EXACT = 'exact'
+RESOLVED_PARTIAL = 'partial'
+RESOLVED_DEFAULT = 'default'
+
+
+class ProductTypeResolver:
+    """Memoized product_type → macro category lookup with hit counters"""
+
+    def __init__(self, mapping_config: Dict):
+        """
+        Compile the mapping
+
+        Args:
+            mapping_config: Parsed product_type_mapping.json
+                            ({"mappings": {...}, "default": "Sneakers"})
+        """
+        self.mappings: Dict[str, str] = mapping_config.get('mappings', {})
+        self.default: str = mapping_config.get('default', 'Sneakers')
+
+        # Lowercased keys may collide: keep every (key, value) pair in file order
+        self._partial_matcher = SubstringMatcher(
+            [(key.lower(), value) for key, value in self.mappings.items()],
+            memo_size=0
+        )
+
+        self._memo: Dict[str, tuple] = {}
+        self.hits: Counter = Counter()
+        self.default_product_types: Counter = Counter()
+
+    def resolve(self, product_type: str) -> str:
+        """
+        Resolve macro category for a product_type
+
+        Args:
+            product_type: Shopify product_type (model), e.g. "All Star Alte"
+
+        Returns:
+            Macro category, e.g. "Sneakers"
+        """
+        resolved = self._memo.get(product_type)
+        if resolved is None:
+            resolved = self._resolve_uncached(product_type)
+            self._memo[product_type] = resolved
+
+        macro_category, outcome = resolved
+        self.hits[outcome] += 1
+        if outcome == RESOLVED_DEFAULT:
+            self.default_product_types[product_type] += 1
+
+        return macro_category
+
+    def _resolve_uncached(self, product_type: str) -> tuple:
+        # Try exact match first
+        macro_category = self.mappings.get(product_type)
+        if macro_category:
+            return macro_category, RESOLVED_EXACT
+
+        # If no exact match, try partial matching (case-insensitive, first key wins)
+        if product_type:
+            index = self._partial_matcher.match_index(product_type.lower())
+            if index != NO_MATCH and self._partial_matcher.values[index]:
+                return self._partial_matcher.values[index], RESOLVED_PARTIAL
+
+        # Fall back to default if still not found
+        return self.default, RESOLVED_DEFAULT
+
+    def get_stats(self, top: int = 20) -> Dict:
+        """
+        Resolution statistics (for feed_metrics.json)
+
+        Args:
+            top: Number of default-fallback product types to list
+
+        Returns:
+            Dict with hit counts per outcome and the most frequent
+            product types resolved to the default category
+        """
+        return {
+            'exact': self.hits[RESOLVED_EXACT],
+            'partial': self.hits[RESOLVED_PARTIAL],
+            'default': self.hits[RESOLVED_DEFAULT],
+            'distinct_product_types': len(self._memo),
+            'default_product_types': dict(self.default_product_types.most_common(top))
+        }
@@ -0,0 +1,54 @@
+"""
+XML Escape - Escaping of text values for the XML feeds (shared by all generators)
+
+Most feed values contain no special character (ids, prices, URLs,
+sizes) and many short ones repeat thousands of times (brand, gender,
+condition, product_type, labels, tags). escape_xml():
+1. returns short values from a bounded memo (cleared when full)
+2. returns the value itself when it has no &, <, >, " or '
+3. otherwise replaces the five characters ('&' first, so entities are
+   never escaped twice)
+
+Single-pass str.translate was measured and rejected: with multi-character
+replacements it is ~20x slower than the replace chain on long descriptions.
+"""
+
+from typing import Dict
+
+# Values up to this length are memoized (descriptions are not)
+MEMO_MAX_LENGTH = 128
+
+# Memo size (cleared when full: a feed has a few thousand repeated short values)
+MEMO_MAX_ENTRIES = 8192
+
+_memo: Dict[str, str] = {}
+
+# Memo lookup for generated code: memo_lookup(text) or escape_xml(text)
+# skips a function call for repeated values (the memo dict is cleared, never replaced)
+memo_lookup = _memo.get
+
+
+def escape_xml(text: str) -> str:
+    """Escape XML special characters (&, <, >, ", ')"""
+    if not text:
+        return ""
+
+    escaped = _memo.get(text)
+    if escaped is not None:
+        return escaped
+
+    if '&' in text or '<' in text or '>' in text or '"' in text or "'" in text:
+        escaped = (text
+                   .replace('&', '&amp;')
+                   .replace('<', '&lt;')
+                   .replace('>', '&gt;')
+                   .replace('"', '&quot;')
+                   .replace("'", '&apos;'))
+    else:
+        escaped = text
+
+    if len(text) <= MEMO_MAX_LENGTH:
+        if len(_memo) >= MEMO_MAX_ENTRIES:
+            _memo.clear()
+        _memo[text] = escaped
+    return escaped
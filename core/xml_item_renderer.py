@@ -0,0 +1,226 @@
+"""
+XML Item Renderer - Feed item schema → specialized render function
+Compiles the field schema of an XML generator (order, required/optional,
+list-valued, nested, CDATA) into one Python function that renders a
+whole <item> block as a single string
+
+A schema is a tuple of field entries, in output order:
+    (key, kind) or (key, DEFAULT, default_value)
+
+The value of a field is item['g:<key>'] or item['<key>'] (mappers emit
+prefixed keys, incremental updates may not); it is written as
+<g:key>escaped value</g:key>, one line per value.
+
+Kinds:
+    REQUIRED     Written unless None or blank
+    OPTIONAL     Written only if the value is truthy (and not blank)
+    DEFAULT      REQUIRED, with default_value when the value is falsy
+    LIST_SPLIT   One tag per list entry (stripped, blank skipped); a
+                 string is split on commas first
+    LIST         One tag per list entry (as is); a string is one tag
+    LIST_STRIP   One tag per list entry (stripped, blank skipped); a
+                 string is one tag
+    DETAILS      List of {'attribute_name', 'attribute_value'} dicts →
+                 nested <g:attribute_name>/<g:attribute_value> blocks
+    CDATA        OPTIONAL, written unescaped in a CDATA section
+
+The generated code looks each value up once and appends each line to one
+list; the generator writes the joined block with a single write().
+
+Product fields (product_fields=...) are rendered by a helper function
+whose result is kept in a one-entry memo: sibling variants are written
+one after the other and share description, images, labels and tags, so
+only the first variant of a product renders (and escapes) them, the
+others append the cached fragment. The output is unchanged.
+"""
+
+import re
+import logging
+from typing import Callable, Dict, Tuple
+
+from core.xml_escape import escape_xml, memo_lookup
+
+logger = logging.getLogger(__name__)
+
+REQUIRED = 'required'
+OPTIONAL = 'optional'
+DEFAULT = 'default'
+LIST_SPLIT = 'list_split'
+LIST = 'list'
+LIST_STRIP = 'list_strip'
+DETAILS = 'details'
+CDATA = 'cdata'
+
+KINDS = (REQUIRED, OPTIONAL, DEFAULT, LIST_SPLIT, LIST, LIST_STRIP, DETAILS, CDATA)
+
+# Keys end up in tag names and in the generated source
+_KEY_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class ItemSchemaError(ValueError):
+    """Invalid XML item schema"""
+
+
+# Initial value of the product fragment memos (equal to nothing)
+_UNSET = object()
+
+
+def _no_memo(text: str) -> None:
+    """Memo lookup used with a custom escape function (always a miss)"""
+    return None
+
+
+def _line(tag: str, value_expression: str) -> str:
+    """Source of an f-string rendering one '      <tag>value</tag>' line"""
+    return f"f'      <{tag}>{{{value_expression}}}</{tag}>\\n'"
+
+
+def _write_text(lines: list, indent: str, tag: str, variable: str):
+    """Append value (skipped if None or blank) as an escaped line"""
+    lines.append(f"{indent}if {variable} is not None:")
+    lines.append(f"{indent}    text = str({variable})")
+    lines.append(f"{indent}    if text.strip():")
+    lines.append(f"{indent}        append({_line(tag, 'cached(text) or escape(text)')})")
+
+
+def _field_source(entry: Tuple) -> Tuple[str, str, str, list]:
+    """
+    Source rendering one schema entry
+
+    Returns:
+        (key, kind, lookup expression, body lines): the body expects the
+        looked up value in `value` and appends lines with `append`
+    """
+    if not isinstance(entry, tuple) or len(entry) not in (2, 3):
+        raise ItemSchemaError(f"Schema entry must be (key, kind) or (key, DEFAULT, value): {entry!r}")
+
+    key, kind = entry[0], entry[1]
+    if not isinstance(key, str) or not _KEY_PATTERN.match(key):
+        raise ItemSchemaError(f"Invalid field key: {key!r}")
+    if kind not in KINDS:
+        raise ItemSchemaError(f"Unknown kind '{kind}' for field '{key}'")
+    if (kind == DEFAULT) != (len(entry) == 3):
+        raise ItemSchemaError(f"Only DEFAULT fields take a default value: {entry!r}")
+
+    tag = f'g:{key}'
+    lines = []
+    lookup = f"get({tag!r}) or get({key!r})"
+
+    if kind == REQUIRED:
+        _write_text(lines, '    ', tag, 'value')
+    elif kind == DEFAULT:
+        lookup = f"{lookup} or {entry[2]!r}"
+        _write_text(lines, '    ', tag, 'value')
+    elif kind == OPTIONAL:
+        lines.append(f"    if value:")
+        lines.append(f"        text = str(value)")
+        lines.append(f"        if text.strip():")
+        lines.append(f"            append({_line(tag, 'cached(text) or escape(text)')})")
+    elif kind == CDATA:
+        lines.append(f"    if value and str(value).strip():")
+        lines.append(f"        append(f'      <{tag}><![CDATA[{{value}}]]></{tag}>\\n')")
+    elif kind in (LIST_SPLIT, LIST, LIST_STRIP):
+        lines.append(f"    if value:")
+        lines.append(f"        if isinstance(value, list):")
+        lines.append(f"            for entry in value:")
+        if kind == LIST:
+            _write_text(lines, '                ', tag, 'entry')
+        else:
+            condition = 'entry and entry.strip()' if kind == LIST_SPLIT else 'entry.strip()'
+            lines.append(f"                if {condition}:")
+            lines.append(f"                    entry = entry.strip()")
+            lines.append(f"                    append({_line(tag, 'cached(entry) or escape(entry)')})")
+        lines.append(f"        else:")
+        if kind == LIST_SPLIT:
+            lines.append(f"            for entry in str(value).split(','):")
+            lines.append(f"                if entry and entry.strip():")
+            lines.append(f"                    entry = entry.strip()")
+            lines.append(f"                    append({_line(tag, 'cached(entry) or escape(entry)')})")
+        else:
+            _write_text(lines, '            ', tag, 'value')
+    elif kind == DETAILS:
+        lines.append(f"    if value and isinstance(value, list):")
+        lines.append(f"        for detail in value:")
+        lines.append(f"            name = detail.get('attribute_name', '')")
+        lines.append(f"            detail_value = detail.get('attribute_value', '')")
+        lines.append(f"            if name and detail_value:")
+        lines.append(f"                append(f'      <{tag}>\\n'")
+        lines.append(f"                       f'        <g:attribute_name>{{escape(name)}}</g:attribute_name>\\n'")
+        lines.append(f"                       f'        <g:attribute_value>{{escape(detail_value)}}</g:attribute_value>\\n'")
+        lines.append(f"                       f'      </{tag}>\\n')")
+    return key, kind, lookup, lines
+
+
+def compile_item_renderer(name: str, schema: Tuple[Tuple, ...], product_fields: Tuple[str, ...] = (),
+                          escape: Callable[[str], str] = escape_xml) -> Callable[[Dict], str]:
+    """
+    Compile an item schema into a render function
+
+    Args:
+        name: Schema name (function name and debug label, e.g. 'google')
+        schema: Field entries in output order (see module docstring)
+        product_fields: Keys whose rendered fragment is reused while the
+                        value repeats (fields shared by sibling variants)
+        escape: Text escaping function
+
+    Returns:
+        render(item_data) → '    <item>\\n ... </item>\\n' string
+
+    Raises:
+        ItemSchemaError: Invalid entry, key or kind, or unknown product field
+    """
+    function_name = f"render_{re.sub(r'[^A-Za-z0-9_]', '_', name)}_item"
+    fields = [_field_source(entry) for entry in schema]
+
+    unknown = set(product_fields) - {key for key, _, _, _ in fields}
+    if unknown:
+        raise ItemSchemaError(f"Unknown product fields in {name}: {', '.join(sorted(unknown))}")
+
+    namespace = {'escape': escape, 'cached': memo_lookup if escape is escape_xml else _no_memo}
+    lines = []
+
+    # Product fragments: one function each, the last (value, class, fragment) in a 1-slot memo
+    for key, kind, _, body in fields:
+        if key in product_fields:
+            lines.append(f"def fragment_{key}(value):")
+            lines.append("    parts = []")
+            lines.append("    append = parts.append")
+            lines.extend(body)
+            lines.append("    return ''.join(parts)")
+            lines.append("")
+            namespace[f'memo_{key}'] = [(_UNSET, None, '')]
+
+    lines.extend([
+        f"def {function_name}(item_data):",
+        "    get = item_data.get",
+        "    parts = ['    <item>\\n']",
+        "    append = parts.append",
+    ])
+    for key, kind, lookup, body in fields:
+        lines.append(f"    # {key} ({kind}{', product fragment' if key in product_fields else ''})")
+        lines.append(f"    value = {lookup}")
+        if key in product_fields:
+            # Same value (and type: 1 == True) as the previous item → same fragment.
+            # Lists are copied so a list mutated in place is not mistaken for unchanged;
+            # the memo entry is replaced as one tuple (never seen half updated).
+            lines.append(f"    last = memo_{key}[0]")
+            lines.append("    if value == last[0] and value.__class__ is last[1]:")
+            lines.append("        fragment = last[2]")
+            lines.append("    else:")
+            lines.append(f"        fragment = fragment_{key}(value)")
+            lines.append(f"        memo_{key}[0] = (list(value) if value.__class__ is list else value, "
+                         "value.__class__, fragment)")
+            lines.append("    if fragment:")
+            lines.append("        append(fragment)")
+        else:
+            lines.extend(body)
+    lines.append("    append('    </item>\\n')")
+    lines.append("    return ''.join(parts)")
+    source = '\n'.join(lines) + '\n'
+
+    exec(compile(source, f'<xml_item_schema:{name}>', 'exec'), namespace)
+    function = namespace[function_name]
+    function.__source__ = source
+
+    logger.debug(f"Compiled XML item schema '{name}':\n{source}")
+    return function
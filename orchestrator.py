@@ -18,10 +18,9 @@ import logging
 import gc
 import time
 import shutil
-import requests
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 
 # Setup logging
 logging.basicConfig(
@@ -37,6 +36,12 @@ logger = logging.getLogger(__name__)
 # Import core components
 from src.shopify_client import ShopifyClient
 from src.config_loader import ConfigLoader
+from src.checkpoint import FeedCheckpoint
+from src.enrichment_cache import EnrichmentCache
+from src.feed_writer import DEFAULT_BUFFER_SIZE, DEFAULT_BATCH_ITEMS, DEFAULT_GZIP_LEVEL, GzipCompressor
+from src.feed_shards import DEFAULT_SHARD_ATTEMPTS, plan_shards, render_shards, transform_mysql_product
+from src.feed_formats import MultiFormatFeed, create_format_writer, extra_formats, format_path
+from core.product_context import ProductContext, ContextStats
 
 # Import platform-specific components
 from platforms.google.mapper import GoogleMapper
@@ -95,6 +100,9 @@ class FeedOrchestrator:
         # Metrics
         self.metrics = {}
 
+        # Per-product values shared across variants and platforms
+        self._reset_product_contexts()
+
     def _init_mysql(self):
         """Initialize MySQL data source"""
         from src.mysql_client import MySQLDataLoader
@@ -125,7 +133,21 @@ class FeedOrchestrator:
         if not shop_url or not access_token:
             raise ValueError("Missing Shopify credentials. Set SHOPIFY_SHOP_URL, SHOPIFY_ACCESS_TOKEN")
 
-        self.client = ShopifyClient(shop_url, access_token)
+        # Cross-run cache for metafields/collections (skips unchanged products)
+        enrichment_cache = None
+        if os.getenv('ENRICHMENT_CACHE_ENABLED', 'true').lower() == 'true':
+            enrichment_cache = EnrichmentCache(
+                os.getenv('ENRICHMENT_CACHE_PATH', 'cache/shopify_enrichment.sqlite'),
+                ttl_hours=float(os.getenv('ENRICHMENT_CACHE_TTL_HOURS', '168')),
+                max_entries=int(os.getenv('ENRICHMENT_CACHE_MAX_ENTRIES', '20000'))
+            )
+
+        self.client = ShopifyClient(
+            shop_url,
+            access_token,
+            enrichment_cache=enrichment_cache,
+            api_base_url=os.getenv('SHOPIFY_API_BASE_URL')
+        )
         self.data_loader = None  # No MySQL loader
 
     def _load_platforms_config(self) -> Dict:
@@ -145,7 +167,10 @@ class FeedOrchestrator:
                 "settings": {
                     "backup_previous_feed": True,
                     "validate_before_save": True,
-                    "collect_metrics": True
+                    "collect_metrics": True,
+                    "checkpoint_enabled": True,
+                    "checkpoint_interval": 100,
+                    "checkpoint_max_age_hours": 12
                 }
             }
 
@@ -172,6 +197,7 @@ class FeedOrchestrator:
         logger.info("="*80)
 
         success_count = 0
+        self._reset_product_contexts()
 
         try:
             for platform_name in enabled_platforms:
@@ -180,7 +206,12 @@ class FeedOrchestrator:
                     logger.info(f"GENERATING {platform_name.upper()} FEED")
                     logger.info(f"{'='*80}\n")
 
-                    if self.use_mysql:
+                    # Last platform pass: drop each product context once it has been used
+                    self.release_product_contexts = platform_name == enabled_platforms[-1]
+
+                    if self.use_mysql and self.platforms_config['settings'].get('render_shards', 0) > 1:
+                        result = self._generate_platform_feed_sharded(platform_name)
+                    elif self.use_mysql:
                         result = self._generate_platform_feed_mysql(platform_name)
                     else:
                         result = self._generate_platform_feed_shopify(platform_name)
@@ -194,15 +225,25 @@ class FeedOrchestrator:
                 except Exception as e:
                     logger.error(f"❌ Error generating {platform_name} feed: {e}", exc_info=True)
 
+            # Shared product computations (run-level, not per platform)
+            self.metrics['product_context'] = self._get_product_context_metrics()
+
             # Save metrics
             if self.platforms_config['settings'].get('collect_metrics', True):
                 self._save_metrics()
 
         finally:
+            # Release per-product contexts
+            self.product_contexts = {}
+
             # Cleanup MySQL connection
             if self.use_mysql and self.data_loader:
                 self.data_loader.disconnect()
 
+            # Flush enrichment cache
+            if self.client and self.client.enrichment_cache:
+                self.client.enrichment_cache.close()
+
         end_time = datetime.now(timezone.utc)
         duration = (end_time - start_time).total_seconds()
 
@@ -238,55 +279,58 @@ class FeedOrchestrator:
         feed_filename = platform_config.get('feed_filename', f'{platform_name}_feed.xml')
         output_file = self.output_dir / feed_filename
 
-        # Backup previous feed if enabled
-        if self.platforms_config['settings'].get('backup_previous_feed', True):
-            self._backup_feed(output_file)
-
-        xml_generator = self._get_xml_generator(platform_name, str(output_file))
+        xml_generator = self._get_feed_generator(platform_name, output_file)
+
+        # Resume from checkpoint if a previous run was interrupted
+        checkpoint = self._get_checkpoint(platform_name, 'mysql', output_file)
+        resume_state = checkpoint.load() if checkpoint else None
+        if resume_state and not xml_generator.resume_offsets_match(resume_state.get('format_offsets')):
+            logger.warning(f"Ignoring checkpoint for {platform_name}: feed formats changed")
+            resume_state = None
+        checkpoint_interval = self.platforms_config['settings'].get('checkpoint_interval', 100)
+
+        if resume_state:
+            logger.info(f"♻️ Resuming from checkpoint: product {resume_state['last_product_id']}, "
+                        f"{resume_state['total_items']} items already written")
+            xml_generator.resume_feed(resume_state['byte_offset'], resume_state['total_items'],
+                                      resume_state.get('format_offsets'))
+        else:
+            # Backup previous feed if enabled
+            if self.platforms_config['settings'].get('backup_previous_feed', True):
+                self._backup_feed(output_file)
 
-        # Start feed
-        title = platform_config.get('title', f'Racoon Lab - {platform_name.title()} Feed')
-        description = platform_config.get('description', f'Product catalog for {platform_name}')
+            # Start feed
+            title = platform_config.get('title', f'Racoon Lab - {platform_name.title()} Feed')
+            description = platform_config.get('description', f'Product catalog for {platform_name}')
 
-        xml_generator.start_feed(
-            title=title,
-            link=self.base_url,
-            description=description
-        )
+            xml_generator.start_feed(
+                title=title,
+                link=self.base_url,
+                description=description
+            )
 
         # Fetch all products from MySQL (single query, very fast)
         logger.info(f"📡 Fetching products from MySQL...")
         products = self.data_loader.get_products_with_metafields()
 
-        total_items = 0
-        total_products = 0
+        total_items = resume_state['total_items'] if resume_state else 0
+        total_products = resume_state['total_products'] if resume_state else 0
+        last_product_id = resume_state['last_product_id'] if resume_state else 0
 
         logger.info(f"Processing {len(products)} products for {platform_name}...")
 
         # Process each product
         for product in products:
-            try:
-                # Get collections (already in product dict)
-                collections = product.get('collections', [])
-
-                # For each variant, get its specific metafields
-                for variant in product.get('variants', []):
-                    variant_id = variant['id']
-
-                    # Get variant-specific metafields
-                    metafields = self.data_loader.get_variant_metafields(product, variant_id)
-
-                    # Create a single-variant product for transformation
-                    single_variant_product = product.copy()
-                    single_variant_product['variants'] = [variant]
-
-                    # Transform using platform mapper
-                    items = mapper.transform_product(single_variant_product, metafields, collections)
+            # Already written before the checkpoint (products are ordered by id)
+            if product['id'] <= last_product_id:
+                self._release_product_context(product['id'])
+                continue
 
-                    # Write to XML
-                    for item in items:
-                        xml_generator.add_item(item)
-                        total_items += 1
+            try:
+                # Transform using platform mapper and write to XML
+                for item in self._transform_mysql_product(mapper, product):
+                    xml_generator.add_item(item)
+                    total_items += 1
 
                 total_products += 1
 
@@ -294,19 +338,33 @@ class FeedOrchestrator:
                 if total_products % 100 == 0:
                     logger.info(f"  Progress: {total_products} products, {total_items} items")
 
+                # Checkpoint at product boundary
+                if checkpoint and total_products % checkpoint_interval == 0:
+                    checkpoint.save(product['id'], total_products, total_items, xml_generator.checkpoint_offset(),
+                                    xml_generator.format_offsets())
+
             except Exception as e:
                 logger.error(f"Error processing product {product.get('id')}: {e}")
                 continue
 
+            finally:
+                self._release_product_context(product['id'])
+
         # Clear memory
         gc.collect()
 
         # Close XML
         xml_generator.end_feed()
 
+        # Feed complete: next run starts from scratch
+        if checkpoint:
+            checkpoint.clear()
+
         # Calculate metrics
         platform_duration = time.time() - platform_start_time
         file_size = output_file.stat().st_size / (1024 * 1024)
+        items_written = total_items - (resume_state['total_items'] if resume_state else 0)
+        items_per_second = items_written / platform_duration if platform_duration > 0 else 0.0
 
         # Store metrics
         self.metrics[platform_name] = {
@@ -317,7 +375,12 @@ class FeedOrchestrator:
             'total_items': total_items,
             'file_size_mb': round(file_size, 2),
             'duration_seconds': round(platform_duration, 0),
+            'items_per_second': round(items_per_second, 1),
             'feed_filename': feed_filename,
+            'resumed_from_checkpoint': resume_state is not None,
+            'mapper_caches': mapper.get_cache_stats(),
+            **self._get_gzip_metrics(xml_generator.compression_stats()),
+            'formats': self._get_format_metrics(xml_generator),
             'success': True
         }
 
@@ -326,7 +389,155 @@ class FeedOrchestrator:
         logger.info(f"  Products: {total_products}")
         logger.info(f"  Items: {total_items}")
         logger.info(f"  File size: {file_size:.2f} MB")
+        if 'gzip_size_mb' in self.metrics[platform_name]:
+            logger.info(f"  Gzip size: {self.metrics[platform_name]['gzip_size_mb']:.2f} MB "
+                        f"({self.metrics[platform_name]['gzip_cpu_seconds']:.1f}s CPU)")
+        for cache_name, cache_stats in self.metrics[platform_name]['mapper_caches'].items():
+            logger.info(f"  Cache {cache_name}: {cache_stats['hit_rate']:.0%} hits "
+                        f"({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']})")
+        logger.info(f"  Duration: {platform_duration:.0f}s ({platform_duration/60:.1f}min)")
+        logger.info(f"  Throughput: {items_per_second:.0f} items/s")
+
+        return True
+
+    def _generate_platform_feed_sharded(self, platform_name: str) -> bool:
+        """
+        Generate feed for a specific platform using MySQL, rendering product id ranges in parallel
+
+        settings.render_shards shards are rendered by settings.render_workers
+        processes (0 = one per CPU), each shard retried on its own up to
+        settings.shard_max_attempts times, then merged between one header and
+        footer (see src/feed_shards.py). The feed is assembled in a temporary
+        file and published only when complete: a failed run leaves the
+        previous feed in place. Checkpoints are not used (a stale one is
+        cleared), the gzip copy is compressed after the merge.
+
+        Args:
+            platform_name: 'google' or 'meta'
+
+        Returns:
+            True if successful, False otherwise
+        """
+        platform_config = self.platforms_config['platforms'][platform_name]
+        settings = self.platforms_config['settings']
+        platform_start_time = time.time()
+
+        feed_filename = platform_config.get('feed_filename', f'{platform_name}_feed.xml')
+        output_file = self.output_dir / feed_filename
+        shard_dir = self.output_dir / '.shards' / platform_name
+
+        # Fetch all products from MySQL (single query, ordered by id)
+        logger.info(f"📡 Fetching products from MySQL...")
+        products = self.data_loader.get_products_with_metafields()
+
+        workers = settings.get('render_workers', 0) or os.cpu_count() or 1
+        formats = extra_formats(platform_config.get('formats'))
+        shard_ranges = plan_shards(products, settings['render_shards'])
+        shutil.rmtree(shard_dir, ignore_errors=True)
+        shard_dir.mkdir(parents=True)
+        tasks = [{
+            'index': index,
+            'platform': platform_name,
+            'base_url': self.base_url,
+            'products': products[start:end],
+            'path': str(shard_dir / f'shard_{index:04d}.xml'),
+            'formats': formats,
+            'buffer_size': settings.get('xml_buffer_size', DEFAULT_BUFFER_SIZE),
+            'batch_items': settings.get('xml_batch_items', DEFAULT_BATCH_ITEMS),
+        } for index, (start, end) in enumerate(shard_ranges)]
+
+        logger.info(f"Processing {len(products)} products for {platform_name} in {len(tasks)} shards "
+                    f"({workers} workers)...")
+        try:
+            shards = render_shards(tasks, workers, settings.get('shard_max_attempts', DEFAULT_SHARD_ATTEMPTS))
+
+            # Merge: header, shards in product id order, footer
+            merge_start = time.time()
+            xml_generator = self._get_feed_generator(platform_name, output_file, tmp=True, compress=False)
+            xml_generator.start_feed(
+                title=platform_config.get('title', f'Racoon Lab - {platform_name.title()} Feed'),
+                link=self.base_url,
+                description=platform_config.get('description', f'Product catalog for {platform_name}')
+            )
+            try:
+                for task, shard in zip(tasks, shards):
+                    xml_generator.append_shard(task['path'], shard['items'])
+                xml_generator.end_feed()
+            except BaseException:
+                xml_generator.discard()
+                raise
+            merge_seconds = time.time() - merge_start
+        finally:
+            shutil.rmtree(shard_dir, ignore_errors=True)
+
+        # Publish (backup previous feed if enabled)
+        if settings.get('backup_previous_feed', True):
+            self._backup_feed(output_file)
+        self._publish_feed_files(xml_generator)
+
+        checkpoint = self._get_checkpoint(platform_name, 'mysql', output_file)
+        if checkpoint:
+            checkpoint.clear()
+
+        gzip_stats = None
+        if settings.get('xml_gzip', True):
+            compressor = GzipCompressor(f"{output_file}.gz", settings.get('xml_gzip_level', DEFAULT_GZIP_LEVEL),
+                                        prefix_path=str(output_file))
+            compressor.close()
+            gzip_stats = compressor.get_stats()
+
+        # Shard counters into the run-level ones
+        for shard in shards:
+            self.context_stats.computed.update(shard['context_computed'])
+            self.context_stats.reused.update(shard['context_reused'])
+
+        # Calculate metrics
+        total_products = sum(shard['products'] for shard in shards)
+        total_items = xml_generator.item_count
+        platform_duration = time.time() - platform_start_time
+        file_size = output_file.stat().st_size / (1024 * 1024)
+        items_per_second = total_items / platform_duration if platform_duration > 0 else 0.0
+
+        # Store metrics
+        self.metrics[platform_name] = {
+            'platform': platform_name,
+            'data_source': 'mysql',
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'total_products': total_products,
+            'total_items': total_items,
+            'file_size_mb': round(file_size, 2),
+            'duration_seconds': round(platform_duration, 0),
+            'items_per_second': round(items_per_second, 1),
+            'feed_filename': feed_filename,
+            'resumed_from_checkpoint': False,
+            'mapper_caches': self._merge_cache_stats([shard['mapper_caches'] for shard in shards]),
+            **self._get_gzip_metrics(gzip_stats),
+            'formats': self._get_format_metrics(xml_generator),
+            'render_shards': len(shards),
+            'render_workers': workers,
+            'shard_retries': sum(shard['attempts'] - 1 for shard in shards),
+            'merge_seconds': round(merge_seconds, 3),
+            'shards': [{key: shard[key] for key in ('index', 'first_product_id', 'last_product_id', 'items',
+                                                     'bytes', 'seconds', 'attempts')} for shard in shards],
+            'success': True
+        }
+
+        logger.info(f"\n{platform_name.upper()} FEED METRICS:")
+        logger.info(f"  Data source: MySQL ({len(shards)} shards, {workers} workers)")
+        logger.info(f"  Products: {total_products}")
+        logger.info(f"  Items: {total_items}")
+        logger.info(f"  File size: {file_size:.2f} MB")
+        if 'gzip_size_mb' in self.metrics[platform_name]:
+            logger.info(f"  Gzip size: {self.metrics[platform_name]['gzip_size_mb']:.2f} MB "
+                        f"({self.metrics[platform_name]['gzip_cpu_seconds']:.1f}s CPU)")
+        for cache_name, cache_stats in self.metrics[platform_name]['mapper_caches'].items():
+            logger.info(f"  Cache {cache_name}: {cache_stats['hit_rate']:.0%} hits "
+                        f"({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']})")
+        slowest = max(shards, key=lambda shard: shard['seconds'])
+        logger.info(f"  Shards: slowest {slowest['seconds']:.1f}s (#{slowest['index']}), "
+                    f"{self.metrics[platform_name]['shard_retries']} retries, merge {merge_seconds:.2f}s")
         logger.info(f"  Duration: {platform_duration:.0f}s ({platform_duration/60:.1f}min)")
+        logger.info(f"  Throughput: {items_per_second:.0f} items/s")
 
         return True
 
@@ -353,101 +564,93 @@ class FeedOrchestrator:
         feed_filename = platform_config.get('feed_filename', f'{platform_name}_feed.xml')
         output_file = self.output_dir / feed_filename
 
-        # Backup previous feed if enabled
-        if self.platforms_config['settings'].get('backup_previous_feed', True):
-            self._backup_feed(output_file)
-
-        xml_generator = self._get_xml_generator(platform_name, str(output_file))
+        xml_generator = self._get_feed_generator(platform_name, output_file)
+
+        # Resume from checkpoint if a previous run was interrupted
+        checkpoint = self._get_checkpoint(platform_name, 'shopify_api', output_file)
+        resume_state = checkpoint.load() if checkpoint else None
+        if resume_state and not xml_generator.resume_offsets_match(resume_state.get('format_offsets')):
+            logger.warning(f"Ignoring checkpoint for {platform_name}: feed formats changed")
+            resume_state = None
+        checkpoint_interval = self.platforms_config['settings'].get('checkpoint_interval', 100)
+
+        if resume_state:
+            logger.info(f"♻️ Resuming from checkpoint: product {resume_state['last_product_id']}, "
+                        f"{resume_state['total_items']} items already written")
+            xml_generator.resume_feed(resume_state['byte_offset'], resume_state['total_items'],
+                                      resume_state.get('format_offsets'))
+        else:
+            # Backup previous feed if enabled
+            if self.platforms_config['settings'].get('backup_previous_feed', True):
+                self._backup_feed(output_file)
 
-        # Start feed
-        title = platform_config.get('title', f'Racoon Lab - {platform_name.title()} Feed')
-        description = platform_config.get('description', f'Product catalog for {platform_name}')
+            # Start feed
+            title = platform_config.get('title', f'Racoon Lab - {platform_name.title()} Feed')
+            description = platform_config.get('description', f'Product catalog for {platform_name}')
 
-        xml_generator.start_feed(
-            title=title,
-            link=self.base_url,
-            description=description
-        )
+            xml_generator.start_feed(
+                title=title,
+                link=self.base_url,
+                description=description
+            )
 
         # Process products with since_id pagination
-        total_items = 0
-        total_products = 0
-        page = 1
-        last_product_id = 0
+        # (next page is prefetched in background while the current one is processed)
+        total_items = resume_state['total_items'] if resume_state else 0
+        total_products = resume_state['total_products'] if resume_state else 0
+        last_product_id = resume_state['last_product_id'] if resume_state else 0
 
         logger.info(f"📡 Fetching products from Shopify API...")
 
-        while True:
-            params = {
-                'status': 'active',
-                'limit': 250,
-                'order': 'id asc',
-                'fields': 'id,title,handle,vendor,product_type,tags,body_html,variants,images,image,status'
-            }
-
-            if last_product_id > 0:
-                params['since_id'] = last_product_id
-
-            url = f"https://{self.client.shop_url}/admin/api/2024-10/products.json"
-
+        for product in self.client.iter_products(limit=250, since_id=last_product_id):
             try:
-                self.client._rate_limit()
-                response = requests.get(url, headers=self.client.headers, params=params, timeout=30)
-
-                if response.status_code != 200:
-                    logger.error(f"API error {response.status_code}: {response.text}")
-                    break
-
-                data = response.json()
-                products = data.get('products', [])
-
-                if not products:
-                    logger.info(f"No more products, finished at page {page}")
-                    break
+                # Fetch metafields + collections
+                product_with_meta = self.client.get_product_with_metafields_and_collections(product)
 
-                logger.info(f"Page {page}: {len(products)} active products")
+                # Transform using platform mapper
+                metafields = product_with_meta.get('metafields', {})
+                collections = product_with_meta.get('collections', [])
+                context = self._get_product_context(product_with_meta)
+                items = mapper.transform_product(product_with_meta, metafields, collections, context)
 
-                # Process each product
-                for product in products:
-                    try:
-                        # Fetch metafields + collections
-                        product_with_meta = self.client.get_product_with_metafields_and_collections(product)
+                # Write to XML
+                for item in items:
+                    xml_generator.add_item(item)
+                    total_items += 1
 
-                        # Transform using platform mapper
-                        metafields = product_with_meta.get('metafields', {})
-                        collections = product_with_meta.get('collections', [])
-                        items = mapper.transform_product(product_with_meta, metafields, collections)
-
-                        # Write to XML
-                        for item in items:
-                            xml_generator.add_item(item)
-                            total_items += 1
-
-                        total_products += 1
+                total_products += 1
 
-                    except Exception as e:
-                        logger.error(f"Error processing product {product.get('id')}: {e}")
-                        continue
+                # Progress log every 100 products
+                if total_products % 100 == 0:
+                    logger.info(f"  Progress: {total_products} products, {total_items} items")
 
-                logger.info(f"Page {page} complete: {total_products} products, {total_items} items")
+                # Checkpoint at product boundary
+                if checkpoint and total_products % checkpoint_interval == 0:
+                    checkpoint.save(product['id'], total_products, total_items, xml_generator.checkpoint_offset(),
+                                    xml_generator.format_offsets())
 
-                # Update since_id
-                last_product_id = products[-1]['id']
-                page += 1
+            except Exception as e:
+                logger.error(f"Error processing product {product.get('id')}: {e}")
+                continue
 
-                # Clear memory
-                gc.collect()
+            finally:
+                self._release_product_context(product['id'])
 
-            except Exception as e:
-                logger.error(f"Error fetching page {page}: {e}")
-                break
+        # Clear memory
+        gc.collect()
 
         # Close XML
         xml_generator.end_feed()
 
+        # Feed complete: next run starts from scratch
+        if checkpoint:
+            checkpoint.clear()
+
         # Calculate metrics
         platform_duration = time.time() - platform_start_time
         file_size = output_file.stat().st_size / (1024 * 1024)
+        items_written = total_items - (resume_state['total_items'] if resume_state else 0)
+        items_per_second = items_written / platform_duration if platform_duration > 0 else 0.0
 
         # Store metrics
         self.metrics[platform_name] = {
@@ -458,7 +661,14 @@ class FeedOrchestrator:
             'total_items': total_items,
             'file_size_mb': round(file_size, 2),
             'duration_seconds': round(platform_duration, 0),
+            'items_per_second': round(items_per_second, 1),
             'feed_filename': feed_filename,
+            'resumed_from_checkpoint': resume_state is not None,
+            'rate_limiter': self.client.rate_limiter.get_stats(),
+            'enrichment_cache': self.client.enrichment_cache.get_stats() if self.client.enrichment_cache else None,
+            'mapper_caches': mapper.get_cache_stats(),
+            **self._get_gzip_metrics(xml_generator.compression_stats()),
+            'formats': self._get_format_metrics(xml_generator),
             'success': True
         }
 
@@ -467,28 +677,402 @@ class FeedOrchestrator:
         logger.info(f"  Products: {total_products}")
         logger.info(f"  Items: {total_items}")
         logger.info(f"  File size: {file_size:.2f} MB")
+        if 'gzip_size_mb' in self.metrics[platform_name]:
+            logger.info(f"  Gzip size: {self.metrics[platform_name]['gzip_size_mb']:.2f} MB "
+                        f"({self.metrics[platform_name]['gzip_cpu_seconds']:.1f}s CPU)")
+        for cache_name, cache_stats in self.metrics[platform_name]['mapper_caches'].items():
+            logger.info(f"  Cache {cache_name}: {cache_stats['hit_rate']:.0%} hits "
+                        f"({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']})")
         logger.info(f"  Duration: {platform_duration:.0f}s ({platform_duration/60:.1f}min)")
+        logger.info(f"  Throughput: {items_per_second:.0f} items/s")
 
         return True
 
+    def _transform_mysql_product(self, mapper, product: Dict) -> List[Dict]:
+        """
+        Transform a MySQL product into platform items
+
+        Metafields are stored per variant in MySQL, so each variant is
+        transformed as a single-variant product with its own metafields.
+
+        Args:
+            mapper: Platform mapper
+            product: Product from MySQLDataLoader.get_products_with_metafields()
+
+        Returns:
+            List of platform items
+        """
+        return transform_mysql_product(mapper, product, self._get_product_context(product),
+                                       self.data_loader.get_variant_metafields)
+
+    # ========== INCREMENTAL UPDATES (WEBHOOKS) ==========
+
+    def update_products(self, updated_ids: Set[int], deleted_ids: Set[int]) -> bool:
+        """
+        Patch the published feeds for a set of changed products
+
+        Only the affected items are regenerated: every other <item> block
+        is copied verbatim from the current feed. Updated products replace
+        their old items in place (new products are appended); deleted
+        products, and updated products no longer eligible (out of stock,
+        inactive), are removed.
+
+        Args:
+            updated_ids: Products created or updated
+            deleted_ids: Products deleted
+
+        Returns:
+            True if all enabled feeds were patched, False otherwise
+        """
+        logger.info(f"🔁 Incremental update: {len(updated_ids)} updated, {len(deleted_ids)} deleted products")
+
+        # Keep metrics of the last full run, only patched platforms change
+        self.metrics = self._load_saved_metrics()
+        self._reset_product_contexts()
+
+        try:
+            fresh_products = self._fetch_products_by_id(sorted(updated_ids))
+
+            success = True
+            for platform_name, platform_config in self.platforms_config['platforms'].items():
+                if not platform_config.get('enabled', False):
+                    continue
+
+                try:
+                    self._patch_platform_feed(platform_name, fresh_products, set(updated_ids) | set(deleted_ids))
+                except Exception as e:
+                    success = False
+                    logger.error(f"❌ Error patching {platform_name} feed: {e}", exc_info=True)
+
+            if self.platforms_config['settings'].get('collect_metrics', True):
+                self._save_metrics()
+
+            return success
+
+        finally:
+            if self.use_mysql and self.data_loader:
+                self.data_loader.disconnect()
+
+            if self.client and self.client.enrichment_cache:
+                self.client.enrichment_cache.close()
+
+    def _fetch_products_by_id(self, product_ids: List[int]) -> List[Dict]:
+        """Fetch current data for a list of products (missing products are skipped)"""
+        if not product_ids:
+            return []
+
+        if self.use_mysql:
+            return self.data_loader.get_products_with_metafields(product_ids=product_ids)
+
+        products = []
+        for product_id in product_ids:
+            product = self.client.get_product(product_id)
+            if product and product.get('status', '').lower() == 'active':
+                products.append(self.client.get_product_with_metafields_and_collections(product))
+        return products
+
+    def _patch_platform_feed(self, platform_name: str, fresh_products: List[Dict], affected_ids: Set[int]):
+        """
+        Rewrite one platform feed replacing the items of the affected products
+
+        Args:
+            platform_name: 'google' or 'meta'
+            fresh_products: Current data of the updated products
+            affected_ids: All updated and deleted product ids
+        """
+        platform_config = self.platforms_config['platforms'][platform_name]
+        feed_filename = platform_config.get('feed_filename', f'{platform_name}_feed.xml')
+        output_file = self.output_dir / feed_filename
+
+        if not output_file.exists():
+            logger.warning(f"⚠️ {platform_name} feed not generated yet, skipping incremental update")
+            return
+
+        # An interrupted full run left a partial feed: patching would publish it as complete and
+        # move the bytes its checkpoint resumes from. Drop the checkpoint: the next run starts over
+        checkpoint = self._get_checkpoint(platform_name, 'mysql' if self.use_mysql else 'shopify_api', output_file)
+        if checkpoint and checkpoint.exists():
+            logger.warning(f"⚠️ {platform_name} feed is partial (interrupted run), skipping incremental update; "
+                           f"the next full run regenerates it")
+            checkpoint.clear()
+            return
+
+        mapper = self._get_mapper(platform_name)
+        affected = {str(product_id) for product_id in affected_ids}
+
+        # Render the new items per product (item_group_id = product id)
+        new_items: Dict[str, List[Dict]] = {}
+        for product in fresh_products:
+            if self.use_mysql:
+                items = self._transform_mysql_product(mapper, product)
+            else:
+                items = mapper.transform_product(product, product.get('metafields', {}), product.get('collections', []),
+                                                 self._get_product_context(product))
+            new_items[str(product['id'])] = items
+
+        # Formats with a published file are patched alongside the XML (item by item, same order);
+        # a format without one is written by the next full run
+        formats = [name for name in extra_formats(platform_config.get('formats'))
+                   if format_path(output_file, name).exists()]
+        xml_generator = self._get_feed_generator(platform_name, output_file, tmp=True, formats=formats)
+        try:
+            xml_generator.start_feed(
+                title=platform_config.get('title', f'Racoon Lab - {platform_name.title()} Feed'),
+                link=self.base_url,
+                description=platform_config.get('description', f'Product catalog for {platform_name}')
+            )
+
+            feed_items = [self._iter_feed_items(output_file)]
+            feed_items += [writer.iter_raw_items(format_path(output_file, name))
+                           for name, writer in xml_generator.writers.items()]
+
+            removed = 0
+            for raw_items in zip(*feed_items, strict=True):
+                group_id = raw_items[0][1]
+                if group_id not in affected:
+                    xml_generator.add_raw_items([raw_item for raw_item, _ in raw_items])
+                    continue
+
+                removed += 1
+                # First old item of an updated product: write its new items here
+                for item in new_items.pop(group_id, []):
+                    xml_generator.add_item(item)
+
+            # Updated products that were not in the feed yet
+            for items in new_items.values():
+                for item in items:
+                    xml_generator.add_item(item)
+
+            xml_generator.end_feed()
+        except BaseException:
+            # Nothing is published: drop the '.tmp' outputs (gzip copy included)
+            xml_generator.discard()
+            raise
+
+        self._publish_feed_files(xml_generator)
+
+        file_size = output_file.stat().st_size / (1024 * 1024)
+        metrics = self.metrics.setdefault(platform_name, {})
+        metrics.update({
+            'total_items': xml_generator.item_count,
+            'file_size_mb': round(file_size, 2),
+            **self._get_gzip_metrics(xml_generator.compression_stats()),
+            'formats': self._get_format_metrics(xml_generator),
+            'last_incremental_update': datetime.now(timezone.utc).isoformat(),
+            'incremental_updates': metrics.get('incremental_updates', 0) + 1
+        })
+
+        logger.info(f"✅ {platform_name.upper()} feed patched: {removed} items replaced, "
+                    f"{xml_generator.item_count} items total")
+
+    def _iter_feed_items(self, feed_path: Path):
+        """
+        Stream the <item> blocks of a generated feed
+
+        Yields:
+            (item_xml, item_group_id) for each item, in file order
+        """
+        with open(feed_path, 'r', encoding='utf-8') as f:
+            block: List[str] = []
+            group_id = ''
+
+            for line in f:
+                if line == '    <item>\n':
+                    block = [line]
+                    group_id = ''
+                elif block:
+                    block.append(line)
+                    stripped = line.strip()
+                    if stripped.startswith('<g:item_group_id>'):
+                        group_id = stripped[len('<g:item_group_id>'):-len('</g:item_group_id>')]
+                    elif line == '    </item>\n':
+                        yield ''.join(block), group_id
+                        block = []
+
+    def _load_saved_metrics(self) -> Dict:
+        """Load metrics of the last run (so incremental updates keep them)"""
+        metrics_file = self.output_dir / 'feed_metrics.json'
+
+        try:
+            with open(metrics_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
     def _get_mapper(self, platform_name: str):
         """Get platform-specific mapper"""
         if platform_name == 'google':
-            return GoogleMapper(self.config, self.base_url)
+            mapper = GoogleMapper(self.config, self.base_url, self.product_type_resolver)
         elif platform_name == 'meta':
-            return MetaMapper(self.config, self.base_url)
+            mapper = MetaMapper(self.config, self.base_url, self.product_type_resolver)
         else:
             return None
 
-    def _get_xml_generator(self, platform_name: str, output_file: str):
-        """Get platform-specific XML generator"""
+        # First mapper of the run builds the resolver, the others share it
+        self.product_type_resolver = mapper.product_type_resolver
+        return mapper
+
+    # ========== PRODUCT CONTEXTS ==========
+
+    def _reset_product_contexts(self):
+        """Start a new run: drop contexts, counters and the shared resolver"""
+        self.product_contexts: Dict[int, ProductContext] = {}
+        self.release_product_contexts = False
+        self.context_counts = {'created': 0, 'released': 0, 'peak': 0}
+        self.context_stats = ContextStats()
+        self.product_type_resolver = None
+
+    def _get_product_context(self, product: Dict) -> ProductContext:
+        """
+        Get the context of a product (shared by its variants and by all platforms)
+
+        Contexts are kept until the last platform pass of the run has used
+        them (_release_product_context): at most one platform pass of
+        products is held at once.
+
+        Args:
+            product: Product dict (MySQL or Shopify API)
+
+        Returns:
+            ProductContext for product['id']
+        """
+        context = self.product_contexts.get(product['id'])
+        if context is None:
+            context = ProductContext(self.context_stats)
+            self.product_contexts[product['id']] = context
+            counts = self.context_counts
+            counts['created'] += 1
+            counts['peak'] = max(counts['peak'], len(self.product_contexts))
+        return context
+
+    def _release_product_context(self, product_id: int):
+        """Drop the context of a product used by the last platform pass (no-op on earlier passes)"""
+        if self.release_product_contexts and self.product_contexts.pop(product_id, None) is not None:
+            self.context_counts['released'] += 1
+
+    def _get_product_context_metrics(self) -> Dict:
+        """Compute counts of the shared per-product values and product_type resolution"""
+        metrics = self.context_stats.get_stats()
+        metrics['products'] = self.context_counts['created']
+        metrics['released'] = self.context_counts['released']
+        metrics['peak_live_contexts'] = self.context_counts['peak']
+
+        if self.product_type_resolver:
+            metrics['product_type_resolution'] = self.product_type_resolver.get_stats()
+
+            defaulted = self.product_type_resolver.default_product_types
+            if defaulted:
+                logger.info(f"Product types → default category: {len(defaulted)} ({', '.join(list(defaulted)[:10])})")
+
+        logger.info(f"Product context: {metrics['computed']} values computed, {metrics['reused']} reused "
+                    f"({metrics['reuse_rate']:.0%}), peak {metrics['peak_live_contexts']} live contexts")
+        return metrics
+
+    def _get_xml_generator(self, platform_name: str, output_file: str, gzip_file: Optional[str] = None,
+                           compress: bool = True):
+        """
+        Get platform-specific XML generator (output buffering and gzip copy from settings)
+
+        Args:
+            platform_name: 'google' or 'meta'
+            output_file: XML path
+            gzip_file: Gzip copy path (default: output_file + '.gz'; ignored if xml_gzip is off)
+            compress: False = never write a gzip copy (e.g. feed merged from shards)
+        """
+        settings = self.platforms_config['settings']
+        buffer_size = settings.get('xml_buffer_size', DEFAULT_BUFFER_SIZE)
+        batch_items = settings.get('xml_batch_items', DEFAULT_BATCH_ITEMS)
+        gzip_level = settings.get('xml_gzip_level', DEFAULT_GZIP_LEVEL)
+        if compress and settings.get('xml_gzip', True):
+            gzip_file = gzip_file or f"{output_file}.gz"
+        else:
+            gzip_file = None
+
         if platform_name == 'google':
-            return GoogleXMLGenerator(output_file)
+            return GoogleXMLGenerator(output_file, buffer_size, batch_items, gzip_file, gzip_level)
         elif platform_name == 'meta':
-            return MetaXMLGenerator(output_file)
+            return MetaXMLGenerator(output_file, buffer_size, batch_items, gzip_file, gzip_level)
         else:
             raise ValueError(f"Unknown platform: {platform_name}")
 
+    def _get_feed_generator(self, platform_name: str, output_file: Path, tmp: bool = False, compress: bool = True,
+                            formats: Optional[List[str]] = None) -> MultiFormatFeed:
+        """
+        Get the XML generator of a platform plus its other formats (platforms.json "formats")
+
+        Args:
+            platform_name: 'google' or 'meta'
+            output_file: Published XML path (the other formats are written next to it)
+            tmp: Write every output, gzip copy included, to '<path>.tmp' (then _publish_feed_files)
+            compress: False = no gzip copy of the XML
+            formats: Other formats to write (default: from platforms.json)
+        """
+        if formats is None:
+            formats = extra_formats(self.platforms_config['platforms'][platform_name].get('formats'))
+        settings = self.platforms_config['settings']
+        suffix = '.tmp' if tmp else ''
+
+        xml_generator = self._get_xml_generator(platform_name, f"{output_file}{suffix}",
+                                                gzip_file=f"{output_file}.gz{suffix}", compress=compress)
+        writers = {
+            format_name: create_format_writer(platform_name, format_name, f"{format_path(output_file, format_name)}{suffix}",
+                                              settings.get('xml_buffer_size', DEFAULT_BUFFER_SIZE),
+                                              settings.get('xml_batch_items', DEFAULT_BATCH_ITEMS))
+            for format_name in formats
+        }
+        return MultiFormatFeed(xml_generator, writers)
+
+    def _publish_feed_files(self, feed_generator: MultiFormatFeed):
+        """
+        Move the '.tmp' outputs of a closed generator over the published files
+
+        The XML goes first and its gzip copy right after: until then the
+        old .gz is older than the new XML and is not served (gzip_feed_path).
+        """
+        for path in feed_generator.output_files():
+            os.replace(path, path[:-len('.tmp')])
+
+    def _get_format_metrics(self, feed_generator: MultiFormatFeed) -> Dict:
+        """File name and size of the other formats"""
+        metrics = {}
+        for format_name, writer in feed_generator.writers.items():
+            path = Path(writer.output_file)
+            if path.suffix == '.tmp':
+                path = path.with_suffix('')
+            metrics[format_name] = {'filename': path.name, 'file_size_mb': round(path.stat().st_size / (1024 * 1024), 2)}
+        return metrics
+
+    def _get_gzip_metrics(self, stats: Optional[Dict]) -> Dict:
+        """Gzip copy metrics from GzipCompressor stats ({} if no copy was written)"""
+        if not stats or not stats['success']:
+            return {}
+        return {
+            'gzip_size_mb': round(stats['output_bytes'] / (1024 * 1024), 2),
+            'gzip_ratio': stats['ratio'],
+            'gzip_cpu_seconds': stats['cpu_seconds'],
+        }
+
+    def _merge_cache_stats(self, cache_stats_list: List[Dict]) -> Dict:
+        """Sum mapper cache stats of several mappers (e.g. one per shard)"""
+        merged: Dict[str, Dict] = {}
+        for cache_stats in cache_stats_list:
+            for cache_name, stats in cache_stats.items():
+                total = merged.setdefault(cache_name, {'hits': 0, 'misses': 0, 'hit_rate': 0.0, 'size': 0,
+                                                       'max_size': stats['max_size']})
+                for key in ('hits', 'misses', 'size'):
+                    total[key] += stats[key]
+                lookups = total['hits'] + total['misses']
+                total['hit_rate'] = round(total['hits'] / lookups, 4) if lookups else 0.0
+        return merged
+
+    def _get_checkpoint(self, platform_name: str, data_source: str, output_file: Path) -> Optional[FeedCheckpoint]:
+        """Get checkpoint for a platform feed (None if checkpointing is disabled)"""
+        if not self.platforms_config['settings'].get('checkpoint_enabled', True):
+            return None
+
+        max_age_hours = self.platforms_config['settings'].get('checkpoint_max_age_hours', 12)
+        return FeedCheckpoint(self.output_dir / '.checkpoints', platform_name, data_source, output_file, max_age_hours)
+
     def _backup_feed(self, feed_path: Path):
         """Backup previous feed if exists"""
         if feed_path.exists():
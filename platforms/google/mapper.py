@@ -4,20 +4,51 @@ Inherits from BaseMapper with Google-specific logic
 """
 
 import logging
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from core.base_mapper import BaseMapper
+from core.product_context import ProductContext
 
 logger = logging.getLogger(__name__)
 
+# Distinct collection sets kept by the label cache (least recently used evicted)
+COLLECTION_LABELS_CACHE_SIZE = 4096
+
+# Tag → product_detail fallback when product_mappings has no details (shared, read-only)
+TAG_PRODUCT_DETAILS = {
+    'suola vintage': {'attribute_name': 'Tipo di Suola', 'attribute_value': 'Vintage'},
+    'suola bianca': {'attribute_name': 'Tipo di Suola', 'attribute_value': 'Bianca'},
+    'suola nera': {'attribute_name': 'Tipo di Suola', 'attribute_value': 'Nera'},
+    'platform': {'attribute_name': 'Tipo di Suola', 'attribute_value': 'Platform'},
+    'effetto vintage': {'attribute_name': 'Stile', 'attribute_value': 'Effetto Vintage'},
+    'memory foam': {'attribute_name': 'Comfort', 'attribute_value': 'Memory Foam'},
+    'impermeabile': {'attribute_name': 'Caratteristiche', 'attribute_value': 'Impermeabile'},
+    'traspirante': {'attribute_name': 'Caratteristiche', 'attribute_value': 'Traspirante'}
+}
+MAX_TAG_PRODUCT_DETAILS = 3
+
+# Generic product_highlight fallback (after "<brand> Original")
+GENERIC_HIGHLIGHTS = '100% Personalizzabili, Fatto a mano in Italia'
+
 
 class GoogleMapper(BaseMapper):
     """Google Shopping specific mapper"""
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        # Many products share the same collection set: labels are split
+        # once per distinct set (keyed by the collection tuple)
+        self._collection_labels_cache = lru_cache(maxsize=COLLECTION_LABELS_CACHE_SIZE)(
+            self._split_collections_across_labels
+        )
+    
     def get_platform_name(self) -> str:
         """Return platform name"""
         return 'google'
     
-    def transform_product(self, product: Dict, metafields: Optional[Dict] = None, collections: Optional[List[str]] = None) -> List[Dict]:
+    def transform_product(self, product: Dict, metafields: Optional[Dict] = None, collections: Optional[List[str]] = None,
+                          context: Optional[ProductContext] = None) -> List[Dict]:
         """Transform Shopify product into Google Shopping items"""
         
         # Apply filters
@@ -28,149 +59,84 @@ class GoogleMapper(BaseMapper):
             return []
         
         items = []
-        tags = product.get('tags', '').split(', ') if isinstance(product.get('tags'), str) else product.get('tags', [])
+        context = context or ProductContext()
+        tags = self._context_tags(product, context)
         collections = collections or []
         
         for variant in product.get('variants', []):
             if self._should_exclude_variant(variant):
                 continue
             
-            item = self._transform_variant_google(product, variant, tags, metafields, collections)
+            item = self._transform_variant_google(product, variant, tags, metafields, collections, context)
             items.append(item)
         
         return items
     
     def _transform_variant_google(self, product: Dict, variant: Dict, tags: List[str], 
-                                   metafields: Optional[Dict], collections: List[str]) -> Dict:
+                                   metafields: Optional[Dict], collections: List[str],
+                                   context: ProductContext) -> Dict:
         """
         Transform single variant to Google Shopping format
         
-        IMPORTANT: This preserves ALL existing Google feed logic without modifications
+        Fields are declared in config/field_mappings.json (platforms.google):
+        canonical fields (id, description, link, price, ...) plus Google
+        fields built by the helpers below
         """
-        item = {}
-        
-        # Extract metafields
-        metafield_data = self._extract_metafields(metafields) if metafields else {}
-        
-        # ========== CORE FIELDS (MAPPING AREA 1) ==========
-        item['g:id'] = str(variant['id'])
-        item['g:title'] = self._build_title_google(product, variant)
-        item['g:description'] = self._clean_html(product.get('body_html', ''))
-        item['g:link'] = f"{self.base_url}/products/{product['handle']}?variant={variant['id']}"
-        
-        # ========== IMAGES (MAPPING AREA 2) ==========
-        images = product.get('images', [])
+        return self._build_platform_item(product, variant, tags, metafields, collections, context)
+    
+    # ========== GOOGLE-SPECIFIC HELPER METHODS ==========
+    
+    def _get_images_google(self, product: Dict, context: ProductContext) -> Dict:
+        """image_link and additional_image_link (max 10); Converse: _INT image as main"""
+        fields = {}
+        images = self._context_image_srcs(product, context)
         brand = product.get('vendor', '').lower()
         
         if images:
             if 'converse' in brand:
-                # Special Converse logic: _INT as main image
-                int_image = None
-                other_images = []
-                
-                for img in images:
-                    img_src = img.get('src', '')
-                    if '_INT' in img_src or '_int' in img_src:
-                        int_image = img_src
-                    else:
-                        other_images.append(img_src)
+                # Special Converse logic: _INT as main image (last one wins)
+                int_images, other_images = self._context_converse_images(product, context)
                 
-                if int_image:
-                    item['g:image_link'] = int_image
+                if int_images:
+                    fields['g:image_link'] = int_images[-1]
                     if other_images:
-                        item['g:additional_image_link'] = other_images[:10]
+                        fields['g:additional_image_link'] = other_images[:10]
                 else:
-                    item['g:image_link'] = images[0].get('src', '')
-                    additional_images = [img.get('src', '') for img in images[1:11]]
+                    fields['g:image_link'] = images[0]
+                    additional_images = images[1:11]
                     if additional_images:
-                        item['g:additional_image_link'] = additional_images
+                        fields['g:additional_image_link'] = additional_images
             else:
                 # Standard image handling
-                item['g:image_link'] = images[0].get('src', '')
-                additional_images = [img.get('src', '') for img in images[1:11]]
+                fields['g:image_link'] = images[0]
+                additional_images = images[1:11]
                 if additional_images:
-                    item['g:additional_image_link'] = additional_images
-        
-        # ========== PRICING (MAPPING AREA 3) ==========
-        compare_at = variant.get('compare_at_price')
-        price = float(variant['price'])
-        
-        if compare_at and float(compare_at) > 0:
-            item['g:price'] = f"{float(compare_at):.2f} EUR"
-            item['g:sale_price'] = f"{price:.2f} EUR"
-        else:
-            item['g:price'] = f"{price:.2f} EUR"
-        
-        # ========== BASIC ATTRIBUTES (MAPPING AREA 4) ==========
-        item['g:condition'] = self.static_values.get('condition', 'new')
-        item['g:availability'] = 'in stock' if variant.get('inventory_quantity', 0) > 0 else 'out of stock'
-        item['g:brand'] = product.get('vendor', 'Racoon Lab')
-        
-        # ========== FASHION-SPECIFIC FIELDS (MAPPING AREA 5) ==========
-        item['g:gender'] = self._get_gender_google(metafield_data)
-        item['g:age_group'] = self._get_age_group_google(metafield_data)
-        
-        # Color - skip if not in metafield
-        color = self._get_color_google(metafield_data)
-        if color:
-            item['g:color'] = color
-        
-        # ========== GROUPING & IDENTIFIERS (MAPPING AREA 6) ==========
-        item['g:item_group_id'] = str(product['id'])
-        
-        # GTIN from barcode - omit if empty
-        barcode = variant.get('barcode', '')
-        if barcode and str(barcode).strip():
-            item['g:gtin'] = str(barcode).strip()
-        
-        item['g:mpn'] = variant.get('sku', '')
-        
-        # ========== CATEGORY & TYPE (MAPPING AREA 7) ==========
-        item['g:google_product_category'] = self.static_values.get('google_product_category', '187')
-        # Use hierarchical product_type: "Calzature > Sneakers > Adidas > Samba"
-        item['g:product_type'] = self._build_hierarchical_product_type(product)
-        
-        # ========== SIZE & MATERIAL & PATTERN (MAPPING AREA 8) ==========
-        item['g:size'] = variant.get('option1', '')
+                    fields['g:additional_image_link'] = additional_images
         
-        # Material - skip if not in metafield
-        material = self._get_material_google(metafield_data)
-        if material:
-            item['g:material'] = material
-        
-        # Pattern - skip if not found
-        pattern = self._get_pattern(tags)
-        if pattern:
-            item['g:pattern'] = pattern
-        
-        # ========== PRODUCT DETAILS (MAPPING AREA 9) ==========
-        product_details = self._get_product_details_google(product, variant, tags)
-        if product_details:
-            item['g:product_detail'] = product_details
-        
-        # ========== CUSTOM LABELS (MAPPING AREA 10) ==========
-        # Split collections across custom_label_0 and custom_label_1
-        label_0, label_1 = self._split_collections_across_labels(collections)
-        item['g:custom_label_0'] = label_0
-        item['g:custom_label_1'] = label_1
-        item['g:custom_label_2'] = self.static_values.get('custom_label_2', '')
-        item['g:custom_label_3'] = self.static_values.get('custom_label_3', '')
-        item['g:custom_label_4'] = self.static_values.get('custom_label_4', '')
-        
-        # ========== ADDITIONAL FIELDS (MAPPING AREA 11) ==========
-        item['g:size_system'] = self.static_values.get('size_system', 'IT')
-        item['g:is_bundle'] = 'TRUE'  # Shoes sold as pairs
-        item['g:product_highlight'] = self._get_product_highlight_google(product, variant, tags)
-        item['g:TAGS'] = ', '.join(tags)
-        
-        # ========== STAR RATING (MAPPING AREA 12) ==========
-        star_rating = metafield_data.get('star_rating')
-        if star_rating:
-            item['g:product_rating'] = str(star_rating)
-        
-        return item
+        return fields
     
-    # ========== GOOGLE-SPECIFIC HELPER METHODS ==========
+    def _get_collection_labels_google(self, collections: List[str], context: ProductContext) -> Dict:
+        """custom_label_0 / custom_label_1 from collections (computed once per product)"""
+        label_0, label_1 = context.memo('collection_labels', collections, self._collection_labels)
+        return {'g:custom_label_0': label_0, 'g:custom_label_1': label_1}
+    
+    def _collection_labels(self, collections: List[str]) -> Tuple[str, str]:
+        """(custom_label_0, custom_label_1), shared by products with the same collections"""
+        return self._collection_labels_cache(tuple(collections))
+    
+    def get_cache_stats(self) -> Dict:
+        """Collection label cache hits/misses (for feed_metrics.json)"""
+        info = self._collection_labels_cache.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'collection_labels': {
+                'hits': info.hits,
+                'misses': info.misses,
+                'hit_rate': round(info.hits / lookups, 4) if lookups else 0.0,
+                'size': info.currsize,
+                'max_size': info.maxsize
+            }
+        }
     
     def _build_title_google(self, product: Dict, variant: Dict) -> str:
         """
@@ -193,62 +159,37 @@ class GoogleMapper(BaseMapper):
         
         return title
     
-    def _get_gender_google(self, metafield_data: Dict) -> str:
-        """Get gender from metafields with fallback"""
-        return metafield_data.get('gender', self.static_values.get('default_gender', 'female'))
-    
-    def _get_age_group_google(self, metafield_data: Dict) -> str:
-        """Get age_group from metafields with fallback"""
-        return metafield_data.get('age_group', self.static_values.get('default_age_group', 'adult'))
-    
-    def _get_color_google(self, metafield_data: Dict) -> str:
-        """Get color from metafields"""
-        return metafield_data.get('color', '')
-    
-    def _get_material_google(self, metafield_data: Dict) -> str:
-        """Get material from metafields"""
-        return metafield_data.get('material', '')
-    
-    def _get_product_details_google(self, product: Dict, variant: Dict, tags: List[str]) -> List[Dict[str, str]]:
+    def _get_product_details_google(self, product: Dict, variant: Dict, tags: List[str],
+                                    context: ProductContext) -> List[Dict[str, str]]:
         """Extract structured product details for Google Shopping"""
         handle = product.get('handle', '')
         sku = variant.get('sku', '')
         
         # Try JSON lookup first
         if handle and sku:
-            key = (handle, sku)
-            if key in self.product_mappings:
-                json_details = self.product_mappings[key].get('product_detail', [])
+            mapping = self.product_mappings.get((handle, sku))
+            if mapping:
+                json_details = mapping.get('product_detail', [])
                 if json_details:
-                    cleaned_details = []
-                    for detail in json_details:
-                        cleaned_details.append({
-                            'attribute_name': detail.get('attribute_name', ''),
-                            'attribute_value': detail.get('attribute_value', '')
-                        })
-                    return cleaned_details
+                    return [{'attribute_name': detail.get('attribute_name', ''),
+                             'attribute_value': detail.get('attribute_value', '')}
+                            for detail in json_details]
         
-        # Fallback: Tag-based extraction
+        # Fallback: Tag-based extraction (computed once per product)
+        return context.memo('tag_product_details', tags, self._get_tag_product_details)
+    
+    def _get_tag_product_details(self, tags: List[str]) -> List[Dict[str, str]]:
+        """product_detail entries from tags (first 3 matching tags, shared dicts: do not mutate)"""
         details = []
-        detail_mapping = {
-            'suola vintage': {'attribute_name': 'Tipo di Suola', 'attribute_value': 'Vintage'},
-            'suola bianca': {'attribute_name': 'Tipo di Suola', 'attribute_value': 'Bianca'},
-            'suola nera': {'attribute_name': 'Tipo di Suola', 'attribute_value': 'Nera'},
-            'platform': {'attribute_name': 'Tipo di Suola', 'attribute_value': 'Platform'},
-            'effetto vintage': {'attribute_name': 'Stile', 'attribute_value': 'Effetto Vintage'},
-            'memory foam': {'attribute_name': 'Comfort', 'attribute_value': 'Memory Foam'},
-            'impermeabile': {'attribute_name': 'Caratteristiche', 'attribute_value': 'Impermeabile'},
-            'traspirante': {'attribute_name': 'Caratteristiche', 'attribute_value': 'Traspirante'}
-        }
-        
         for tag in tags:
-            tag_lower = tag.lower().strip()
-            if tag_lower in detail_mapping:
-                details.append(detail_mapping[tag_lower])
-        
-        return details[:3]
+            detail = TAG_PRODUCT_DETAILS.get(tag.lower().strip())
+            if detail is not None:
+                details.append(detail)
+                if len(details) == MAX_TAG_PRODUCT_DETAILS:
+                    break
+        return details
     
-    def _deduplicate_collections(self, collections: List[str]) -> List[str]:
+    def _deduplicate_collections(self, collections: Tuple[str, ...]) -> List[str]:
         """Remove duplicate collections while preserving order"""
         if not collections:
             return []
@@ -264,7 +205,7 @@ class GoogleMapper(BaseMapper):
         
         return unique
     
-    def _split_collections_across_labels(self, collections: List[str], 
+    def _split_collections_across_labels(self, collections: Tuple[str, ...], 
                                          label_0_limit: int = 100, 
                                          label_1_limit: int = 500) -> tuple:
         """
@@ -320,19 +261,14 @@ class GoogleMapper(BaseMapper):
         
         # Try JSON lookup first
         if handle and sku:
-            key = (handle, sku)
-            if key in self.product_mappings:
-                highlights = self.product_mappings[key].get('product_highlight', [])
+            mapping = self.product_mappings.get((handle, sku))
+            if mapping:
+                highlights = mapping.get('product_highlight', [])
                 if highlights:
                     return ', '.join(highlights)
         
         # Fallback: Generic highlights
-        highlights = []
         brand = product.get('vendor', '')
         if brand:
-            highlights.append(f"{brand} Original")
-        
-        highlights.append("100% Personalizzabili")
-        highlights.append("Fatto a mano in Italia")
-        
-        return ', '.join(highlights)
+            return f"{brand} Original, {GENERIC_HIGHLIGHTS}"
+        return GENERIC_HIGHLIGHTS
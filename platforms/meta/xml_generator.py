@@ -3,11 +3,73 @@ Meta XML Generator - RSS Format with special handling for internal_label
 Based on Google's StreamingXMLGenerator but with Meta-specific features
 """
 
+import os
 import logging
-from typing import Dict, List, Optional, TextIO
+from typing import Dict, Optional
+
+from core.xml_escape import escape_xml
+from core.xml_item_renderer import (
+    compile_item_renderer, REQUIRED, OPTIONAL, LIST, LIST_STRIP, CDATA
+)
+from src.feed_writer import FeedWriter, DEFAULT_BUFFER_SIZE, DEFAULT_BATCH_ITEMS, DEFAULT_GZIP_LEVEL
 
 logger = logging.getLogger(__name__)
 
+# Meta catalog item fields, in output order (see core/xml_item_renderer.py)
+ITEM_SCHEMA = (
+    # ========== REQUIRED FIELDS ==========
+    ('id', REQUIRED),
+    ('title', REQUIRED),
+    ('description', REQUIRED),
+    ('link', REQUIRED),
+    ('image_link', REQUIRED),
+    ('availability', REQUIRED),
+    ('price', REQUIRED),
+    ('brand', REQUIRED),
+    ('condition', REQUIRED),
+    # ========== ADDITIONAL IMAGES ==========
+    ('additional_image_link', LIST),
+    # ========== SALE PRICE (optional) ==========
+    ('sale_price', OPTIONAL),
+    # ========== IDENTIFIERS ==========
+    ('gtin', OPTIONAL),
+    ('mpn', OPTIONAL),
+    # ========== CATEGORIES ==========
+    ('google_product_category', REQUIRED),
+    ('product_type', OPTIONAL),
+    # ========== PRODUCT ATTRIBUTES ==========
+    ('gender', REQUIRED),
+    ('age_group', REQUIRED),
+    ('color', OPTIONAL),
+    ('size', OPTIONAL),
+    ('size_system', OPTIONAL),
+    ('material', OPTIONAL),
+    ('pattern', OPTIONAL),
+    # ========== GROUPING ==========
+    ('item_group_id', OPTIONAL),
+    # ========== SHIPPING ==========
+    ('shipping', OPTIONAL),
+    # ========== STATUS & INVENTORY ==========
+    ('status', OPTIONAL),
+    ('inventory', OPTIONAL),
+    # ========== CUSTOM LABELS ==========
+    ('custom_label_0', OPTIONAL),
+    ('custom_label_1', OPTIONAL),
+    ('custom_label_2', OPTIONAL),
+    ('custom_label_3', OPTIONAL),
+    ('custom_label_4', OPTIONAL),
+    # ========== INTERNAL_LABEL ==========
+    # Meta Excel mapping: "usa un tag <internal_label> per ogni voce"
+    # This means multiple <g:internal_label> tags, one per value
+    ('internal_label', LIST_STRIP),
+    # ========== RICH TEXT DESCRIPTION (HTML in CDATA) ==========
+    ('rich_text_description', CDATA),
+)
+
+# Fields shared by the variants of a product: rendered once, reused by the siblings
+PRODUCT_FIELDS = ('description', 'additional_image_link', 'product_type', 'custom_label_0', 'custom_label_1',
+                  'internal_label', 'rich_text_description')
+
 
 class MetaXMLGenerator:
     """
@@ -17,15 +79,25 @@ class MetaXMLGenerator:
     Special handling: internal_label as multiple XML tags
     """
     
-    def __init__(self, output_file: str):
-        """Initialize Meta XML generator"""
+    def __init__(self, output_file: str, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 batch_items: int = DEFAULT_BATCH_ITEMS, gzip_file: Optional[str] = None,
+                 gzip_level: int = DEFAULT_GZIP_LEVEL):
+        """Initialize Meta XML generator (buffer_size/batch_items/gzip_file/gzip_level: see StreamingXMLGenerator)"""
         self.output_file = output_file
-        self.file: Optional[TextIO] = None
+        self.file: Optional[FeedWriter] = None
+        self.buffer_size = buffer_size
+        self.batch_items = batch_items
+        self.gzip_file = gzip_file
+        self.gzip_level = gzip_level
         self.item_count = 0
+        
+        # Item schema compiled into one render function (one string per item)
+        self._render_item = compile_item_renderer('meta', ITEM_SCHEMA, PRODUCT_FIELDS)
     
     def start_feed(self, title: str, link: str, description: str):
         """Start XML feed and write RSS header"""
-        self.file = open(self.output_file, 'w', encoding='utf-8')
+        self.file = FeedWriter(self.output_file, 'wb', self.buffer_size, self.batch_items,
+                               self.gzip_file, self.gzip_level)
         
         # Write XML declaration and RSS opening
         self.file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
@@ -39,156 +111,83 @@ class MetaXMLGenerator:
         
         logger.info(f"✅ Started Meta XML feed: {self.output_file}")
     
+    def resume_feed(self, byte_offset: int, item_count: int):
+        """
+        Reopen a partially written feed from a checkpoint
+        
+        Everything after byte_offset (items of a product interrupted
+        mid-write) is discarded, then writing continues in append mode.
+        
+        Args:
+            byte_offset: Size of the feed at the last checkpoint
+            item_count: Items already written up to byte_offset
+        """
+        os.truncate(self.output_file, byte_offset)
+        self.file = FeedWriter(self.output_file, 'ab', self.buffer_size, self.batch_items,
+                               self.gzip_file, self.gzip_level)
+        self.item_count = item_count
+        
+        logger.info(f"✅ Resumed Meta XML feed: {self.output_file} ({item_count} items already written)")
+    
+    def start_shard(self):
+        """Open the output for items only (shard merged later with append_shard)"""
+        self.file = FeedWriter(self.output_file, 'wb', self.buffer_size, self.batch_items)
+    
+    def end_shard(self):
+        """Close a shard (no footer)"""
+        if not self.file:
+            raise RuntimeError("Shard not started")
+        
+        self.file.close()
+    
+    def append_shard(self, shard_file: str, item_count: int):
+        """Copy a rendered shard of item_count items into the feed (between start_feed and end_feed)"""
+        if not self.file:
+            raise RuntimeError("Feed not started. Call start_feed() first.")
+        
+        self.file.append_file(shard_file)
+        self.item_count += item_count
+    
+    def checkpoint_offset(self) -> int:
+        """
+        Flush pending output and return the number of bytes written so far
+        
+        Returns:
+            Current byte offset of the feed file
+        """
+        self.file.flush()
+        return self.file.tell()
+    
     def add_item(self, item_data: Dict):
         """
         Add a single item to Meta feed
         
         Special handling for Meta-specific fields:
         - internal_label: Can be a list (generates multiple tags)
-        - rich_text_description: Full HTML allowed
+        - rich_text_description: Full HTML allowed (CDATA)
         """
         if not self.file:
             raise RuntimeError("Feed not started. Call start_feed() first.")
         
-        # Helper to get value with or without g: prefix
-        def get_field(key):
-            return item_data.get(f'g:{key}') or item_data.get(key)
-        
-        self.file.write('    <item>\n')
-        
-        # ========== REQUIRED FIELDS ==========
-        self._write_field('g:id', get_field('id'))
-        self._write_field('g:title', get_field('title'))
-        self._write_field('g:description', get_field('description'))
-        self._write_field('g:link', get_field('link'))
-        self._write_field('g:image_link', get_field('image_link'))
-        self._write_field('g:availability', get_field('availability'))
-        self._write_field('g:price', get_field('price'))
-        self._write_field('g:brand', get_field('brand'))
-        self._write_field('g:condition', get_field('condition'))
-        
-        # ========== ADDITIONAL IMAGES ==========
-        additional_images = get_field('additional_image_link')
-        if additional_images:
-            if isinstance(additional_images, list):
-                # Write each image as separate tag
-                for img_url in additional_images:
-                    self._write_field('g:additional_image_link', img_url)
-            else:
-                # Single value or comma-separated
-                self._write_field('g:additional_image_link', additional_images)
-        
-        # ========== SALE PRICE (optional) ==========
-        if get_field('sale_price'):
-            self._write_field('g:sale_price', get_field('sale_price'))
-        
-        # ========== IDENTIFIERS ==========
-        if get_field('gtin'):
-            self._write_field('g:gtin', get_field('gtin'))
-        
-        if get_field('mpn'):
-            self._write_field('g:mpn', get_field('mpn'))
-        
-        # ========== CATEGORIES ==========
-        self._write_field('g:google_product_category', get_field('google_product_category'))
-        
-        if get_field('product_type'):
-            self._write_field('g:product_type', get_field('product_type'))
-        
-        # ========== PRODUCT ATTRIBUTES ==========
-        self._write_field('g:gender', get_field('gender'))
-        self._write_field('g:age_group', get_field('age_group'))
-        
-        if get_field('color'):
-            self._write_field('g:color', get_field('color'))
-        
-        if get_field('size'):
-            self._write_field('g:size', get_field('size'))
-        
-        if get_field('size_system'):
-            self._write_field('g:size_system', get_field('size_system'))
-        
-        if get_field('material'):
-            self._write_field('g:material', get_field('material'))
-        
-        if get_field('pattern'):
-            self._write_field('g:pattern', get_field('pattern'))
-        
-        # ========== GROUPING ==========
-        if get_field('item_group_id'):
-            self._write_field('g:item_group_id', get_field('item_group_id'))
-        
-        # ========== SHIPPING ==========
-        if get_field('shipping'):
-            self._write_field('g:shipping', get_field('shipping'))
-        
-        # ========== STATUS & INVENTORY ==========
-        if get_field('status'):
-            self._write_field('g:status', get_field('status'))
-        
-        if get_field('inventory'):
-            self._write_field('g:inventory', get_field('inventory'))
-        
-        # ========== CUSTOM LABELS ==========
-        if get_field('custom_label_0'):
-            self._write_field('g:custom_label_0', get_field('custom_label_0'))
-        
-        if get_field('custom_label_1'):
-            self._write_field('g:custom_label_1', get_field('custom_label_1'))
-        
-        if get_field('custom_label_2'):
-            self._write_field('g:custom_label_2', get_field('custom_label_2'))
-        
-        if get_field('custom_label_3'):
-            self._write_field('g:custom_label_3', get_field('custom_label_3'))
-        
-        if get_field('custom_label_4'):
-            self._write_field('g:custom_label_4', get_field('custom_label_4'))
-        
-        # ========== INTERNAL_LABEL (SPECIAL HANDLING) ==========
-        # Meta Excel mapping: "usa un tag <internal_label> per ogni voce"
-        # This means multiple <g:internal_label> tags, one per value
-        internal_labels = get_field('internal_label')
-        if internal_labels:
-            if isinstance(internal_labels, list):
-                # Write one tag per label
-                for label in internal_labels:
-                    if label.strip():
-                        self._write_field('g:internal_label', label.strip())
-            else:
-                # Single value
-                self._write_field('g:internal_label', internal_labels)
-        
-        # ========== RICH TEXT DESCRIPTION ==========
-        if get_field('rich_text_description'):
-            # For HTML content, use CDATA
-            self._write_field_cdata('g:rich_text_description', get_field('rich_text_description'))
-        
-        self.file.write('    </item>\n')
+        self.file.write(self._render_item(item_data))
         self.item_count += 1
     
-    def _write_field(self, name: str, value: Optional[str]):
-        """Write a single XML field"""
-        if value is not None and str(value).strip():
-            escaped_value = self._escape(str(value))
-            self.file.write(f'      <{name}>{escaped_value}</{name}>\n')
-    
-    def _write_field_cdata(self, name: str, value: Optional[str]):
-        """Write a field with CDATA section (for HTML content)"""
-        if value is not None and str(value).strip():
-            self.file.write(f'      <{name}><![CDATA[{value}]]></{name}>\n')
+    def add_raw_item(self, item_xml: str):
+        """
+        Copy an already rendered <item> block (incremental feed updates)
+        
+        Args:
+            item_xml: Complete '    <item>...</item>' block including newlines
+        """
+        if not self.file:
+            raise RuntimeError("Feed not started. Call start_feed() first.")
+        
+        self.file.write(item_xml)
+        self.item_count += 1
     
     def _escape(self, text: str) -> str:
         """Escape XML special characters"""
-        if not text:
-            return ""
-        
-        return (text
-                .replace('&', '&amp;')
-                .replace('<', '&lt;')
-                .replace('>', '&gt;')
-                .replace('"', '&quot;')
-                .replace("'", '&apos;'))
+        return escape_xml(text)
     
     def end_feed(self):
         """Close the XML feed"""
@@ -200,3 +199,13 @@ class MetaXMLGenerator:
         self.file.close()
         
         logger.info(f"✅ Closed Meta XML feed with {self.item_count} items")
+        stats = self.compression_stats()
+        if stats and stats['success']:
+            logger.info(f"✅ Gzip copy: {stats['output_bytes'] / (1024 * 1024):.2f} MB "
+                        f"({stats['ratio']}x, {stats['cpu_seconds']:.2f}s CPU)")
+    
+    def compression_stats(self) -> Optional[Dict]:
+        """Gzip copy stats (see GzipCompressor.get_stats; None without gzip_file, final after end_feed)"""
+        if not self.file or not self.file.gzip:
+            return None
+        return self.file.gzip.get_stats()
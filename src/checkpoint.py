@@ -0,0 +1,173 @@
+"""
+Feed Checkpoint - Persist progress of a long feed run
+Allows a restarted run to resume instead of starting over
+
+A checkpoint is written only at product boundaries, so the XML file
+up to byte_offset contains exactly the items of all products with
+id <= last_product_id. On resume the file is truncated back to that
+offset and generation continues with the next product id.
+
+The checkpoint also stores a digest of the bytes just before each
+offset: a file rewritten since (e.g. republished by a webhook patch)
+fails the check and the checkpoint is ignored instead of truncating
+the new file mid-<item>.
+"""
+
+import hashlib
+import json
+import os
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 2
+
+# Bytes before each checkpoint offset covered by the stored digest
+TAIL_DIGEST_BYTES = 64 * 1024
+
+
+def tail_digest(path: Path, offset: int) -> str:
+    """MD5 of the TAIL_DIGEST_BYTES bytes of a file ending at offset"""
+    start = max(0, offset - TAIL_DIGEST_BYTES)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return hashlib.md5(f.read(offset - start)).hexdigest()
+
+
+class FeedCheckpoint:
+    """
+    Checkpoint file for a single platform feed
+
+    Stored as JSON in <output_dir>/.checkpoints/<platform>.json and
+    written atomically (temp file + rename).
+    """
+
+    def __init__(self, checkpoint_dir: Path, platform_name: str, data_source: str, output_file: Path,
+                 max_age_hours: float = 12):
+        """
+        Initialize checkpoint
+
+        Args:
+            checkpoint_dir: Directory holding checkpoint files
+            platform_name: 'google' or 'meta'
+            data_source: 'mysql' or 'shopify_api' (a checkpoint never crosses sources)
+            output_file: Path of the XML feed being generated
+            max_age_hours: Older checkpoints are ignored (catalog may have changed)
+        """
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.platform_name = platform_name
+        self.data_source = data_source
+        self.output_file = Path(output_file)
+        self.max_age_hours = max_age_hours
+        self.path = self.checkpoint_dir / f'{platform_name}.json'
+
+    def load(self) -> Optional[Dict]:
+        """
+        Load a resumable checkpoint
+
+        Returns:
+            Checkpoint dict, or None if missing or not compatible with this run
+        """
+        if not self.path.exists():
+            return None
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read checkpoint {self.path}: {e}")
+            return None
+
+        if (data.get('version') != CHECKPOINT_VERSION
+                or data.get('data_source') != self.data_source
+                or data.get('feed_filename') != self.output_file.name):
+            logger.warning(f"Ignoring incompatible checkpoint for {self.platform_name}")
+            return None
+
+        try:
+            saved_at = datetime.fromisoformat(data['saved_at'])
+            age_hours = (datetime.now(timezone.utc) - saved_at).total_seconds() / 3600
+        except (KeyError, ValueError):
+            age_hours = float('inf')
+
+        if age_hours > self.max_age_hours:
+            logger.warning(f"Ignoring stale checkpoint for {self.platform_name} ({age_hours:.1f}h old)")
+            return None
+
+        # The partial feed (and each format file) must still be the one written up to the checkpoint
+        digests = data.get('tail_digests', {})
+        offsets = {self.output_file.name: data.get('byte_offset', 0), **data.get('format_offsets', {})}
+        for filename, offset in offsets.items():
+            if not self._partial_file_matches(self.output_file.with_name(filename), offset, digests.get(filename)):
+                logger.warning(f"Ignoring checkpoint for {self.platform_name}: partial {filename} "
+                               f"missing, truncated or rewritten")
+                return None
+
+        return data
+
+    def _partial_file_matches(self, path: Path, offset: int, digest: Optional[str]) -> bool:
+        """True if path is at least offset bytes long and ends, at offset, with the saved bytes"""
+        try:
+            return path.stat().st_size >= offset and tail_digest(path, offset) == digest
+        except OSError:
+            return False
+
+    def save(self, last_product_id: int, total_products: int, total_items: int, byte_offset: int,
+             format_offsets: Optional[Dict[str, int]] = None):
+        """
+        Save progress (call only after the last product has been fully written)
+
+        Args:
+            last_product_id: Id of the last fully written product
+            total_products: Products processed so far
+            total_items: Items written so far
+            byte_offset: Size in bytes of the XML written so far
+            format_offsets: Size in bytes of the other format files (by file name,
+                            next to the XML) written so far
+        """
+        format_offsets = format_offsets or {}
+        try:
+            offsets = {self.output_file.name: byte_offset, **format_offsets}
+            digests = {filename: tail_digest(self.output_file.with_name(filename), offset)
+                       for filename, offset in offsets.items()}
+        except OSError as e:
+            logger.warning(f"Could not save checkpoint: {e}")
+            return
+
+        data = {
+            'version': CHECKPOINT_VERSION,
+            'platform': self.platform_name,
+            'data_source': self.data_source,
+            'feed_filename': self.output_file.name,
+            'last_product_id': last_product_id,
+            'total_products': total_products,
+            'total_items': total_items,
+            'byte_offset': byte_offset,
+            'format_offsets': format_offsets,
+            'tail_digests': digests,
+            'saved_at': datetime.now(timezone.utc).isoformat()
+        }
+
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not save checkpoint: {e}")
+
+    def exists(self) -> bool:
+        """True if an interrupted run left a checkpoint (its feed is partial)"""
+        return self.path.exists()
+
+    def clear(self):
+        """Remove checkpoint after a completed run"""
+        try:
+            self.path.unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"Could not remove checkpoint: {e}")
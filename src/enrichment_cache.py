@@ -0,0 +1,171 @@
+"""
+Enrichment Cache - Persistent cache for Shopify metafields and collections
+Avoids re-fetching per-product enrichment data across runs
+
+Entries are keyed by product id and validated against the product's
+updated_at: if Shopify reports the same updated_at as when the entry
+was stored, metafields and collections are served from the cache and
+no API call is made. Entries also expire after a TTL (custom collection
+membership can change without touching updated_at) and the table is
+bounded with LRU eviction.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class EnrichmentCache:
+    """
+    SQLite-backed cache of (metafields, collections) per product
+
+    Safe to share between threads (single connection guarded by a lock).
+    """
+
+    def __init__(self, db_path: str, ttl_hours: float = 168, max_entries: int = 20000,
+                 commit_every: int = 100):
+        """
+        Initialize cache
+
+        Args:
+            db_path: SQLite file path (parent directory is created)
+            ttl_hours: Entries older than this are refetched (default: 7 days)
+            max_entries: Max cached products, least recently used are evicted
+            commit_every: Commit after this many writes (and on close)
+        """
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.commit_every = commit_every
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evicted = 0
+        self._pending_writes = 0
+
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS enrichment (
+                product_id TEXT PRIMARY KEY,
+                updated_at TEXT NOT NULL,
+                metafields TEXT NOT NULL,
+                collections TEXT NOT NULL,
+                cached_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_enrichment_last_access ON enrichment(last_access)")
+        self._conn.commit()
+
+    def get(self, product_id: str, updated_at: str) -> Optional[Tuple[Dict, List[str]]]:
+        """
+        Look up enrichment data for a product
+
+        Args:
+            product_id: Shopify product id
+            updated_at: Product updated_at from the listing
+
+        Returns:
+            (metafields, collections) or None on miss/stale entry
+        """
+        if not updated_at:
+            self.misses += 1
+            return None
+
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at, metafields, collections, cached_at FROM enrichment WHERE product_id = ?",
+                (str(product_id),)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            cached_updated_at, metafields, collections, cached_at = row
+            if cached_updated_at != updated_at or now - cached_at > self.ttl_seconds:
+                self.stale += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE enrichment SET last_access = ? WHERE product_id = ?",
+                (now, str(product_id))
+            )
+            self._after_write()
+            self.hits += 1
+
+        return json.loads(metafields), json.loads(collections)
+
+    def put(self, product_id: str, updated_at: str, metafields: Dict, collections: List[str]):
+        """
+        Store enrichment data for a product
+
+        Args:
+            product_id: Shopify product id
+            updated_at: Product updated_at the data refers to
+            metafields: Metafields organized by namespace
+            collections: Collection titles
+        """
+        if not updated_at:
+            return
+
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO enrichment VALUES (?, ?, ?, ?, ?, ?)",
+                (str(product_id), updated_at, json.dumps(metafields), json.dumps(collections), now, now)
+            )
+            self._after_write()
+
+    def _after_write(self):
+        """Batch commits and evict LRU entries (lock must be held)"""
+        self._pending_writes += 1
+        if self._pending_writes < self.commit_every:
+            return
+
+        self._evict()
+        self._conn.commit()
+        self._pending_writes = 0
+
+    def _evict(self):
+        """Delete least recently used entries above max_entries (lock must be held)"""
+        count = self._conn.execute("SELECT COUNT(*) FROM enrichment").fetchone()[0]
+        excess = count - self.max_entries
+
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM enrichment WHERE product_id IN "
+                "(SELECT product_id FROM enrichment ORDER BY last_access LIMIT ?)",
+                (excess,)
+            )
+            self.evicted += excess
+
+    def get_stats(self) -> Dict:
+        """Cache statistics (for feed_metrics.json)"""
+        lookups = self.hits + self.misses + self.stale
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'evicted': self.evicted,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+    def close(self):
+        """Commit pending writes and close the database"""
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,463 @@
+"""
+Feed Formats - CSV/TSV and JSON Lines outputs from the same item stream
+
+The XML feed stays the reference output (served, checkpointed, patched
+by webhooks); the formats listed in platforms.json ("formats") are
+written alongside it in the same pass, from the same mapped items:
+
+    csv    Header row + one row per item (Meta catalog CSV)
+    tsv    Same, tab separated; tabs and line breaks in values become
+           spaces (Google Shopping text feeds)
+    jsonl  One JSON object per line, empty fields omitted
+
+Columns/keys are the platform ITEM_SCHEMA fields in XML order, without
+the g: prefix, and a value is empty exactly when the XML omits the tag.
+List fields (additional_image_link, internal_label, ...) are one cell
+joined with ',' in CSV/TSV and arrays in JSONL. Meta internal_label is
+['a','b'] as in the Meta catalog template: \\, ' and line breaks in an
+entry are backslash-escaped (['b\\'s']), so the cell is an unambiguous
+list literal. product_detail is 'name:value' pairs joined with ',' in
+CSV/TSV and a list of {attribute_name, attribute_value} objects in JSONL.
+
+MultiFormatFeed fans the items out: the XML generator renders them,
+the values are normalized once for all the other writers.
+"""
+
+import csv
+import json
+import os
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.xml_item_renderer import REQUIRED, OPTIONAL, DEFAULT, LIST_SPLIT, LIST, LIST_STRIP, DETAILS, CDATA
+from platforms.meta.xml_generator import ITEM_SCHEMA as META_ITEM_SCHEMA
+from src.feed_writer import FeedWriter, DEFAULT_BUFFER_SIZE, DEFAULT_BATCH_ITEMS
+from src.xml_generator import ITEM_SCHEMA as GOOGLE_ITEM_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+FORMAT_XML = 'xml'
+FORMAT_CSV = 'csv'
+FORMAT_TSV = 'tsv'
+FORMAT_JSONL = 'jsonl'
+
+FORMAT_EXTENSIONS = {FORMAT_XML: '.xml', FORMAT_CSV: '.csv', FORMAT_TSV: '.tsv', FORMAT_JSONL: '.jsonl'}
+
+# List encodings in CSV/TSV cells
+LIST_JOINED = 'joined'          # a,b
+LIST_BRACKETED = 'bracketed'    # ['a','b']
+
+# Per platform: item schema and CSV/TSV list encoding overrides
+PLATFORM_SCHEMAS = {
+    'google': (GOOGLE_ITEM_SCHEMA, {}),
+    'meta': (META_ITEM_SCHEMA, {'internal_label': LIST_BRACKETED}),
+}
+
+_LIST_KINDS = (LIST_SPLIT, LIST, LIST_STRIP)
+
+# Escapes inside a bracketed list entry ('\\' first)
+_BRACKETED_ESCAPES = (('\\', '\\\\'), ("'", "\\'"), ('\n', '\\n'), ('\r', '\\r'))
+
+
+def _bracketed_entry(entry: str) -> str:
+    """Quoted list entry: b's → 'b\\'s'"""
+    if '\\' in entry or "'" in entry or '\n' in entry or '\r' in entry:
+        for char, escaped in _BRACKETED_ESCAPES:
+            entry = entry.replace(char, escaped)
+    return f"'{entry}'"
+
+
+def format_path(output_file, format_name: str) -> Path:
+    """Path of a format next to the XML feed (google_shopping_feed.xml → google_shopping_feed.csv)"""
+    return Path(output_file).with_suffix(FORMAT_EXTENSIONS[format_name])
+
+
+def extra_formats(formats: Optional[List[str]]) -> List[str]:
+    """
+    Validate a platform "formats" setting
+
+    Returns:
+        The non-XML formats, in order (XML is always written)
+
+    Raises:
+        ValueError: Unknown format
+    """
+    formats = formats or [FORMAT_XML]
+    unknown = [name for name in formats if name not in FORMAT_EXTENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown feed formats: {', '.join(unknown)}")
+    if FORMAT_XML not in formats:
+        logger.warning("⚠️ 'xml' missing from formats: the XML feed is always generated")
+    return [name for name in dict.fromkeys(formats) if name != FORMAT_XML]
+
+
+class ItemValues:
+    """Schema-driven field values of an item (same emptiness rules as the XML renderer)"""
+
+    def __init__(self, schema: Tuple[Tuple, ...]):
+        # (key, 'g:key', kind, default)
+        self.fields = [(entry[0], f'g:{entry[0]}', entry[1], entry[2] if len(entry) == 3 else None)
+                       for entry in schema]
+        self.keys = [entry[0] for entry in schema]
+        self.detail_keys = [entry[0] for entry in schema if entry[1] == DETAILS]
+
+    def __call__(self, item: Dict) -> Dict:
+        """
+        Normalize an item
+
+        Returns:
+            key → str, list of str (list fields) or list of (name, value)
+            (product_detail); fields the XML would omit are left out
+        """
+        get = item.get
+        values = {}
+        for key, prefixed, kind, default in self.fields:
+            value = get(prefixed) or get(key)
+            if kind == DEFAULT:
+                value = value or default
+
+            if kind in (REQUIRED, DEFAULT):
+                if value is not None and str(value).strip():
+                    values[key] = str(value)
+            elif kind in (OPTIONAL, CDATA):
+                if value and str(value).strip():
+                    values[key] = str(value)
+            elif kind in _LIST_KINDS:
+                if not value:
+                    continue
+                if isinstance(value, list):
+                    if kind == LIST:
+                        entries = [str(entry) for entry in value if entry is not None and str(entry).strip()]
+                    else:
+                        entries = [entry.strip() for entry in value if entry and entry.strip()]
+                elif kind == LIST_SPLIT:
+                    entries = [entry.strip() for entry in str(value).split(',') if entry.strip()]
+                else:
+                    entries = [str(value)] if str(value).strip() else []
+                if entries:
+                    values[key] = entries
+            elif kind == DETAILS:
+                if value and isinstance(value, list):
+                    details = [(detail.get('attribute_name', ''), detail.get('attribute_value', ''))
+                               for detail in value]
+                    details = [(name, detail_value) for name, detail_value in details if name and detail_value]
+                    if details:
+                        values[key] = details
+        return values
+
+
+class _TextFeedWriter(ABC):
+    """Common FeedWriter handling of the text formats (same lifecycle as the XML generators)"""
+
+    format_name = ''
+
+    def __init__(self, output_file: str, schema: Tuple[Tuple, ...], list_formats: Optional[Dict[str, str]] = None,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE, batch_items: int = DEFAULT_BATCH_ITEMS):
+        """
+        Initialize writer
+
+        Args:
+            output_file: Output path
+            schema: Platform ITEM_SCHEMA (columns and value rules)
+            list_formats: CSV/TSV list encoding per field (default LIST_JOINED)
+            buffer_size: Output buffer in bytes
+            batch_items: Items joined and encoded per write
+        """
+        self.output_file = output_file
+        self.values = ItemValues(schema)
+        self.list_formats = list_formats or {}
+        self.buffer_size = buffer_size
+        self.batch_items = batch_items
+        self.file: Optional[FeedWriter] = None
+        self.item_count = 0
+
+    def start_feed(self, title: str, link: str, description: str):
+        """Start a new file (channel title/link/description are XML only)"""
+        self._open('wb')
+        self._write_header()
+        logger.info(f"✅ Started {self.format_name.upper()} feed: {self.output_file}")
+
+    def resume_feed(self, byte_offset: int, item_count: int):
+        """Truncate to a checkpoint offset and continue in append mode"""
+        os.truncate(self.output_file, byte_offset)
+        self._open('ab')
+        self.item_count = item_count
+
+    def checkpoint_offset(self) -> int:
+        """Flush pending output and return the bytes written so far"""
+        self.file.flush()
+        return self.file.tell()
+
+    def start_shard(self):
+        """Open the output for items only (no header)"""
+        self._open('wb')
+
+    def end_shard(self):
+        """Close a shard"""
+        self.file.close()
+
+    def append_shard(self, shard_file: str, item_count: int):
+        """Copy a rendered shard into the feed"""
+        self.file.append_file(shard_file)
+        self.item_count += item_count
+
+    def add_item(self, item_data: Dict):
+        """Add an item (mapper output)"""
+        self.add_values(self.values(item_data))
+
+    def end_feed(self):
+        """Close the file"""
+        if not self.file:
+            raise RuntimeError("Feed not started")
+        self.file.close()
+        logger.info(f"✅ Closed {self.format_name.upper()} feed with {self.item_count} items")
+
+    def _open(self, mode: str):
+        self.file = FeedWriter(self.output_file, mode, self.buffer_size, self.batch_items)
+
+    def _write_header(self):
+        """Header written by start_feed (none by default)"""
+
+    # ========== ABSTRACT METHODS (must be implemented by subclasses) ==========
+
+    @abstractmethod
+    def add_values(self, values: Dict):
+        """Write one item from ItemValues output (the dict may be modified) and count it"""
+        pass
+
+    @abstractmethod
+    def add_raw_item(self, raw_item):
+        """Write back one item as yielded by iter_raw_items (webhook patches) and count it"""
+        pass
+
+    @abstractmethod
+    def iter_raw_items(self, feed_path) -> Iterator[Tuple[object, str]]:
+        """Stream the items of a generated file as (raw_item, item_group_id), in file order"""
+        pass
+
+
+class DelimitedFeedWriter(_TextFeedWriter):
+    """CSV / TSV feed (csv module quoting, '\\n' line endings)"""
+
+    def __init__(self, output_file: str, schema: Tuple[Tuple, ...], list_formats: Optional[Dict[str, str]] = None,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE, batch_items: int = DEFAULT_BATCH_ITEMS,
+                 delimiter: str = ','):
+        """Initialize writer (delimiter ',' = CSV, '\\t' = TSV; other args: see _TextFeedWriter)"""
+        super().__init__(output_file, schema, list_formats, buffer_size, batch_items)
+        self.delimiter = delimiter
+        self.format_name = FORMAT_TSV if delimiter == '\t' else FORMAT_CSV
+        self._writerow = None
+
+    def _open(self, mode: str):
+        super()._open(mode)
+        # FeedWriter.write takes the row text: rows are batched like XML items
+        self._writerow = csv.writer(self.file, delimiter=self.delimiter, lineterminator='\n').writerow
+
+    def _write_header(self):
+        self._writerow(self.values.keys)
+
+    def _cell(self, key: str, value) -> str:
+        """Value → cell text"""
+        if isinstance(value, list):
+            if key in self.values.detail_keys:
+                value = ','.join(f'{name}:{detail_value}' for name, detail_value in value)
+            elif self.list_formats.get(key) == LIST_BRACKETED:
+                value = '[' + ','.join(_bracketed_entry(entry) for entry in value) + ']'
+            else:
+                value = ','.join(value)
+        if self.delimiter == '\t' and ('\t' in value or '\n' in value or '\r' in value):
+            value = value.replace('\r\n', ' ').replace('\t', ' ').replace('\n', ' ').replace('\r', ' ')
+        return value
+
+    def add_values(self, values: Dict):
+        """Add an item from ItemValues output"""
+        get = values.get
+        self._writerow([self._cell(key, value) if (value := get(key)) is not None else ''
+                        for key in self.values.keys])
+        self.item_count += 1
+
+    def add_raw_item(self, raw_item: List[str]):
+        """Copy a row read by iter_raw_items (written back with the same quoting)"""
+        self._writerow(raw_item)
+        self.item_count += 1
+
+    def iter_raw_items(self, feed_path) -> Iterator[Tuple[List[str], str]]:
+        """
+        Stream the rows of a generated feed
+
+        Yields:
+            (row, item_group_id) for each item, in file order
+        """
+        with open(feed_path, 'r', encoding='utf-8', newline='') as f:
+            rows = csv.reader(f, delimiter=self.delimiter)
+            header = next(rows, None)
+            if header is None:
+                return
+            group_column = header.index('item_group_id') if 'item_group_id' in header else None
+            for row in rows:
+                yield row, row[group_column] if group_column is not None and group_column < len(row) else ''
+
+
+class JsonLinesFeedWriter(_TextFeedWriter):
+    """JSON Lines feed (one compact object per item, UTF-8)"""
+
+    format_name = FORMAT_JSONL
+
+    def add_values(self, values: Dict):
+        """Add an item from ItemValues output"""
+        for key in self.values.detail_keys:
+            if key in values:
+                values[key] = [{'attribute_name': name, 'attribute_value': detail_value}
+                               for name, detail_value in values[key]]
+        self.file.write(json.dumps(values, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.item_count += 1
+
+    def add_raw_item(self, raw_item: str):
+        """Copy a line read by iter_raw_items"""
+        self.file.write(raw_item)
+        self.item_count += 1
+
+    def iter_raw_items(self, feed_path) -> Iterator[Tuple[str, str]]:
+        """
+        Stream the lines of a generated feed
+
+        Yields:
+            (line, item_group_id) for each item, in file order
+        """
+        with open(feed_path, 'r', encoding='utf-8', newline='\n') as f:
+            for line in f:
+                if line.strip():
+                    yield line, str(json.loads(line).get('item_group_id', ''))
+
+
+def create_format_writer(platform_name: str, format_name: str, output_file: str,
+                         buffer_size: int = DEFAULT_BUFFER_SIZE, batch_items: int = DEFAULT_BATCH_ITEMS):
+    """
+    Get the writer of a non-XML format for a platform
+
+    Raises:
+        ValueError: Unknown platform or format
+    """
+    if platform_name not in PLATFORM_SCHEMAS:
+        raise ValueError(f"Unknown platform: {platform_name}")
+    schema, list_formats = PLATFORM_SCHEMAS[platform_name]
+
+    if format_name == FORMAT_CSV:
+        return DelimitedFeedWriter(output_file, schema, list_formats, buffer_size, batch_items, ',')
+    elif format_name == FORMAT_TSV:
+        return DelimitedFeedWriter(output_file, schema, list_formats, buffer_size, batch_items, '\t')
+    elif format_name == FORMAT_JSONL:
+        return JsonLinesFeedWriter(output_file, schema, list_formats, buffer_size, batch_items)
+    else:
+        raise ValueError(f"Unknown feed format: {format_name}")
+
+
+class MultiFormatFeed:
+    """
+    XML generator plus extra format writers, driven as one generator
+
+    Exposes the XML generator interface used by the orchestrator; offsets
+    and item counts refer to the XML, format_offsets() adds the others.
+    """
+
+    def __init__(self, xml_generator, writers: Dict[str, _TextFeedWriter]):
+        """
+        Args:
+            xml_generator: StreamingXMLGenerator / MetaXMLGenerator
+            writers: format name → writer (may be empty)
+        """
+        self.xml_generator = xml_generator
+        self.writers = writers
+        self.output_file = xml_generator.output_file
+        # All text writers of a platform share its schema: normalize once per item
+        self._values = next(iter(writers.values())).values if writers else None
+
+    @property
+    def item_count(self) -> int:
+        return self.xml_generator.item_count
+
+    def start_feed(self, title: str, link: str, description: str):
+        self.xml_generator.start_feed(title, link, description)
+        for writer in self.writers.values():
+            writer.start_feed(title, link, description)
+
+    def resume_offsets_match(self, format_offsets: Optional[Dict[str, int]]) -> bool:
+        """True if a checkpoint has an offset for every extra format file (and nothing else)"""
+        return set(format_offsets or {}) == {Path(writer.output_file).name for writer in self.writers.values()}
+
+    def resume_feed(self, byte_offset: int, item_count: int, format_offsets: Optional[Dict[str, int]] = None):
+        """Resume the XML at byte_offset and each format at its checkpoint offset (see format_offsets)"""
+        self.xml_generator.resume_feed(byte_offset, item_count)
+        for writer in self.writers.values():
+            writer.resume_feed(format_offsets[Path(writer.output_file).name], item_count)
+
+    def checkpoint_offset(self) -> int:
+        """XML offset (all outputs are flushed)"""
+        for writer in self.writers.values():
+            writer.file.flush()
+        return self.xml_generator.checkpoint_offset()
+
+    def format_offsets(self) -> Dict[str, int]:
+        """Checkpoint offsets of the extra format files, by file name"""
+        return {Path(writer.output_file).name: writer.checkpoint_offset() for writer in self.writers.values()}
+
+    def add_item(self, item_data: Dict):
+        self.xml_generator.add_item(item_data)
+        if self._values:
+            values = self._values(item_data)
+            for writer in self.writers.values():
+                writer.add_values(dict(values))
+
+    def add_raw_items(self, raw_items: List):
+        """Copy one already written item per output: the XML block first, then each format in order"""
+        self.xml_generator.add_raw_item(raw_items[0])
+        for writer, raw_item in zip(self.writers.values(), raw_items[1:]):
+            writer.add_raw_item(raw_item)
+
+    def start_shard(self):
+        self.xml_generator.start_shard()
+        for writer in self.writers.values():
+            writer.start_shard()
+
+    def end_shard(self):
+        self.xml_generator.end_shard()
+        for writer in self.writers.values():
+            writer.end_shard()
+
+    def append_shard(self, shard_file: str, item_count: int):
+        """Append the XML shard and the format shards next to it (same name, format extension)"""
+        self.xml_generator.append_shard(shard_file, item_count)
+        for format_name, writer in self.writers.items():
+            writer.append_shard(str(format_path(shard_file, format_name)), item_count)
+
+    def end_feed(self):
+        self.xml_generator.end_feed()
+        for writer in self.writers.values():
+            writer.end_feed()
+
+    def compression_stats(self) -> Optional[Dict]:
+        """Gzip copy stats of the XML"""
+        return self.xml_generator.compression_stats()
+
+    def output_files(self) -> List[str]:
+        """XML path, its gzip copy (if written), then the format paths"""
+        files = [self.xml_generator.output_file]
+        stats = self.compression_stats()
+        if stats and stats['success']:
+            files.append(self.xml_generator.gzip_file)
+        return files + [writer.output_file for writer in self.writers.values()]
+
+    def discard(self):
+        """Close the outputs of a failed run without finishing them and delete every file it wrote"""
+        for feed_writer in [self.xml_generator.file] + [writer.file for writer in self.writers.values()]:
+            if feed_writer and not feed_writer.closed:
+                try:
+                    feed_writer.close()
+                except OSError as e:
+                    logger.warning(f"Could not close {self.output_file}: {e}")
+        paths = [self.xml_generator.output_file, self.xml_generator.gzip_file]
+        for path in paths + [writer.output_file for writer in self.writers.values()]:
+            if path:
+                Path(path).unlink(missing_ok=True)
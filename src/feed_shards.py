@@ -0,0 +1,215 @@
+"""
+Feed Shards - Parallel rendering of a platform feed in product id ranges
+
+Products (loaded in memory, ordered by id) are split into K contiguous
+id ranges with about the same number of variants. Each range is
+rendered by a worker process into a shard file holding only <item>
+blocks (no header or footer). The shards are then copied, in range
+order, between a single header and footer with kernel-side copies
+(os.copy_file_range / os.sendfile, see FeedWriter.append_file).
+
+Shard order and the product order inside a shard are those of the
+input, so the merged feed is byte-for-byte the sequential one. A shard
+that fails (exception or crashed worker) is rendered again on its own;
+the other shards are kept.
+
+Each shard builds its own mapper, product contexts and compiled render
+functions (nothing is shared with the parent but the task), so product
+contexts are not reused across platforms as in the sequential run.
+"""
+
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Tuple
+
+from core.product_context import ContextStats, ProductContext
+from platforms.google.mapper import GoogleMapper
+from platforms.meta.mapper import MetaMapper
+from platforms.meta.xml_generator import MetaXMLGenerator
+from src.config_loader import ConfigLoader
+from src.feed_formats import MultiFormatFeed, create_format_writer, format_path
+from src.xml_generator import StreamingXMLGenerator
+
+logger = logging.getLogger(__name__)
+
+MAPPERS = {'google': GoogleMapper, 'meta': MetaMapper}
+XML_GENERATORS = {'google': StreamingXMLGenerator, 'meta': MetaXMLGenerator}
+
+# Default attempts per shard (first run + retries)
+DEFAULT_SHARD_ATTEMPTS = 3
+
+
+def preloaded_variant_metafields(product: Dict, variant_id: int) -> Dict:
+    """Variant metafields pre-loaded in product['_variant_metafields'] (MySQL records)"""
+    return product.get('_variant_metafields', {}).get(variant_id, {})
+
+
+def transform_mysql_product(mapper, product: Dict, context: ProductContext,
+                            get_variant_metafields: Callable[[Dict, int], Dict]) -> List[Dict]:
+    """
+    Transform a MySQL product into platform items (one mapper call per variant)
+
+    Args:
+        mapper: Platform mapper
+        product: Product record with variants
+        context: Product context (shared by its variants)
+        get_variant_metafields: (product, variant_id) → variant metafields
+
+    Returns:
+        List of platform items
+    """
+    items = []
+
+    # Get collections (already in product dict)
+    collections = product.get('collections', [])
+
+    # For each variant, get its specific metafields
+    for variant in product.get('variants', []):
+        metafields = get_variant_metafields(product, variant['id'])
+
+        # Create a single-variant product for transformation
+        single_variant_product = product.copy()
+        single_variant_product['variants'] = [variant]
+
+        # Transform using platform mapper
+        items.extend(mapper.transform_product(single_variant_product, metafields, collections, context))
+
+    return items
+
+
+def plan_shards(products: List[Dict], num_shards: int) -> List[Tuple[int, int]]:
+    """
+    Split products into contiguous ranges with about the same number of variants
+
+    Args:
+        products: Products ordered by id
+        num_shards: Wanted number of shards (fewer if there are fewer products)
+
+    Returns:
+        (start, end) slices of products, in order, covering all of them
+    """
+    if not products:
+        return []
+
+    num_shards = max(1, min(num_shards, len(products)))
+    weights = [max(1, len(product.get('variants', []))) for product in products]
+    total = sum(weights)
+
+    shards = []
+    start = 0
+    cumulative = 0
+    for index, weight in enumerate(weights):
+        cumulative += weight
+        # Close the shard once it reaches its share of the variants (leave one product per remaining shard)
+        remaining_shards = num_shards - len(shards) - 1
+        if (remaining_shards > 0 and cumulative * num_shards >= total * (len(shards) + 1)
+                and len(products) - (index + 1) >= remaining_shards):
+            shards.append((start, index + 1))
+            start = index + 1
+    shards.append((start, len(products)))
+    return shards
+
+
+def render_shard(task: Dict) -> Dict:
+    """
+    Render the items of one product range into a shard file (worker process)
+
+    Args:
+        task: {'index', 'platform', 'base_url', 'products', 'path', 'formats', 'buffer_size',
+               'batch_items'}: the shard of each other format is written next to
+               'path' (same name, format extension)
+
+    Returns:
+        Shard stats: index, first/last product id, products, items, errors,
+        bytes, seconds, context counters and mapper cache stats
+    """
+    start = time.time()
+    platform_name = task['platform']
+
+    # Fresh mapper per shard (~5ms): its cache stats cover this shard only
+    mapper = MAPPERS[platform_name](ConfigLoader('config'), task['base_url'])
+
+    context_stats = ContextStats()
+    generator = MultiFormatFeed(
+        XML_GENERATORS[platform_name](task['path'], task['buffer_size'], task['batch_items']),
+        {format_name: create_format_writer(platform_name, format_name, str(format_path(task['path'], format_name)),
+                                           task['buffer_size'], task['batch_items'])
+         for format_name in task.get('formats', [])}
+    )
+    generator.start_shard()
+
+    products = task['products']
+    errors = 0
+    try:
+        for product in products:
+            try:
+                context = ProductContext(context_stats)
+                for item in transform_mysql_product(mapper, product, context, preloaded_variant_metafields):
+                    generator.add_item(item)
+            except Exception as e:
+                # Same policy as the sequential run: skip the product, keep the shard
+                logger.error(f"Error processing product {product.get('id')}: {e}")
+                errors += 1
+    finally:
+        generator.end_shard()
+
+    return {
+        'index': task['index'],
+        'first_product_id': products[0]['id'] if products else None,
+        'last_product_id': products[-1]['id'] if products else None,
+        'products': len(products) - errors,
+        'items': generator.item_count,
+        'errors': errors,
+        'bytes': os.path.getsize(task['path']),
+        'seconds': round(time.time() - start, 3),
+        'context_computed': dict(context_stats.computed),
+        'context_reused': dict(context_stats.reused),
+        'mapper_caches': mapper.get_cache_stats(),
+    }
+
+
+def render_shards(tasks: List[Dict], workers: int, max_attempts: int = DEFAULT_SHARD_ATTEMPTS) -> List[Dict]:
+    """
+    Render all shards in a process pool, retrying only the failed ones
+
+    Args:
+        tasks: render_shard() tasks
+        workers: Worker processes
+        max_attempts: Runs per shard before giving up
+
+    Returns:
+        Shard stats in task order (each with 'attempts')
+
+    Raises:
+        RuntimeError: A shard still failing after max_attempts
+    """
+    results: Dict[int, Dict] = {}
+    attempts = {task['index']: 0 for task in tasks}
+    pending = list(tasks)
+
+    while pending:
+        failed = []
+        # New pool per round: a crashed worker breaks the whole pool
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(pending)))) as pool:
+            futures = {pool.submit(render_shard, task): task for task in pending}
+            for future in as_completed(futures):
+                task = futures[future]
+                attempts[task['index']] += 1
+                try:
+                    results[task['index']] = future.result()
+                except Exception as e:
+                    logger.warning(f"⚠️ Shard {task['index']} failed "
+                                   f"(attempt {attempts[task['index']]}/{max_attempts}): {e!r}")
+                    failed.append(task)
+
+        for task in failed:
+            if attempts[task['index']] >= max_attempts:
+                raise RuntimeError(f"Shard {task['index']} failed {max_attempts} times")
+        pending = sorted(failed, key=lambda task: task['index'])
+
+    ordered = [results[task['index']] for task in tasks]
+    for result in ordered:
+        result['attempts'] = attempts[result['index']]
+    return ordered
@@ -0,0 +1,291 @@
+"""
+Feed Writer - Batched UTF-8 output for the streaming XML generators
+
+The generators hand over whole rendered items; the writer collects them
+and, every batch_items items, joins the batch, encodes it to UTF-8 once
+and writes the bytes through a binary io.BufferedWriter with a
+configurable buffer. A 50 MB feed becomes a few thousand large writes
+instead of hundreds of thousands of small ones.
+
+Output is byte-for-byte what a text-mode UTF-8 file would contain
+('\\n' is never translated).
+
+With gzip_path the same encoded batches are also compressed into a
+.gz copy of the feed by a GzipCompressor thread (zlib releases the GIL,
+so compression overlaps rendering). The .gz is written to a temporary
+file and renamed into place only when the feed is closed.
+"""
+
+import io
+import os
+import queue
+import threading
+import time
+import logging
+import zlib
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Defaults (overridable from platforms.json settings: xml_buffer_size, xml_batch_items)
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+DEFAULT_BATCH_ITEMS = 64
+
+# Gzip defaults (platforms.json settings: xml_gzip, xml_gzip_level)
+DEFAULT_GZIP_LEVEL = 6
+
+# Batches waiting for the compressor (the writer blocks beyond this)
+GZIP_QUEUE_SIZE = 32
+
+# Read size for file to file work (gzip of a resumed feed, copy fallback)
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def _copy_fd(source_fd: int, target_fd: int, size: int) -> int:
+    """Copy size bytes from the current offset of source_fd to the current offset of target_fd"""
+    def read_write(count: int) -> int:
+        data = memoryview(os.read(source_fd, min(READ_CHUNK_SIZE, count)))
+        while data:
+            data = data[os.write(target_fd, data):]
+        return len(data.obj)
+
+    methods = []
+    if hasattr(os, 'copy_file_range'):
+        methods.append(lambda count: os.copy_file_range(source_fd, target_fd, count))
+    if hasattr(os, 'sendfile'):
+        methods.append(lambda count: os.sendfile(target_fd, source_fd, None, count))
+    methods.append(read_write)
+
+    copied = 0
+    for method in methods:
+        try:
+            while copied < size:
+                count = method(size - copied)
+                if count == 0:
+                    raise EOFError(f"Source ended after {copied} of {size} bytes")
+                copied += count
+            return copied
+        except OSError as e:
+            if method is read_write:
+                raise
+            # Not supported for these files (ENOSYS, EXDEV, EINVAL, ...): next method from the same offsets
+            logger.debug(f"Kernel copy unavailable ({e}), falling back")
+    return copied
+
+
+class GzipCompressor:
+    """
+    Background gzip compression of a stream of byte chunks
+
+    compress() queues a chunk; a worker thread deflates it into
+    <gzip_path>.tmp. close() waits for the worker and renames the
+    temporary file to gzip_path. A failed compression only loses the .gz
+    (logged, the temporary file removed), never the feed itself.
+    """
+
+    def __init__(self, gzip_path: str, level: int = DEFAULT_GZIP_LEVEL, prefix_path: Optional[str] = None):
+        """
+        Start the compressor thread
+
+        Args:
+            gzip_path: Final .gz path
+            level: zlib compression level (1-9)
+            prefix_path: File whose current content is compressed first
+                         (resumed feed: the part written before the checkpoint;
+                         bytes appended later arrive through compress())
+        """
+        self.gzip_path = gzip_path
+        self.tmp_path = f"{gzip_path}.tmp"
+        self.level = level
+        self.prefix_path = prefix_path
+        self.prefix_size = os.path.getsize(prefix_path) if prefix_path else 0
+
+        self._queue: queue.Queue = queue.Queue(maxsize=GZIP_QUEUE_SIZE)
+        self._error: Optional[BaseException] = None
+
+        # Stats (final after close)
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.cpu_seconds = 0.0
+
+        self._worker = threading.Thread(target=self._run, name='feed-gzip', daemon=True)
+        self._worker.start()
+
+    def compress(self, data: bytes):
+        """Queue a chunk (dropped if the compressor already failed)"""
+        if self._error is None:
+            self._queue.put(data)
+
+    def _run(self):
+        """Worker: deflate queued chunks into the temporary file until None is queued"""
+        cpu_start = time.thread_time()
+        # wbits 31: gzip header and trailer
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        try:
+            with open(self.tmp_path, 'wb') as out:
+                if self.prefix_path:
+                    with open(self.prefix_path, 'rb') as prefix:
+                        remaining = self.prefix_size
+                        while remaining > 0:
+                            data = prefix.read(min(READ_CHUNK_SIZE, remaining))
+                            if not data:
+                                raise IOError(f"{self.prefix_path} shorter than {self.prefix_size} bytes")
+                            remaining -= len(data)
+                            self.input_bytes += len(data)
+                            out.write(compressor.compress(data))
+
+                while True:
+                    data = self._queue.get()
+                    if data is None:
+                        break
+                    self.input_bytes += len(data)
+                    out.write(compressor.compress(data))
+
+                out.write(compressor.flush())
+                self.output_bytes = out.tell()
+        except BaseException as e:
+            self._error = e
+            # Keep draining so the writer never blocks on a full queue
+            while self._queue.get() is not None:
+                pass
+        finally:
+            self.cpu_seconds = time.thread_time() - cpu_start
+
+    def close(self) -> bool:
+        """
+        Finish compression and move the .gz into place
+
+        Returns:
+            True if the .gz was written
+        """
+        self._queue.put(None)
+        self._worker.join()
+
+        if self._error is not None:
+            logger.error(f"❌ Gzip compression of {self.gzip_path} failed: {self._error}")
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+            return False
+
+        os.replace(self.tmp_path, self.gzip_path)
+        return True
+
+    def get_stats(self) -> Dict:
+        """Sizes, ratio and compressor thread CPU time"""
+        return {
+            'input_bytes': self.input_bytes,
+            'output_bytes': self.output_bytes,
+            'ratio': round(self.input_bytes / self.output_bytes, 2) if self.output_bytes else 0.0,
+            'cpu_seconds': round(self.cpu_seconds, 3),
+            'success': self._error is None,
+        }
+
+
+class FeedWriter:
+    """Text chunks → batched UTF-8 bytes → BufferedWriter"""
+
+    def __init__(self, path: str, mode: str = 'wb', buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 batch_items: int = DEFAULT_BATCH_ITEMS, gzip_path: Optional[str] = None,
+                 gzip_level: int = DEFAULT_GZIP_LEVEL):
+        """
+        Open the output file
+
+        Args:
+            path: Output file path
+            mode: 'wb' (new file) or 'ab' (append, e.g. resumed feed)
+            buffer_size: BufferedWriter buffer in bytes
+            batch_items: Chunks joined and encoded together (1 = encode each chunk)
+            gzip_path: Also write a gzip copy here (None = no copy); in 'ab'
+                       mode the existing file content is compressed first
+            gzip_level: zlib compression level of the copy
+        """
+        if mode not in ('wb', 'ab'):
+            raise ValueError(f"Unsupported mode: {mode}")
+        if buffer_size <= 0 or batch_items <= 0:
+            raise ValueError("buffer_size and batch_items must be positive")
+
+        self.path = path
+        self.buffer_size = buffer_size
+        self.batch_items = batch_items
+        # Compressor first: in append mode it compresses the file as it is now
+        self.gzip: Optional[GzipCompressor] = None
+        if gzip_path:
+            self.gzip = GzipCompressor(gzip_path, gzip_level, prefix_path=path if mode == 'ab' else None)
+        self.file: io.BufferedWriter = open(path, mode, buffering=buffer_size)
+        self._pending: List[str] = []
+
+        # Stats
+        self.chunks_written = 0
+        self.bytes_written = 0
+
+    def write(self, text: str):
+        """Queue a chunk of text (a rendered item, header or footer)"""
+        pending = self._pending
+        pending.append(text)
+        if len(pending) >= self.batch_items:
+            self._write_pending()
+
+    def _write_pending(self):
+        """Encode the queued chunks once and hand them to the buffered file"""
+        if not self._pending:
+            return
+        data = ''.join(self._pending).encode('utf-8')
+        self._pending.clear()
+        self.file.write(data)
+        if self.gzip:
+            self.gzip.compress(data)
+        self.chunks_written += 1
+        self.bytes_written += len(data)
+
+    def flush(self):
+        """Write queued chunks and flush the buffer to the OS"""
+        self._write_pending()
+        self.file.flush()
+
+    def append_file(self, path: str) -> int:
+        """
+        Append the bytes of another file verbatim (e.g. a rendered shard)
+
+        Queued chunks are written first; the copy then happens in the
+        kernel (copy_file_range, else sendfile), falling back to a read/
+        write loop where neither is available.
+
+        Args:
+            path: File to copy
+
+        Returns:
+            Bytes copied
+
+        Raises:
+            RuntimeError: With a gzip copy (the bytes would bypass the compressor)
+        """
+        if self.gzip:
+            raise RuntimeError("append_file() is not supported with a gzip copy")
+
+        self.flush()
+        with open(path, 'rb') as source:
+            size = os.fstat(source.fileno()).st_size
+            copied = _copy_fd(source.fileno(), self.file.fileno(), size)
+        # The copy moved the file offset behind BufferedWriter's back
+        self.file.seek(0, os.SEEK_END)
+
+        self.bytes_written += copied
+        return copied
+
+    def tell(self) -> int:
+        """Bytes in the file including everything queued so far"""
+        self._write_pending()
+        return self.file.tell()
+
+    def close(self):
+        """Write queued chunks, close the file and finish the gzip copy"""
+        try:
+            self._write_pending()
+        finally:
+            self.file.close()
+            if self.gzip:
+                self.gzip.close()
+
+    @property
+    def closed(self) -> bool:
+        return self.file.closed
@@ -14,8 +14,30 @@ import mysql.connector
 from mysql.connector import MySQLConnection
 from mysql.connector.cursor import MySQLCursor
 
+from core.prices import to_cents
+from src.records import Image, Product, Variant
+
 logger = logging.getLogger(__name__)
 
+# MySQL columns → mm-google-shopping metafield keys
+METAFIELD_COLUMNS = {
+    'MF_Google_Gender': 'gender',
+    'MF_Google_Age_Group': 'age_group',
+    'MF_Google_Condition': 'condition',
+    'MF_Google_Color': 'color',
+    'MF_Google_Size': 'size',
+    'MF_Google_Material': 'material',
+    'MF_Google_MPN': 'mpn',
+    'MF_Google_Size_System': 'size_system',
+    'MF_Google_Size_Type': 'size_type',
+    'MF_Google_Custom_Label_0': 'custom_label_0',
+    'MF_Google_Custom_Label_1': 'custom_label_1',
+    'MF_Google_Custom_Label_2': 'custom_label_2',
+    'MF_Google_Custom_Label_3': 'custom_label_3',
+    'MF_Google_Custom_Label_4': 'custom_label_4',
+    'MF_Google_Product_Category': 'google_product_category'
+}
+
 
 class MySQLDataLoader:
     """
@@ -68,7 +90,7 @@ class MySQLDataLoader:
             self._connection.close()
         logger.info("🔌 MySQL connection closed")
 
-    def get_all_products(self) -> List[Dict]:
+    def get_all_products(self) -> List[Product]:
         """
         Fetch all products from MySQL online_products table.
 
@@ -79,7 +101,7 @@ class MySQLDataLoader:
         Additional filter here: Stock_Magazzino > 0
 
         Returns:
-            List of product dictionaries in Shopify-compatible format
+            List of Product records in Shopify-compatible format (mapping access)
         """
         query = """
             SELECT
@@ -123,7 +145,7 @@ class MySQLDataLoader:
             logger.error(f"❌ MySQL query failed: {e}")
             raise
 
-    def _transform_to_shopify_format(self, rows: List[Dict]) -> List[Dict]:
+    def _transform_to_shopify_format(self, rows: List[Dict]) -> List[Product]:
         """
         Transform MySQL rows to match Shopify API product structure.
 
@@ -134,9 +156,9 @@ class MySQLDataLoader:
             rows: Raw MySQL rows (one per variant)
 
         Returns:
-            List of products with nested variants (Shopify-like structure)
+            List of Product records with nested variants (Shopify-like structure)
         """
-        products_map: Dict[int, Dict] = {}
+        products_map: Dict[int, Product] = {}
 
         for row in rows:
             product_id = row['Product_id']
@@ -146,46 +168,54 @@ class MySQLDataLoader:
                 # Parse images JSON
                 images = self._parse_images(row['Product_Images'])
 
-                products_map[product_id] = {
-                    'id': product_id,
-                    'title': row['Product_title'],
-                    'handle': row['Product_handle'],
-                    'vendor': row['Vendor'],
-                    'product_type': row['Product_Type'],
-                    'status': 'active',  # Already filtered by shopify-mysql-sync
-                    'tags': row['Tags'] or '',  # String format: "tag1, tag2, tag3"
-                    'body_html': row['Body_HTML'],
-                    'images': images,
-                    'variants': [],
-                    'collections': self._parse_collections(row['Collections']),
+                products_map[product_id] = Product(
+                    id=product_id,
+                    title=row['Product_title'],
+                    handle=row['Product_handle'],
+                    vendor=row['Vendor'],
+                    product_type=row['Product_Type'],
+                    status='active',  # Already filtered by shopify-mysql-sync
+                    tags=row['Tags'] or '',  # String format: "tag1, tag2, tag3"
+                    body_html=row['Body_HTML'],
+                    images=images,
+                    collections=self._parse_collections(row['Collections']),
                     # Metafields reconstructed in Shopify format
                     # Will be populated per-variant and passed to mapper
-                    'metafields': {}
-                }
-
-            # Build variant
-            variant = {
-                'id': row['Variant_id'],
-                'title': row['Variant_Title'],
-                'option1': row['Variant_Title'],  # Taglia (es. "42")
-                'option2': None,
-                'option3': None,
-                'sku': row['SKU'] or '',
-                'barcode': row['Barcode'] or '',
-                'price': self._decimal_to_str(row['Price']),
-                'compare_at_price': self._decimal_to_str(row['Compare_AT_Price']),
-                'inventory_item_id': row['Inventory_Item_ID'],
-                'inventory_quantity': row['Stock_Magazzino'] or 0,
-            }
-
-            products_map[product_id]['variants'].append(variant)
+                    metafields={}
+                )
+
+            products_map[product_id].variants.append(self._build_variant(row))
 
         # Convert map to list
         return list(products_map.values())
 
-    def _parse_images(self, images_json: Optional[str]) -> List[Dict]:
+    def _build_variant(self, row: Dict) -> Variant:
+        """
+        Build the variant record of a MySQL row.
+
+        Args:
+            row: MySQL row (one per variant)
+
+        Returns:
+            Variant with Shopify field names (prices in cents)
         """
-        Parse Product_Images JSON into list of image dicts.
+        return Variant(
+            id=row['Variant_id'],
+            title=row['Variant_Title'],
+            option1=row['Variant_Title'],  # Taglia (es. "42")
+            option2=None,
+            option3=None,
+            sku=row['SKU'] or '',
+            barcode=row['Barcode'] or '',
+            price_cents=self._decimal_to_cents(row['Price']),
+            compare_at_price_cents=self._decimal_to_cents(row['Compare_AT_Price']),
+            inventory_item_id=row['Inventory_Item_ID'],
+            inventory_quantity=row['Stock_Magazzino'] or 0,
+        )
+
+    def _parse_images(self, images_json: Optional[str]) -> List[Image]:
+        """
+        Parse Product_Images JSON into list of image records.
 
         MySQL format: {"count": N, "images": [{...}], "featured": "url"}
         Shopify format: [{"src": "url", "alt": "", ...}]
@@ -194,7 +224,7 @@ class MySQLDataLoader:
             images_json: JSON string from MySQL
 
         Returns:
-            List of image dicts in Shopify format
+            List of Image records (Shopify field names)
         """
         if not images_json:
             return []
@@ -206,14 +236,14 @@ class MySQLDataLoader:
             # Convert to Shopify format (ensure 'src' key exists)
             result = []
             for img in images:
-                result.append({
-                    'id': img.get('id'),
-                    'position': img.get('position'),
-                    'src': img.get('src', ''),
-                    'alt': img.get('alt', ''),
-                    'width': img.get('width'),
-                    'height': img.get('height')
-                })
+                result.append(Image(
+                    id=img.get('id'),
+                    position=img.get('position'),
+                    src=img.get('src', ''),
+                    alt=img.get('alt', ''),
+                    width=img.get('width'),
+                    height=img.get('height')
+                ))
 
             return result
 
@@ -237,19 +267,19 @@ class MySQLDataLoader:
         # Split and clean
         return [c.strip() for c in collections_str.split(',') if c.strip()]
 
-    def _decimal_to_str(self, value: Optional[Decimal]) -> Optional[str]:
+    def _decimal_to_cents(self, value: Optional[Decimal]) -> Optional[int]:
         """
-        Convert Decimal to string for price fields.
+        Convert a DB Decimal price to integer cents (exact, no float).
 
         Args:
             value: Decimal value or None
 
         Returns:
-            String representation or None
+            Cents or None
         """
         if value is None:
             return None
-        return str(value)
+        return to_cents(value)
 
     def get_product_metafields_from_row(self, row: Dict) -> Dict:
         """
@@ -266,26 +296,7 @@ class MySQLDataLoader:
         """
         google_shopping = {}
 
-        # Map MySQL columns to metafield keys
-        field_mapping = {
-            'MF_Google_Gender': 'gender',
-            'MF_Google_Age_Group': 'age_group',
-            'MF_Google_Condition': 'condition',
-            'MF_Google_Color': 'color',
-            'MF_Google_Size': 'size',
-            'MF_Google_Material': 'material',
-            'MF_Google_MPN': 'mpn',
-            'MF_Google_Size_System': 'size_system',
-            'MF_Google_Size_Type': 'size_type',
-            'MF_Google_Custom_Label_0': 'custom_label_0',
-            'MF_Google_Custom_Label_1': 'custom_label_1',
-            'MF_Google_Custom_Label_2': 'custom_label_2',
-            'MF_Google_Custom_Label_3': 'custom_label_3',
-            'MF_Google_Custom_Label_4': 'custom_label_4',
-            'MF_Google_Product_Category': 'google_product_category',
-        }
-
-        for mysql_col, metafield_key in field_mapping.items():
+        for mysql_col, metafield_key in METAFIELD_COLUMNS.items():
             value = row.get(mysql_col)
             if value is not None:
                 google_shopping[metafield_key] = value
@@ -294,15 +305,18 @@ class MySQLDataLoader:
             'mm-google-shopping': google_shopping
         }
 
-    def get_products_with_metafields(self) -> List[Dict]:
+    def get_products_with_metafields(self, product_ids: Optional[List[int]] = None) -> List[Product]:
         """
         Fetch all products with metafields pre-loaded.
 
         This is the main method to use for feed generation.
         Returns products in exact format expected by orchestrator.
 
+        Args:
+            product_ids: Restrict to these products (incremental webhook updates)
+
         Returns:
-            List of products with 'metafields' and 'collections' already populated
+            List of Product records with 'metafields' and 'collections' already populated
         """
         query = """
             SELECT
@@ -323,65 +337,62 @@ class MySQLDataLoader:
                 MF_Google_Material, MF_Google_Product_Category
             FROM online_products
             WHERE Stock_Magazzino > 0
+            {product_filter}
             ORDER BY Product_id, Variant_id
         """
 
+        params: tuple = ()
+        product_filter = ''
+        if product_ids is not None:
+            if not product_ids:
+                return []
+            product_filter = f"AND Product_id IN ({', '.join(['%s'] * len(product_ids))})"
+            params = tuple(product_ids)
+
         try:
-            self._cursor.execute(query)
+            self._cursor.execute(query.format(product_filter=product_filter), params)
             rows = self._cursor.fetchall()
 
             logger.info(f"📊 Loaded {len(rows)} variants from MySQL")
 
             # Group by product and build structure
-            products_map: Dict[int, Dict] = {}
+            products_map: Dict[int, Product] = {}
             variant_metafields: Dict[int, Dict] = {}  # variant_id -> metafields
+            interned_metafields: Dict[tuple, Dict] = {}  # metafield values -> shared dict
 
             for row in rows:
                 product_id = row['Product_id']
                 variant_id = row['Variant_id']
 
-                # Store metafields per variant
-                variant_metafields[variant_id] = self.get_product_metafields_from_row(row)
+                # Store metafields per variant (identical ones shared)
+                metafields = self.get_product_metafields_from_row(row)
+                metafields_key = tuple(metafields['mm-google-shopping'].items())
+                variant_metafields[variant_id] = interned_metafields.setdefault(metafields_key, metafields)
 
                 if product_id not in products_map:
                     images = self._parse_images(row['Product_Images'])
                     collections = self._parse_collections(row['Collections'])
 
-                    products_map[product_id] = {
-                        'id': product_id,
-                        'title': row['Product_title'],
-                        'handle': row['Product_handle'],
-                        'vendor': row['Vendor'],
-                        'product_type': row['Product_Type'],
-                        'status': 'active',
-                        'tags': row['Tags'] or '',
-                        'body_html': row['Body_HTML'],
-                        'images': images,
-                        'variants': [],
-                        'collections': collections,
+                    product = Product(
+                        id=product_id,
+                        title=row['Product_title'],
+                        handle=row['Product_handle'],
+                        vendor=row['Vendor'],
+                        product_type=row['Product_Type'],
+                        status='active',
+                        tags=row['Tags'] or '',
+                        body_html=row['Body_HTML'],
+                        images=images,
+                        collections=collections,
                         # Use first variant's metafields as product-level
                         # (will be overridden per-variant in orchestrator)
-                        'metafields': variant_metafields[variant_id],
-                        '_variant_metafields': {}  # Store per-variant metafields
-                    }
-
-                # Build variant
-                variant = {
-                    'id': variant_id,
-                    'title': row['Variant_Title'],
-                    'option1': row['Variant_Title'],
-                    'option2': None,
-                    'option3': None,
-                    'sku': row['SKU'] or '',
-                    'barcode': row['Barcode'] or '',
-                    'price': self._decimal_to_str(row['Price']),
-                    'compare_at_price': self._decimal_to_str(row['Compare_AT_Price']),
-                    'inventory_item_id': row['Inventory_Item_ID'],
-                    'inventory_quantity': row['Stock_Magazzino'] or 0,
-                }
-
-                products_map[product_id]['variants'].append(variant)
-                products_map[product_id]['_variant_metafields'][variant_id] = variant_metafields[variant_id]
+                        metafields=variant_metafields[variant_id]
+                    )
+                    product._variant_metafields = {}  # Store per-variant metafields
+                    products_map[product_id] = product
+
+                products_map[product_id].variants.append(self._build_variant(row))
+                products_map[product_id]._variant_metafields[variant_id] = variant_metafields[variant_id]
 
             products = list(products_map.values())
             logger.info(f"📦 Grouped into {len(products)} products")
@@ -397,7 +408,7 @@ class MySQLDataLoader:
         Get metafields for a specific variant from pre-loaded data.
 
         Args:
-            product: Product dict with '_variant_metafields'
+            product: Product record with '_variant_metafields'
             variant_id: Variant ID
 
         Returns:
@@ -0,0 +1,245 @@
+"""
+Adaptive Rate Limiter for the Shopify REST Admin API
+Models Shopify's leaky bucket instead of using fixed sleep tiers
+
+Shopify exposes the bucket state on every response:
+    X-Shopify-Shop-Api-Call-Limit: 32/40  (32 used out of 40)
+The bucket leaks at a constant rate. The initial estimate is
+bucket_size / BUCKET_SECONDS_TO_DRAIN (40 → 2/s standard, 80 → 4/s
+Plus); observe() then refines it from successive headers
+(leaked credits / elapsed seconds, each sample clamped to 0.25x-4x of
+the current estimate and blended 70/30 into it) and we compute the
+minimal wait that keeps the next request inside the bucket.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the wait-time histogram buckets
+WAIT_HISTOGRAM_BOUNDS = (0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+
+# Shopify REST buckets drain in 20s when idle (40 → 2/s standard, 80 → 4/s Plus)
+BUCKET_SECONDS_TO_DRAIN = 20.0
+
+
+class LeakyBucketRateLimiter:
+    """
+    Thread-safe leaky bucket model shared by all requests to one shop
+
+    Each request reserves a slot under a lock, so concurrent threads and
+    asyncio tasks are spaced correctly; the actual sleep happens outside
+    the lock.
+    """
+
+    def __init__(self, bucket_size: int = 40, leak_rate: Optional[float] = None,
+                 safety_margin: int = 2, request_cost: float = 1.0):
+        """
+        Initialize rate limiter
+
+        Args:
+            bucket_size: Initial bucket capacity (updated from headers)
+            leak_rate: Initial leak rate in requests/sec (default: bucket_size / 20)
+            safety_margin: Credits kept free for other clients sharing the bucket
+            request_cost: Credits consumed by a single REST call
+        """
+        self._lock = threading.Lock()
+
+        self.bucket_size = bucket_size
+        self.leak_rate = leak_rate or bucket_size / BUCKET_SECONDS_TO_DRAIN
+        self.safety_margin = safety_margin
+        self.request_cost = request_cost
+
+        # Estimated bucket level at reference time _level_at
+        self._level = 0.0
+        self._level_at = time.monotonic()
+
+        # Retry-After: no request before this instant
+        self._blocked_until = 0.0
+
+        # Previous header observation, for leak rate estimation
+        self._last_observed_used: Optional[int] = None
+        self._last_observed_at = 0.0
+        self._sent_since_observation = 0
+
+        # Stats
+        self.total_requests = 0
+        self.total_wait = 0.0
+        self.throttled_count = 0
+        self._histogram = [0] * (len(WAIT_HISTOGRAM_BOUNDS) + 1)
+
+    # ========== RESERVATION ==========
+
+    def _level_at_time(self, t: float) -> float:
+        """Bucket level drained up to time t (never before the reference time)"""
+        elapsed = max(0.0, t - self._level_at)
+        return max(0.0, self._level - elapsed * self.leak_rate)
+
+    def reserve(self) -> float:
+        """
+        Reserve a slot for one request
+
+        Returns:
+            Seconds the caller must wait before sending the request
+        """
+        with self._lock:
+            now = time.monotonic()
+
+            # Requests are granted in order: never before the last reservation
+            start = max(now, self._blocked_until, self._level_at)
+            level = self._level_at_time(start)
+
+            capacity = max(self.request_cost, self.bucket_size - self.safety_margin)
+            overflow = level + self.request_cost - capacity
+            if overflow > 0:
+                start += overflow / self.leak_rate
+                level = capacity - self.request_cost
+
+            self._level = level + self.request_cost
+            self._level_at = start
+            self._sent_since_observation += 1
+
+            wait = start - now
+            self._record_wait(wait)
+            return wait
+
+    def acquire(self):
+        """Block the current thread until a request may be sent"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Suspend the current asyncio task until a request may be sent"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    # ========== FEEDBACK ==========
+
+    def observe(self, used: int, total: int):
+        """
+        Update the model with the server-side bucket state
+
+        The leak rate is estimated from two successive observations:
+        leaked = used_before + requests_sent_in_between - used_now
+
+        Args:
+            used: Credits used (left side of "32/40")
+            total: Bucket size (right side of "32/40")
+        """
+        with self._lock:
+            now = time.monotonic()
+
+            if total != self.bucket_size:
+                # Plan change (e.g. Plus shop): reset the prior on the new size
+                self.bucket_size = total
+                self.leak_rate = total / BUCKET_SECONDS_TO_DRAIN
+                self._last_observed_used = None
+
+            prev_used = self._last_observed_used
+            elapsed = now - self._last_observed_at
+
+            if prev_used is not None and elapsed > 0.05:
+                leaked = prev_used + self._sent_since_observation * self.request_cost - used
+                if leaked > 0:
+                    sample = leaked / elapsed
+                    # Bound samples to limit noise from concurrent requests
+                    sample = min(max(sample, self.leak_rate * 0.25), self.leak_rate * 4.0)
+                    # If the bucket may have emptied in between, the sample is
+                    # only a lower bound: use it to raise the estimate, never to lower it
+                    may_have_emptied = prev_used <= self.leak_rate * elapsed
+                    if sample > self.leak_rate or not may_have_emptied:
+                        self.leak_rate = 0.7 * self.leak_rate + 0.3 * sample
+
+            self._last_observed_used = used
+            self._last_observed_at = now
+            self._sent_since_observation = 0
+
+            # Server state is authoritative (other clients may share the bucket),
+            # but keep any slot already reserved in the future
+            if self._level_at <= now:
+                self._level = float(used)
+                self._level_at = now
+
+    def penalize(self, retry_after: float):
+        """
+        Honour a 429 Retry-After: block all requests and mark the bucket full
+
+        Args:
+            retry_after: Seconds from the Retry-After header
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.throttled_count += 1
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            self._level = float(self.bucket_size)
+            self._level_at = max(now, self._level_at)
+
+    # ========== STATS ==========
+
+    def _record_wait(self, wait: float):
+        """Add a wait time to the histogram (lock must be held)"""
+        wait = max(0.0, wait)
+        self.total_requests += 1
+        self.total_wait += wait
+
+        for index, bound in enumerate(WAIT_HISTOGRAM_BOUNDS):
+            if wait <= bound:
+                self._histogram[index] += 1
+                return
+        self._histogram[-1] += 1
+
+    def get_stats(self) -> Dict:
+        """
+        Export limiter statistics (for feed_metrics.json)
+
+        Returns:
+            Dict with request count, waits, estimated leak rate and histogram
+        """
+        with self._lock:
+            histogram = {}
+            for index, bound in enumerate(WAIT_HISTOGRAM_BOUNDS):
+                histogram[f'<={bound}s'] = self._histogram[index]
+            histogram[f'>{WAIT_HISTOGRAM_BOUNDS[-1]}s'] = self._histogram[-1]
+
+            return {
+                'requests': self.total_requests,
+                'total_wait_seconds': round(self.total_wait, 2),
+                'avg_wait_seconds': round(self.total_wait / self.total_requests, 4) if self.total_requests else 0.0,
+                'throttled_429': self.throttled_count,
+                'bucket_size': self.bucket_size,
+                'estimated_leak_rate': round(self.leak_rate, 2),
+                'wait_histogram': histogram
+            }
+
+
+# ========== SHARED INSTANCES ==========
+
+_shared_limiters: Dict[str, LeakyBucketRateLimiter] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_limiter(shop_url: str) -> LeakyBucketRateLimiter:
+    """
+    Get the limiter shared by every client talking to the same shop
+
+    Shopify's bucket is per shop/app, so all clients in the process
+    must draw from the same model.
+
+    Args:
+        shop_url: Shop domain (e.g., 'racoon-lab.myshopify.com')
+
+    Returns:
+        LeakyBucketRateLimiter instance for the shop
+    """
+    with _shared_lock:
+        limiter = _shared_limiters.get(shop_url)
+        if limiter is None:
+            limiter = LeakyBucketRateLimiter()
+            _shared_limiters[shop_url] = limiter
+        return limiter
@@ -0,0 +1,239 @@
+"""
+Product Records - Compact product/variant/image records for feed generation
+
+MySQLDataLoader and ShopifyClient return Product records instead of
+nested dicts: each field is a __slots__ attribute (no per-object dict,
+no per-object key table), which cuts the memory of a loaded catalog
+roughly in half.
+
+Records are mapping-compatible (record['price'], record.get('sku', ''),
+'images' in record, record.copy(), record['variants'] = [...]), so
+mappers and orchestrator code written for dicts keep working unchanged.
+New code can read attributes directly (variant.price).
+
+Fields not listed in a record type are dropped by from_dict() (not used
+by the feed); keys assigned later with record[key] = value are kept in a
+small side dict.
+"""
+
+import logging
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional
+
+from core.prices import format_amount, optional_cents
+
+logger = logging.getLogger(__name__)
+
+
+class Record(MutableMapping):
+    """Mapping view over __slots__ fields (unset slot = missing key)"""
+
+    __slots__ = ('_extra',)
+
+    # Keys computed from other fields (properties), exposed like fields
+    _properties: tuple = ()
+
+    # Set per subclass from __slots__ + _properties
+    _fields: tuple = ()
+    _field_set: frozenset = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = tuple(cls.__slots__) + tuple(cls._properties)
+        cls._field_set = frozenset(cls._fields)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Record':
+        """Build a record from a dict (only the record's fields are kept)"""
+        record = cls.__new__(cls)
+        record._extra = None
+        for key in cls._fields:
+            if key in data:
+                setattr(record, key, data[key])
+        return record
+
+    def to_dict(self) -> Dict:
+        """Plain dict copy (nested records stay records)"""
+        return dict(self.items())
+
+    def copy(self) -> 'Record':
+        """Shallow copy (same type, like dict.copy)"""
+        record = self.__class__.__new__(self.__class__)
+        for key in self.__slots__:
+            try:
+                setattr(record, key, getattr(self, key))
+            except AttributeError:
+                pass
+        record._extra = dict(self._extra) if self._extra else None
+        return record
+
+    # ----- Mapping protocol -----
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._field_set:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._field_set:
+            return getattr(self, key, default)
+        extra = self._extra
+        return extra.get(key, default) if extra else default
+
+    def __setitem__(self, key: str, value: Any):
+        if key in self._field_set:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in self._field_set:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in self._field_set:
+            return hasattr(self, key)
+        return bool(self._extra) and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self._fields:
+            if hasattr(self, key):
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+
+class Image(Record):
+    """Product image"""
+
+    __slots__ = ('id', 'position', 'src', 'alt', 'width', 'height')
+
+    def __init__(self, id: Optional[int] = None, position: Optional[int] = None, src: str = '',
+                 alt: Optional[str] = '', width: Optional[int] = None, height: Optional[int] = None):
+        self._extra = None
+        self.id = id
+        self.position = position
+        self.src = src
+        self.alt = alt
+        self.width = width
+        self.height = height
+
+
+class Variant(Record):
+    """
+    Product variant
+
+    Prices are stored as integer cents (price_cents, compare_at_price_cents);
+    price / compare_at_price read and write them as Shopify-style strings
+    ("59.90", None when not set).
+    """
+
+    __slots__ = ('id', 'title', 'option1', 'option2', 'option3', 'sku', 'barcode',
+                 'price_cents', 'compare_at_price_cents', 'inventory_item_id', 'inventory_quantity')
+    _properties = ('price', 'compare_at_price')
+
+    def __init__(self, id: int, title: Optional[str] = None, option1: Optional[str] = None,
+                 option2: Optional[str] = None, option3: Optional[str] = None, sku: str = '',
+                 barcode: str = '', price_cents: Optional[int] = None, compare_at_price_cents: Optional[int] = None,
+                 inventory_item_id: Optional[int] = None, inventory_quantity: int = 0):
+        self._extra = None
+        self.id = id
+        self.title = title
+        self.option1 = option1
+        self.option2 = option2
+        self.option3 = option3
+        self.sku = sku
+        self.barcode = barcode
+        self.price_cents = price_cents
+        self.compare_at_price_cents = compare_at_price_cents
+        self.inventory_item_id = inventory_item_id
+        self.inventory_quantity = inventory_quantity
+
+    @property
+    def price(self) -> Optional[str]:
+        return format_amount(self.price_cents)
+
+    @price.setter
+    def price(self, value):
+        self.price_cents = _parse_cents(value, 'price', self)
+
+    @property
+    def compare_at_price(self) -> Optional[str]:
+        return format_amount(self.compare_at_price_cents)
+
+    @compare_at_price.setter
+    def compare_at_price(self, value):
+        self.compare_at_price_cents = _parse_cents(value, 'compare_at_price', self)
+
+
+def _parse_cents(value: Any, field: str, variant: Variant) -> Optional[int]:
+    """Price string → cents; invalid values become None (the mappers skip the variant, not the page)"""
+    try:
+        return optional_cents(value)
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid {field} {value!r} for variant {getattr(variant, 'id', '?')}")
+        return None
+
+
+class Product(Record):
+    """
+    Product with its variants and images
+
+    metafields/collections are added by the loaders; _variant_metafields
+    (MySQL only) maps variant id → metafields of that variant.
+    """
+
+    __slots__ = ('id', 'title', 'handle', 'vendor', 'product_type', 'status', 'tags', 'body_html',
+                 'images', 'image', 'variants', 'updated_at', 'collections', 'metafields',
+                 '_variant_metafields')
+
+    def __init__(self, id: int, title: str = '', handle: str = '', vendor: Optional[str] = None,
+                 product_type: str = '', status: str = 'active', tags: str = '',
+                 body_html: Optional[str] = None, images: Optional[List[Image]] = None,
+                 variants: Optional[List[Variant]] = None, collections: Optional[List[str]] = None,
+                 metafields: Optional[Dict] = None):
+        self._extra = None
+        self.id = id
+        self.title = title
+        self.handle = handle
+        self.vendor = vendor
+        self.product_type = product_type
+        self.status = status
+        self.tags = tags
+        self.body_html = body_html
+        self.images = images if images is not None else []
+        self.variants = variants if variants is not None else []
+        self.collections = collections if collections is not None else []
+        self.metafields = metafields if metafields is not None else {}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Product':
+        """Build from a Shopify API product dict (variants/images converted too)"""
+        product = super().from_dict(data)
+        if 'variants' in data:
+            product.variants = [Variant.from_dict(variant) for variant in data['variants'] or []]
+        if 'images' in data:
+            product.images = [Image.from_dict(image) for image in data['images'] or []]
+        if data.get('image'):
+            product.image = Image.from_dict(data['image'])
+        return product
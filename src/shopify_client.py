@@ -6,67 +6,73 @@ Handles rate limiting and memory-efficient streaming
 import requests
 import time
 import logging
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from src.rate_limiter import get_shared_limiter
+from src.enrichment_cache import EnrichmentCache
+from src.records import Product
 
 logger = logging.getLogger(__name__)
 
+# Campi prodotto richiesti in listing (status è necessario per il filtro)
+PRODUCT_FIELDS = 'id,title,handle,vendor,product_type,tags,body_html,variants,images,image,status,updated_at'
+
+
+class RateLimitExhausted(Exception):
+    """A request was still throttled (429) after max_rate_limit_retries waits"""
+
+
+class ShopifyNotFound(Exception):
+    """404 for the requested resource (e.g. product deleted)"""
+
 
 class ShopifyClient:
-    def __init__(self, shop_url: str, access_token: str):
+    def __init__(self, shop_url: str, access_token: str, enrichment_cache: Optional[EnrichmentCache] = None,
+                 api_base_url: Optional[str] = None):
         """
         Initialize Shopify API client
         
         Args:
             shop_url: Full shop URL (e.g., 'racoon-lab.myshopify.com')
             access_token: Admin API access token
+            enrichment_cache: Optional cross-run cache for metafields/collections
+            api_base_url: Override Admin API base URL (e.g. local simulator,
+                          'http://127.0.0.1:8765/admin/api/2024-10')
         """
         self.shop_url = shop_url.replace('https://', '').replace('http://', '')
         self.access_token = access_token
-        self.base_url = f"https://{self.shop_url}/admin/api/2024-10"
+        self.base_url = api_base_url.rstrip('/') if api_base_url else f"https://{self.shop_url}/admin/api/2024-10"
         self.headers = {
             'X-Shopify-Access-Token': access_token,
             'Content-Type': 'application/json'
         }
         
-        # Rate limiting intelligente basato su crediti Shopify
-        self.min_request_interval = 0.5  # Base interval (veloce quando hai crediti)
-        self.last_request_time = 0
+        # Rate limiting adattivo: modello leaky bucket condiviso per shop
+        # (thread principale, thread di prefetch e altri client dello stesso shop)
+        self.rate_limiter = get_shared_limiter(self.shop_url)
         self.available_credits = 40  # Shopify bucket size
         self.max_credits = 40
         
-        # Retry settings
+        # Cache metafields/collections tra un run e l'altro
+        self.enrichment_cache = enrichment_cache
+        
+        # Retry settings (errors / network failures)
         self.max_retries = 3
         self.retry_delay = 5  # seconds
+        
+        # 429 con Retry-After rispettato dal limiter: atteso con bucket condiviso,
+        # budget separato (non consuma max_retries)
+        self.max_rate_limit_retries = 10
     
     def _rate_limit(self):
         """
-        Rate limiting intelligente basato su crediti Shopify
+        Attende il minimo necessario prima della prossima richiesta
         
-        Logica:
-        - Crediti >= 30: veloce (0.5s)
-        - Crediti 20-29: normale (1.0s)
-        - Crediti 10-19: cauto (1.5s)
-        - Crediti < 10: lento (2.5s) per ricaricare
+        Il wait è calcolato dal modello leaky bucket (livello stimato,
+        velocità di ricarica osservata, eventuale Retry-After).
         """
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        # Calcola wait time in base ai crediti disponibili
-        if self.available_credits >= 30:
-            wait_time = 0.5  # Veloce
-        elif self.available_credits >= 20:
-            wait_time = 1.0  # Normale
-        elif self.available_credits >= 10:
-            wait_time = 1.5  # Cauto
-        else:
-            wait_time = 2.5  # Lento - lascia ricaricare il bucket
-            logger.info(f"⚠️ Pochi crediti ({self.available_credits}/{self.max_credits}), rallento...")
-        
-        if time_since_last < wait_time:
-            sleep_time = wait_time - time_since_last
-            time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
+        self.rate_limiter.acquire()
     
     def _update_credits_from_header(self, response_headers: Dict):
         """
@@ -84,9 +90,10 @@ class ShopifyClient:
                 used = int(used)
                 total = int(total)
                 
-                # Calcola crediti disponibili
+                # Calcola crediti disponibili e aggiorna il modello
                 self.available_credits = total - used
                 self.max_credits = total
+                self.rate_limiter.observe(used, total)
                 
                 # Log solo quando i crediti sono bassi
                 if self.available_credits < 15:
@@ -96,10 +103,22 @@ class ShopifyClient:
                 logger.debug(f"Could not parse credit header '{call_limit}': {e}")
     
     def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
-        """Make API request with rate limiting and retry logic"""
+        """
+        Make API request with rate limiting and retry logic
+        
+        Errors and network failures are retried max_retries times, 429s
+        (after waiting Retry-After) max_rate_limit_retries times.
+        
+        Raises:
+            ShopifyNotFound: 404 (not retried)
+            RateLimitExhausted: Still throttled after max_rate_limit_retries
+            requests.exceptions.RequestException: Last error after max_retries
+        """
         url = f"{self.base_url}/{endpoint}"
+        attempt = 0
+        throttled = 0
         
-        for attempt in range(self.max_retries):
+        while True:
             try:
                 self._rate_limit()
                 response = requests.get(url, headers=self.headers, params=params, timeout=30)
@@ -109,23 +128,34 @@ class ShopifyClient:
                 
                 if response.status_code == 200:
                     return response.json()
+                elif response.status_code == 404:
+                    # Not found is not transient (e.g. product deleted): don't retry
+                    logger.warning(f"Not found: {endpoint}")
+                    raise ShopifyNotFound(endpoint)
                 elif response.status_code == 429:  # Rate limit
-                    retry_after = int(float(response.headers.get('Retry-After', self.retry_delay)))
+                    throttled += 1
+                    if throttled > self.max_rate_limit_retries:
+                        raise RateLimitExhausted(f"{endpoint}: still rate limited after "
+                                                 f"{self.max_rate_limit_retries} retries")
+                    retry_after = float(response.headers.get('Retry-After', self.retry_delay))
                     logger.warning(f"⚠️ Rate limited! Aspetto {retry_after}s (crediti: {self.available_credits}/{self.max_credits})")
-                    time.sleep(retry_after)
+                    # Il prossimo _rate_limit() attende il Retry-After (per tutti i thread)
+                    self.rate_limiter.penalize(retry_after)
                     continue
                 else:
                     logger.error(f"API error {response.status_code}: {response.text}")
                     response.raise_for_status()
+                    # Non-error status other than 200 (e.g. 3xx not followed): retried as an error
+                    raise requests.exceptions.HTTPError(f"Unexpected status {response.status_code}",
+                                                        response=response)
                     
             except requests.exceptions.RequestException as e:
-                logger.warning(f"Request failed (attempt {attempt + 1}/{self.max_retries}): {e}")
-                if attempt < self.max_retries - 1:
+                attempt += 1
+                logger.warning(f"Request failed (attempt {attempt}/{self.max_retries}): {e}")
+                if attempt < self.max_retries:
                     time.sleep(self.retry_delay)
                 else:
                     raise
-        
-        return {}
     
     def get_products_count(self) -> int:
         """Get total count of active products"""
@@ -138,84 +168,123 @@ class ShopifyClient:
             logger.error(f"Error getting products count: {e}")
             return 0
     
-    def get_all_products(self, limit: int = 250) -> List[Dict]:
+    def _fetch_products_page(self, since_id: int, limit: int) -> List[Product]:
         """
-        Get all active products with pagination
-        
-        CRITICAL: Includes 'status' field in API call (required for filtering)
+        Fetch a single page of active products ordered by id (since_id pagination)
         
         Args:
+            since_id: Return only products with id greater than this (0 = first page)
             limit: Products per page (max 250)
         
         Returns:
-            List of product dictionaries
+            List of Product records (empty when there are no more products)
         """
-        all_products = []
-        page_info = None
-        page = 1
+        params = {
+            'status': 'active',
+            'limit': limit,
+            'order': 'id asc',
+            'fields': PRODUCT_FIELDS
+        }
         
-        logger.info("Fetching all active products...")
+        if since_id > 0:
+            params['since_id'] = since_id
         
-        while True:
-            try:
-                params = {
-                    'limit': limit,
-                    'fields': 'id,title,handle,vendor,product_type,tags,body_html,variants,images,image,status'
-                }
-                
-                # Only add status filter on first page
-                # When using page_info, Shopify doesn't allow other filters
-                if not page_info:
-                    params['status'] = 'active'
-                else:
-                    params['page_info'] = page_info
-                
-                # Make request directly to access headers
-                url = f"{self.base_url}/products.json"
-                self._rate_limit()
-                response = requests.get(url, headers=self.headers, params=params, timeout=30)
-                
-                # Aggiorna crediti dagli header
-                self._update_credits_from_header(response.headers)
-                
-                if response.status_code != 200:
-                    logger.error(f"API error {response.status_code}: {response.text}")
-                    break
-                
-                data = response.json()
-                products = data.get('products', [])
+        data = self._make_request('products.json', params)
+        return [Product.from_dict(product) for product in data.get('products', [])]
+    
+    def iter_products(self, limit: int = 250, since_id: int = 0) -> Iterator[Product]:
+        """
+        Stream all active products, prefetching the next page in background
+        
+        While the caller processes page N (enrichment, mapping, XML writing),
+        page N+1 is already being downloaded on a worker thread. Requests go
+        through the same rate limiter, so the prefetch never exceeds the
+        Shopify call budget.
+        
+        Args:
+            limit: Products per page (max 250)
+            since_id: Start after this product id (used to resume a run)
+        
+        Yields:
+            Product records in ascending id order
+        
+        Raises:
+            Exception: A page could not be fetched (raised, not end of stream:
+                       the catalog must not look complete)
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shopify-prefetch')
+        page = 1
+        total = 0
+        
+        try:
+            future = executor.submit(self._fetch_products_page, since_id, limit)
+            
+            while future is not None:
+                try:
+                    products = future.result()
+                except Exception as e:
+                    logger.error(f"Error fetching products page {page}: {e}")
+                    raise
                 
                 if not products:
                     break
                 
-                # Filter active products (can't use status param with page_info in API)
-                active_products = [p for p in products if p.get('status', '').lower() == 'active']
+                # Short page = last page, no need for an extra empty request
+                if len(products) < limit:
+                    future = None
+                else:
+                    future = executor.submit(self._fetch_products_page, products[-1]['id'], limit)
                 
-                all_products.extend(active_products)
-                logger.info(f"  Page {page}: Retrieved {len(products)} products ({len(active_products)} active, total: {len(all_products)})")
+                total += len(products)
+                logger.info(f"  Page {page}: {len(products)} active products (total: {total})")
+                page += 1
                 
-                # Check for next page in HTTP headers
-                link_header = response.headers.get('Link', '')
-                if 'rel="next"' in link_header:
-                    # Extract page_info from link header
-                    import re
-                    match = re.search(r'page_info=([^&>]+)', link_header)
-                    if match:
-                        page_info = match.group(1)
-                        page += 1
-                    else:
-                        break
-                else:
-                    break
-                    
-            except Exception as e:
-                logger.error(f"Error fetching products page {page}: {e}")
-                break
+                for product in products:
+                    yield product
+        finally:
+            # Consumer may stop early: don't wait for a pending prefetch
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def get_all_products(self, limit: int = 250) -> List[Product]:
+        """
+        Get all active products with pagination
+        
+        CRITICAL: Includes 'status' field in API call (required for filtering)
+        
+        Args:
+            limit: Products per page (max 250)
+        
+        Returns:
+            List of Product records
+        
+        Raises:
+            Exception: A page could not be fetched (see iter_products)
+        """
+        logger.info("Fetching all active products...")
+        
+        all_products = list(self.iter_products(limit))
         
         logger.info(f"✅ Retrieved {len(all_products)} total active products")
         return all_products
     
-    def get_product_metafields(self, product_id: str) -> Dict:
+    def get_product(self, product_id: str) -> Optional[Product]:
+        """
+        Get a single product (same fields as the listing)
+        
+        Args:
+            product_id: Shopify product id
+        
+        Returns:
+            Product record, or None if it doesn't exist
+        """
+        try:
+            data = self._make_request(f'products/{product_id}.json', {'fields': PRODUCT_FIELDS})
+        except ShopifyNotFound:
+            return None
+        product = data.get('product')
+        return Product.from_dict(product) if product else None
+    
+    def get_product_metafields(self, product_id: str, raise_errors: bool = False) -> Dict:
         """
         Get metafields for a single product
         
@@ -225,6 +294,11 @@ class ShopifyClient:
             'stamped': {'rating': '4.5', ...},
             ...
         }
+        
+        Args:
+            product_id: Shopify product id
+            raise_errors: Re-raise API errors (404 and exhausted 429 retries included)
+                          instead of returning {}
         """
         try:
             data = self._make_request(f'products/{product_id}/metafields.json', {'limit': 250})
@@ -246,12 +320,18 @@ class ShopifyClient:
             
         except Exception as e:
             logger.error(f"Error fetching metafields for product {product_id}: {e}")
+            if raise_errors:
+                raise
             return {}
     
-    def get_product_collections(self, product_id: str) -> List[str]:
+    def get_product_collections(self, product_id: str, raise_errors: bool = False) -> List[str]:
         """
         Get collection titles for a product using correct Shopify API
         
+        Args:
+            product_id: Shopify product id
+            raise_errors: Re-raise API errors instead of skipping the collection type
+        
         Returns:
             List of collection titles (e.g., ["Summer Collection", "Best Sellers"])
         """
@@ -266,6 +346,8 @@ class ShopifyClient:
                     titles.append(title)
         except Exception as e:
             logger.warning(f"Error fetching custom collections for product {product_id}: {e}")
+            if raise_errors:
+                raise
         
         # Get smart collections
         try:
@@ -276,6 +358,8 @@ class ShopifyClient:
                     titles.append(title)
         except Exception as e:
             logger.warning(f"Error fetching smart collections for product {product_id}: {e}")
+            if raise_errors:
+                raise
         
         return titles
     
@@ -286,12 +370,39 @@ class ShopifyClient:
         This is called once per product in the streaming process.
         
         Args:
-            product: Basic product dict from get_all_products()
+            product: Basic product (record or dict) from iter_products()
         
         Returns:
-            Same product dict with added 'metafields' and 'collections' keys
+            Same product with added 'metafields' and 'collections' keys
         """
         product_id = str(product.get('id', ''))
+        updated_at = product.get('updated_at', '')
+        
+        # Product unchanged since last run: no API calls
+        if self.enrichment_cache:
+            cached = self.enrichment_cache.get(product_id, updated_at)
+            if cached is not None:
+                product['metafields'], product['collections'] = cached
+                return product
+            
+            # Only complete data is cached: a failed call (404, 429 retries exhausted, ...)
+            # would otherwise be served as "no metafields/collections" until the TTL
+            try:
+                metafields = self.get_product_metafields(product_id, raise_errors=True)
+                collections = self.get_product_collections(product_id, raise_errors=True)
+            except ShopifyNotFound:
+                # Product deleted meanwhile: nothing to fetch again
+                metafields, collections = {}, []
+            except Exception:
+                # Don't cache partial data: fall back to best-effort fetch
+                metafields = self.get_product_metafields(product_id)
+                collections = self.get_product_collections(product_id)
+            else:
+                self.enrichment_cache.put(product_id, updated_at, metafields, collections)
+            
+            product['metafields'] = metafields
+            product['collections'] = collections
+            return product
         
         # Get metafields
         metafields = self.get_product_metafields(product_id)
@@ -0,0 +1,213 @@
+"""
+Webhook Micro-Batcher - Coalesce product webhooks into incremental feed updates
+
+Shopify sends one webhook per product change, often several per second
+for the same product (bulk edits, inventory sync). Instead of patching
+the feeds per notification, product ids are collected for a short
+window and flushed together: the last event per product wins
+(update after delete = update, delete after update = delete).
+
+A batch whose flush fails is merged back into the pending one (newer
+events for the same product win) and retried after an exponential
+backoff; a product failing max_attempts times in a row is dropped
+(logged, counted) and left to the next full regeneration.
+"""
+
+import threading
+import time
+import logging
+from typing import Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+ACTION_UPDATE = 'update'
+ACTION_DELETE = 'delete'
+
+
+class MicroBatcher:
+    """
+    Collects product ids and flushes them after a time window
+
+    The flush callback runs on a dedicated worker thread, one batch at a
+    time: events arriving while a batch is being applied go into the next
+    batch.
+    """
+
+    def __init__(self, flush_callback: Callable[[Set[int], Set[int]], None],
+                 window_seconds: float = 30.0, max_batch_size: int = 500,
+                 max_attempts: int = 5, retry_backoff_seconds: float = 30.0,
+                 max_backoff_seconds: float = 600.0):
+        """
+        Initialize batcher
+
+        Args:
+            flush_callback: Called as flush_callback(updated_ids, deleted_ids);
+                            an exception means the batch was not applied
+            window_seconds: How long to wait after the first event of a batch
+            max_batch_size: Flush early when this many distinct products are pending
+            max_attempts: Failed flushes of a product before it is dropped
+            retry_backoff_seconds: Wait before the first retry (doubled at each failure)
+            max_backoff_seconds: Upper bound of the retry wait
+        """
+        self.flush_callback = flush_callback
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self._pending: Dict[int, str] = {}
+        self._first_event_at: Optional[float] = None
+        # Failed flushes per product, consecutive failures, no flush before _retry_at
+        self._attempts: Dict[int, int] = {}
+        self._failures = 0
+        self._retry_at = 0.0
+        self._condition = threading.Condition()
+        self._apply_lock = threading.Lock()
+        self._stopped = False
+
+        # Stats
+        self.events_received = 0
+        self.batches_flushed = 0
+        self.products_flushed = 0
+        self.batches_failed = 0
+        self.products_dropped = 0
+
+        self._worker = threading.Thread(target=self._run, name='webhook-batcher', daemon=True)
+        self._worker.start()
+
+    def add(self, product_id: int, action: str = ACTION_UPDATE):
+        """
+        Enqueue a product change
+
+        Args:
+            product_id: Shopify product id
+            action: ACTION_UPDATE or ACTION_DELETE
+        """
+        with self._condition:
+            self._pending[int(product_id)] = action
+            self.events_received += 1
+
+            if self._first_event_at is None:
+                self._first_event_at = time.monotonic()
+
+            self._condition.notify()
+
+    def flush_now(self) -> bool:
+        """
+        Apply pending changes immediately (blocks until the batch is applied)
+
+        Returns:
+            False if the flush failed (the batch is pending again, see _requeue)
+        """
+        batch = self._take_batch()
+        return self._apply(batch) if batch else True
+
+    def pending_count(self) -> int:
+        """Number of distinct products waiting for the next flush"""
+        with self._condition:
+            return len(self._pending)
+
+    def stop(self):
+        """Stop the worker (pending changes are discarded)"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def get_stats(self) -> Dict:
+        """Batcher statistics"""
+        with self._condition:
+            return {
+                'events_received': self.events_received,
+                'pending': len(self._pending),
+                'batches_flushed': self.batches_flushed,
+                'products_flushed': self.products_flushed,
+                'batches_failed': self.batches_failed,
+                'products_dropped': self.products_dropped,
+                'window_seconds': self.window_seconds
+            }
+
+    # ========== WORKER ==========
+
+    def _take_batch(self) -> Dict[int, str]:
+        """Detach the pending batch"""
+        with self._condition:
+            batch = self._pending
+            self._pending = {}
+            self._first_event_at = None
+            return batch
+
+    def _run(self):
+        while True:
+            with self._condition:
+                # Wait for the first event
+                while not self._stopped and self._first_event_at is None:
+                    self._condition.wait()
+
+                # Wait until the window expires (or the batch is full), never before a retry backoff
+                while not self._stopped and self._first_event_at is not None:
+                    now = time.monotonic()
+                    remaining = max(self._first_event_at + self.window_seconds - now, self._retry_at - now)
+                    if remaining <= 0 or (len(self._pending) >= self.max_batch_size and now >= self._retry_at):
+                        break
+                    self._condition.wait(remaining)
+
+                if self._stopped:
+                    return
+
+            batch = self._take_batch()
+            if batch:
+                self._apply(batch)
+
+    def _apply(self, batch: Dict[int, str]) -> bool:
+        """Run the flush callback (one batch at a time); a failed batch is requeued"""
+        updated = {pid for pid, action in batch.items() if action == ACTION_UPDATE}
+        deleted = {pid for pid, action in batch.items() if action == ACTION_DELETE}
+
+        with self._apply_lock:
+            logger.info(f"📬 Flushing webhook batch: {len(updated)} updated, {len(deleted)} deleted products")
+
+            try:
+                self.flush_callback(updated, deleted)
+            except Exception as e:
+                logger.error(f"💥 Error applying webhook batch: {e}", exc_info=True)
+                self._requeue(batch)
+                return False
+
+        with self._condition:
+            self.batches_flushed += 1
+            self.products_flushed += len(batch)
+            self._failures = 0
+            self._retry_at = 0.0
+            for pid in batch:
+                self._attempts.pop(pid, None)
+        return True
+
+    def _requeue(self, batch: Dict[int, str]):
+        """Merge a failed batch into the pending one and schedule the retry after a backoff"""
+        with self._condition:
+            self.batches_failed += 1
+            self._failures += 1
+            dropped = []
+            for pid, action in batch.items():
+                attempts = self._attempts.get(pid, 0) + 1
+                if attempts >= self.max_attempts:
+                    self._attempts.pop(pid, None)
+                    dropped.append(pid)
+                    continue
+                self._attempts[pid] = attempts
+                # A newer event received during the flush wins
+                self._pending.setdefault(pid, action)
+
+            if dropped:
+                self.products_dropped += len(dropped)
+                logger.error(f"❌ Dropping {len(dropped)} products after {self.max_attempts} failed flushes "
+                             f"(next full regeneration includes them): {sorted(dropped)[:10]}")
+
+            if self._pending:
+                backoff = min(self.retry_backoff_seconds * 2 ** (self._failures - 1), self.max_backoff_seconds)
+                self._retry_at = time.monotonic() + backoff
+                if self._first_event_at is None:
+                    self._first_event_at = time.monotonic()
+                logger.warning(f"🔁 Retrying {len(self._pending)} pending products in {backoff:.0f}s")
+                self._condition.notify()
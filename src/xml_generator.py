@@ -5,16 +5,75 @@ Compatible with DataFeedWatch format (rss/channel/item instead of feed/entry)
 Writes items directly to file without storing in memory
 """
 
+import os
 import logging
-from typing import Dict, List, Optional, TextIO
-import xml.etree.ElementTree as ET
+from typing import Dict, Optional
+
+from core.xml_escape import escape_xml
+from core.xml_item_renderer import (
+    compile_item_renderer, REQUIRED, OPTIONAL, DEFAULT, LIST_SPLIT, DETAILS
+)
+from src.feed_writer import FeedWriter, DEFAULT_BUFFER_SIZE, DEFAULT_BATCH_ITEMS, DEFAULT_GZIP_LEVEL
 
 logger = logging.getLogger(__name__)
 
+# Google Shopping item fields, in output order (see core/xml_item_renderer.py)
+ITEM_SCHEMA = (
+    # Required fields
+    ('id', REQUIRED),
+    ('title', REQUIRED),
+    ('description', REQUIRED),
+    ('link', REQUIRED),
+    ('image_link', REQUIRED),
+    # Additional images - one XML tag per image (Google Shopping requirement)
+    ('additional_image_link', LIST_SPLIT),
+    # Price and availability
+    ('availability', REQUIRED),
+    ('price', REQUIRED),
+    ('sale_price', OPTIONAL),
+    # Product identifiers
+    ('brand', REQUIRED),
+    ('condition', DEFAULT, 'new'),
+    ('gtin', OPTIONAL),
+    ('mpn', OPTIONAL),
+    # Categories
+    ('google_product_category', REQUIRED),
+    ('product_type', OPTIONAL),
+    # Product attributes
+    ('gender', REQUIRED),
+    ('age_group', REQUIRED),
+    ('color', OPTIONAL),
+    ('size', OPTIONAL),
+    ('material', OPTIONAL),
+    ('pattern', OPTIONAL),
+    # Product detail - nested XML structure
+    ('product_detail', DETAILS),
+    # Item group ID (for variants), shipping, star rating
+    ('item_group_id', OPTIONAL),
+    ('shipping', OPTIONAL),
+    ('product_rating', OPTIONAL),
+    # Custom labels
+    ('custom_label_0', OPTIONAL),
+    ('custom_label_1', OPTIONAL),
+    ('custom_label_2', OPTIONAL),
+    ('custom_label_3', OPTIONAL),
+    ('custom_label_4', OPTIONAL),
+    # Additional fields from transformer_n
+    ('size_system', OPTIONAL),
+    ('is_bundle', OPTIONAL),
+    ('product_highlight', OPTIONAL),
+    ('TAGS', OPTIONAL),
+)
+
+# Fields shared by the variants of a product: rendered once, reused by the siblings
+PRODUCT_FIELDS = ('description', 'additional_image_link', 'product_type', 'custom_label_0', 'custom_label_1',
+                  'product_highlight', 'TAGS')
+
 
 class StreamingXMLGenerator:
     """
     Streaming XML generator that writes directly to file
+    (rendered items are batched and written as UTF-8 through a FeedWriter)
     
     Format: RSS 2.0 (compatible with DataFeedWatch)
     <rss>
@@ -25,16 +84,29 @@ class StreamingXMLGenerator:
     </rss>
     """
     
-    def __init__(self, output_file: str):
+    def __init__(self, output_file: str, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 batch_items: int = DEFAULT_BATCH_ITEMS, gzip_file: Optional[str] = None,
+                 gzip_level: int = DEFAULT_GZIP_LEVEL):
         """
         Initialize streaming XML generator
         
         Args:
             output_file: Path to output XML file
+            buffer_size: Output buffer in bytes
+            batch_items: Items joined and encoded per write
+            gzip_file: Also write a gzip copy of the feed here (None = no copy)
+            gzip_level: zlib compression level of the copy
         """
         self.output_file = output_file
-        self.file: Optional[TextIO] = None
+        self.file: Optional[FeedWriter] = None
+        self.buffer_size = buffer_size
+        self.batch_items = batch_items
+        self.gzip_file = gzip_file
+        self.gzip_level = gzip_level
         self.item_count = 0
+        
+        # Item schema compiled into one render function (one string per item)
+        self._render_item = compile_item_renderer('google', ITEM_SCHEMA, PRODUCT_FIELDS)
     
     def start_feed(self, title: str, link: str, description: str):
         """
@@ -45,7 +117,8 @@ class StreamingXMLGenerator:
             link: Feed link
             description: Feed description
         """
-        self.file = open(self.output_file, 'w', encoding='utf-8')
+        self.file = FeedWriter(self.output_file, 'wb', self.buffer_size, self.batch_items,
+                               self.gzip_file, self.gzip_level)
         
         # Write XML declaration and RSS opening
         self.file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
@@ -59,173 +132,91 @@ class StreamingXMLGenerator:
         
         logger.info(f"✅ Started streaming XML feed: {self.output_file}")
     
-    def add_item(self, item_data: Dict):
+    def resume_feed(self, byte_offset: int, item_count: int):
         """
-        Add a single item to the feed (writes immediately to file)
+        Reopen a partially written feed from a checkpoint
+        
+        Everything after byte_offset (items of a product interrupted
+        mid-write) is discarded, then writing continues in append mode.
         
         Args:
-            item_data: Dictionary with Google Shopping fields (with or without g: prefix)
+            byte_offset: Size of the feed at the last checkpoint
+            item_count: Items already written up to byte_offset
         """
-        if not self.file:
-            raise RuntimeError("Feed not started. Call start_feed() first.")
-        
-        # Helper to get value with or without g: prefix
-        def get_field(key):
-            return item_data.get(f'g:{key}') or item_data.get(key)
-        
-        self.file.write('    <item>\n')
-        
-        # Required fields
-        self._write_field('g:id', get_field('id'))
-        self._write_field('g:title', get_field('title'))
-        self._write_field('g:description', get_field('description'))
-        self._write_field('g:link', get_field('link'))
-        self._write_field('g:image_link', get_field('image_link'))
-        
-        # Additional images - Write one XML tag per image (Google Shopping requirement)
-        additional_images = get_field('additional_image_link')
-        if additional_images:
-            if isinstance(additional_images, list):
-                # Write separate tag for each image
-                for img_url in additional_images:
-                    if img_url and img_url.strip():
-                        self._write_field('g:additional_image_link', img_url.strip())
-            else:
-                # If string with comma-separated values, split and write separately
-                img_urls = str(additional_images).split(',')
-                for img_url in img_urls:
-                    if img_url and img_url.strip():
-                        self._write_field('g:additional_image_link', img_url.strip())
-        
-        # Price and availability
-        self._write_field('g:availability', get_field('availability'))
-        self._write_field('g:price', get_field('price'))
-        
-        # Sale price (optional)
-        if get_field('sale_price'):
-            self._write_field('g:sale_price', get_field('sale_price'))
-        
-        # Product identifiers
-        self._write_field('g:brand', get_field('brand'))
-        self._write_field('g:condition', get_field('condition') or 'new')
-        
-        if get_field('gtin'):
-            self._write_field('g:gtin', get_field('gtin'))
-        
-        if get_field('mpn'):
-            self._write_field('g:mpn', get_field('mpn'))
-        
-        # Categories
-        self._write_field('g:google_product_category', get_field('google_product_category'))
-        
-        if get_field('product_type'):
-            self._write_field('g:product_type', get_field('product_type'))
-        
-        # Product attributes
-        self._write_field('g:gender', get_field('gender'))
-        self._write_field('g:age_group', get_field('age_group'))
-        
-        if get_field('color'):
-            self._write_field('g:color', get_field('color'))
-        
-        if get_field('size'):
-            self._write_field('g:size', get_field('size'))
-        
-        if get_field('material'):
-            self._write_field('g:material', get_field('material'))
-        
-        if get_field('pattern'):
-            self._write_field('g:pattern', get_field('pattern'))
-        
-        # Product detail - handle as nested XML structure
-        product_detail = get_field('product_detail')
-        if product_detail and isinstance(product_detail, list):
-            self._write_product_details(product_detail)
-        
-        # Item group ID (for variants)
-        if get_field('item_group_id'):
-            self._write_field('g:item_group_id', get_field('item_group_id'))
-        
-        # Shipping
-        if get_field('shipping'):
-            self._write_field('g:shipping', get_field('shipping'))
-        
-        # Star rating
-        if get_field('product_rating'):
-            self._write_field('g:product_rating', get_field('product_rating'))
-        
-        # Custom labels
-        if get_field('custom_label_0'):
-            self._write_field('g:custom_label_0', get_field('custom_label_0'))
-        
-        if get_field('custom_label_1'):
-            self._write_field('g:custom_label_1', get_field('custom_label_1'))
-        
-        if get_field('custom_label_2'):
-            self._write_field('g:custom_label_2', get_field('custom_label_2'))
+        os.truncate(self.output_file, byte_offset)
+        self.file = FeedWriter(self.output_file, 'ab', self.buffer_size, self.batch_items,
+                               self.gzip_file, self.gzip_level)
+        self.item_count = item_count
         
-        if get_field('custom_label_3'):
-            self._write_field('g:custom_label_3', get_field('custom_label_3'))
+        logger.info(f"✅ Resumed streaming XML feed: {self.output_file} ({item_count} items already written)")
+    
+    def start_shard(self):
+        """
+        Open the output for items only (no header): a shard of a feed
+        rendered in parallel, merged later with append_shard()
+        """
+        self.file = FeedWriter(self.output_file, 'wb', self.buffer_size, self.batch_items)
+    
+    def end_shard(self):
+        """Close a shard (no footer)"""
+        if not self.file:
+            raise RuntimeError("Shard not started")
         
-        if get_field('custom_label_4'):
-            self._write_field('g:custom_label_4', get_field('custom_label_4'))
+        self.file.close()
+    
+    def append_shard(self, shard_file: str, item_count: int):
+        """
+        Copy a rendered shard into the feed (between start_feed and end_feed)
         
-        # Additional fields from transformer_n
-        if get_field('size_system'):
-            self._write_field('g:size_system', get_field('size_system'))
+        Args:
+            shard_file: Shard written by another generator (start_shard/end_shard)
+            item_count: Items in the shard
+        """
+        if not self.file:
+            raise RuntimeError("Feed not started. Call start_feed() first.")
         
-        if get_field('is_bundle'):
-            self._write_field('g:is_bundle', get_field('is_bundle'))
+        self.file.append_file(shard_file)
+        self.item_count += item_count
+    
+    def checkpoint_offset(self) -> int:
+        """
+        Flush pending output and return the number of bytes written so far
         
-        if get_field('product_highlight'):
-            self._write_field('g:product_highlight', get_field('product_highlight'))
+        Returns:
+            Current byte offset of the feed file
+        """
+        self.file.flush()
+        return self.file.tell()
+    
+    def add_item(self, item_data: Dict):
+        """
+        Add a single item to the feed (writes immediately to file)
         
-        if get_field('TAGS'):
-            self._write_field('g:TAGS', get_field('TAGS'))
+        Args:
+            item_data: Dictionary with Google Shopping fields (with or without g: prefix)
+        """
+        if not self.file:
+            raise RuntimeError("Feed not started. Call start_feed() first.")
         
-        self.file.write('    </item>\n')
+        self.file.write(self._render_item(item_data))
         self.item_count += 1
     
-    def _write_field(self, name: str, value: Optional[str]):
-        """Write a single XML field"""
-        if value is not None and str(value).strip():
-            escaped_value = self._escape(str(value))
-            self.file.write(f'      <{name}>{escaped_value}</{name}>\n')
-    
-    def _write_product_details(self, details: List[Dict[str, str]]):
+    def add_raw_item(self, item_xml: str):
         """
-        Write product_detail fields as nested XML
-        
-        Format:
-        <g:product_detail>
-          <g:attribute_name>Name</g:attribute_name>
-          <g:attribute_value>Value</g:attribute_value>
-        </g:product_detail>
+        Copy an already rendered <item> block (incremental feed updates)
         
         Args:
-            details: List of dicts with 'attribute_name' and 'attribute_value'
-        """
-        for detail in details:
-            attribute_name = detail.get('attribute_name', '')
-            attribute_value = detail.get('attribute_value', '')
-            
-            if attribute_name and attribute_value:
-                self.file.write('      <g:product_detail>\n')
-                self.file.write(f'        <g:attribute_name>{self._escape(attribute_name)}</g:attribute_name>\n')
-                self.file.write(f'        <g:attribute_value>{self._escape(attribute_value)}</g:attribute_value>\n')
-                self.file.write('      </g:product_detail>\n')
+            item_xml: Complete '    <item>...</item>' block including newlines
+        """
+        if not self.file:
+            raise RuntimeError("Feed not started. Call start_feed() first.")
+        
+        self.file.write(item_xml)
+        self.item_count += 1
     
     def _escape(self, text: str) -> str:
         """Escape XML special characters"""
-        if not text:
-            return ""
-        
-        return (text
-                .replace('&', '&amp;')
-                .replace('<', '&lt;')
-                .replace('>', '&gt;')
-                .replace('"', '&quot;')
-                .replace("'", '&apos;'))
+        return escape_xml(text)
     
     def end_feed(self):
         """Close the XML feed"""
@@ -237,3 +228,13 @@ class StreamingXMLGenerator:
         self.file.close()
         
         logger.info(f"✅ Closed XML feed with {self.item_count} items")
+        stats = self.compression_stats()
+        if stats and stats['success']:
+            logger.info(f"✅ Gzip copy: {stats['output_bytes'] / (1024 * 1024):.2f} MB "
+                        f"({stats['ratio']}x, {stats['cpu_seconds']:.2f}s CPU)")
+    
+    def compression_stats(self) -> Optional[Dict]:
+        """Gzip copy stats (see GzipCompressor.get_stats; None without gzip_file, final after end_feed)"""
+        if not self.file or not self.file.gzip:
+            return None
+        return self.file.gzip.get_stats()
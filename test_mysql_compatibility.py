@@ -19,6 +19,7 @@ import os
 import sys
 import json
 import logging
+from collections.abc import Mapping
 from typing import Dict, List, Any, Tuple
 
 # Setup logging
@@ -99,8 +100,8 @@ def validate_product_structure(product: Dict, index: int) -> List[str]:
         errors.append(f"Product {product_id}: 'images' deve essere lista, trovato {type(images).__name__}")
     else:
         for i, img in enumerate(images):
-            if not isinstance(img, dict):
-                errors.append(f"Product {product_id}: images[{i}] deve essere dict")
+            if not isinstance(img, Mapping):
+                errors.append(f"Product {product_id}: images[{i}] deve essere dict o record")
             elif 'src' not in img:
                 errors.append(f"Product {product_id}: images[{i}] manca 'src'")
             elif not img.get('src'):
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Test end-to-end dei webhook Shopify (create/update/delete)
+
+Questo script:
+1. Avvia un simulatore Shopify locale (bench/shopify_simulator.py)
+2. Genera i feed completi dal catalogo simulato
+3. Modifica il catalogo: titolo cambiato, prodotto in bozza, prodotto eliminato, prodotto nuovo
+4. Invia i webhook firmati all'app Flask (flush reale: apply_webhook_batch)
+5. Verifica il contenuto dei feed patchati (Google e Meta)
+
+Eseguire con:
+    python test_webhooks.py
+
+Non richiede credenziali: lavora in una directory temporanea.
+"""
+
+import copy
+import os
+import sys
+import tempfile
+import threading
+import time
+import logging
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Aggiungi path per import
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+G = '{http://base.google.com/ns/1.0}'
+FEEDS = ('google_shopping_feed.xml', 'meta_catalog_feed.xml')
+SECRET = 'test-webhook-secret'
+
+
+def read_feed(path: Path) -> Dict[str, Tuple[str, str]]:
+    """Item del feed: g:id -> (g:item_group_id, g:title)"""
+    items = {}
+    for item in ET.parse(path).getroot().iter('item'):
+        items[item.findtext(f'{G}id')] = (item.findtext(f'{G}item_group_id'), item.findtext(f'{G}title'))
+    return items
+
+
+def group_ids(items: Dict[str, Tuple[str, str]]) -> set:
+    """Prodotti (item_group_id) presenti nel feed"""
+    return {group for group, _ in items.values()}
+
+
+def new_product(sim, template: Dict) -> Dict:
+    """Nuovo prodotto attivo (copia di template con id, handle e varianti nuovi)"""
+    product_id = sim.products_by_id[-1]['id'] + 7
+    product = copy.deepcopy(template)
+    product.update(id=product_id, title='Webhook Test Sneaker', handle='webhook-test-sneaker', status='active')
+    for index, variant in enumerate(product['variants']):
+        variant.update(id=product_id * 100 + index, product_id=product_id, sku=f'SKU-WEBHOOK-{index}')
+
+    sim.catalog['products'].append(product)
+    sim.products_by_id.append(product)
+    sim.catalog['metafields'][product_id] = copy.deepcopy(sim.catalog['metafields'][template['id']])
+    sim.catalog['collections'][product_id] = copy.deepcopy(sim.catalog['collections'][template['id']])
+    return product
+
+
+def main():
+    """Esegue il test"""
+    from bench.shopify_simulator import ShopifySimulator
+    from bench.webhook_sender import send_webhook
+
+    logger.info("=" * 80)
+    logger.info("TEST WEBHOOK SHOPIFY")
+    logger.info("=" * 80)
+
+    checks: List[Tuple[str, bool]] = []
+    sim = ShopifySimulator(num_products=30, bucket_size=400, leak_rate=200).start()
+    workdir = tempfile.TemporaryDirectory()
+    cwd = os.getcwd()
+    server = None
+    batcher = None
+
+    try:
+        # Feed, cache e metriche vanno nella directory temporanea (percorsi relativi alla cwd)
+        os.symlink(os.path.join(ROOT, 'config'), os.path.join(workdir.name, 'config'))
+        os.chdir(workdir.name)
+        os.environ.update({
+            'USE_MYSQL': 'false',
+            'SHOPIFY_SHOP_URL': sim.shop_url,
+            'SHOPIFY_ACCESS_TOKEN': 'test-token',
+            'SHOPIFY_API_BASE_URL': sim.api_base_url,
+            'ENRICHMENT_CACHE_ENABLED': 'false',
+            'SHOPIFY_WEBHOOK_SECRET': SECRET
+        })
+
+        from werkzeug.serving import make_server
+
+        import app_multiplatform
+        from orchestrator import FeedOrchestrator
+        from src.webhook_batcher import MicroBatcher
+
+        # 1. Feed completi
+        logger.info("\n[1/3] Generazione feed completi...")
+        if not FeedOrchestrator().generate_all_feeds():
+            logger.error("❌ Generazione feed fallita")
+            sys.exit(1)
+
+        public = Path('public')
+        before = {name: read_feed(public / name) for name in FEEDS}
+        active = [p for p in sim.products_by_id if p['status'] == 'active']
+        updated, drafted, deleted = active[0], active[1], active[2]
+        for name, items in before.items():
+            checks.append((f'{name}: prodotti presenti prima dei webhook',
+                           {str(p['id']) for p in (updated, drafted, deleted)} <= group_ids(items)))
+
+        # 2. Modifiche al catalogo + webhook firmati
+        logger.info("\n[2/3] Modifica catalogo e invio webhook...")
+        updated['title'] = 'Titolo Aggiornato Webhook'
+        drafted['status'] = 'draft'
+        sim.products_by_id.remove(deleted)
+        sim.catalog['products'].remove(deleted)
+        created = new_product(sim, active[3])
+
+        app_multiplatform.WEBHOOK_SECRET = SECRET
+        batcher = MicroBatcher(app_multiplatform.apply_webhook_batch, window_seconds=0.5, retry_backoff_seconds=0.5)
+        app_multiplatform._webhook_batcher = batcher
+        server = make_server('127.0.0.1', 0, app_multiplatform.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/webhooks/products"
+
+        status, _ = send_webhook(url, 'products/update', updated['id'], secret='wrong-secret')
+        checks.append(('firma non valida rifiutata (401)', status == 401))
+
+        events = [('products/update', updated['id']), ('products/update', drafted['id']),
+                  ('products/delete', deleted['id']), ('products/create', created['id'])]
+        statuses = [send_webhook(url, topic, product_id, SECRET)[0] for topic, product_id in events]
+        checks.append(('webhook accettati (200)', all(code == 200 for code in statuses)))
+
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            stats = batcher.get_stats()
+            if stats['batches_flushed'] or stats['products_dropped']:
+                break
+            time.sleep(0.1)
+        stats = batcher.get_stats()
+        checks.append(('batch applicato al primo tentativo',
+                       stats['batches_flushed'] == 1 and stats['batches_failed'] == 0))
+
+        # 3. Contenuto dei feed patchati
+        logger.info("\n[3/3] Verifica feed patchati...")
+        for name in FEEDS:
+            items = read_feed(public / name)
+            groups = group_ids(items)
+            titles = {title for group, title in items.values() if group == str(updated['id'])}
+            created_ids = {item_id for item_id, (group, _) in items.items() if group == str(created['id'])}
+            untouched = {item_id: item for item_id, item in before[name].items()
+                         if item[0] not in {str(p['id']) for p in (updated, drafted, deleted)}}
+
+            checks.append((f'{name}: titolo aggiornato',
+                           bool(titles) and all(title.startswith('Titolo Aggiornato Webhook') for title in titles)))
+            checks.append((f'{name}: prodotto in bozza rimosso', str(drafted['id']) not in groups))
+            checks.append((f'{name}: prodotto eliminato rimosso', str(deleted['id']) not in groups))
+            checks.append((f'{name}: prodotto creato aggiunto (una riga per variante)',
+                           created_ids == {str(v['id']) for v in created['variants']}))
+            checks.append((f'{name}: altri prodotti invariati',
+                           all(items.get(item_id) == item for item_id, item in untouched.items())))
+    finally:
+        if server is not None:
+            server.shutdown()
+        if batcher is not None:
+            batcher.stop()
+        os.chdir(cwd)
+        sim.stop()
+        workdir.cleanup()
+
+    # Final report
+    logger.info("\n" + "=" * 80)
+    logger.info("REPORT FINALE")
+    logger.info("=" * 80)
+    for name, passed in checks:
+        logger.info(f"{'✅' if passed else '❌'} {name}")
+
+    if all(passed for _, passed in checks):
+        logger.info("\n✅ TEST COMPLETATO CON SUCCESSO")
+        sys.exit(0)
+    else:
+        logger.error("\n❌ TEST FALLITO")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()